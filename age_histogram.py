@@ -0,0 +1,239 @@
+"""
+age_histogram.py - Histograma de edades simples (año a año) por municipio y mes
+Se construye una vez con np.bincount; cualquier agrupación de edades (rangos PAI,
+quinquenios DANE, curso de vida o límites elegidos en la interfaz) se obtiene
+sumando celdas del histograma, sin recalcular edades registro por registro
+"""
+
+import numpy as np
+import pandas as pd
+
+from parallel_loader import (
+    COLUMNA_MUNICIPIO,
+    COLUMNA_VACUNACION,
+    ETIQUETAS_RANGOS_EDAD,
+    LIMITES_RANGOS_EDAD,
+)
+
+# Última celda: edades de EDAD_MAXIMA años o más (conteos int32: el histograma se
+# guarda en la caché de Streamlit)
+EDAD_MAXIMA = 110
+
+# Bases de edad: actual (cambia cada día) o a la fecha de vacunación (estable)
+BASE_ACTUAL = "Edad actual"
+BASE_VACUNACION = "Edad al vacunarse"
+
+SIN_MUNICIPIO = "Sin municipio"
+SIN_FECHA = "Sin fecha"
+
+LIMITES_PAI = [int(limite) for limite in LIMITES_RANGOS_EDAD[:-1]]
+
+# Agrupaciones predefinidas: límites inferiores de cada rango (el último es abierto)
+AGRUPACIONES_EDAD = {
+    "Rangos PAI": {"limites": LIMITES_PAI, "etiquetas": ETIQUETAS_RANGOS_EDAD},
+    "Quinquenios DANE": {"limites": list(range(0, 85, 5)), "etiquetas": None},
+    "Curso de vida": {
+        "limites": [0, 6, 12, 18, 29, 60],
+        "etiquetas": [
+            "Primera infancia (0-5)",
+            "Infancia (6-11)",
+            "Adolescencia (12-17)",
+            "Juventud (18-28)",
+            "Adultez (29-59)",
+            "Vejez (60+)",
+        ],
+    },
+}
+
+
+def month_periods(fechas):
+    """Mes de cada fecha como entero AAAAMM (NaN para NaT)"""
+    return fechas.dt.year * 100 + fechas.dt.month
+
+
+def _month_codes(periodos):
+    """
+    Códigos y etiquetas 'AAAA-MM' solo de los meses presentes (una fecha atípica no
+    agrega al histograma todos los meses intermedios); los NaN van a SIN_FECHA al final
+    """
+    codigos, presentes = pd.factorize(periodos, sort=True, use_na_sentinel=True)
+    nombres = [f"{int(p) // 100:04d}-{int(p) % 100:02d}" for p in presentes]
+    if (codigos < 0).any():
+        codigos = np.where(codigos < 0, len(nombres), codigos)
+        nombres.append(SIN_FECHA)
+    return codigos, nombres
+
+
+def _factorize_labels(valores, etiqueta_nulo):
+    """Códigos y nombres ordenados; los nulos forman su propia categoría al final"""
+    codigos, nombres = pd.factorize(valores, sort=True, use_na_sentinel=True)
+    nombres = list(nombres)
+    if (codigos < 0).any():
+        codigos = np.where(codigos < 0, len(nombres), codigos)
+        nombres.append(etiqueta_nulo)
+    return codigos, nombres
+
+
+def build_age_histogram(edades, municipios, periodos, pesos=None):
+    """
+    Conteos por (municipio, mes, edad simple) con un solo np.bincount
+
+    Args:
+        edades: Edades en años (NaN = desconocida, no se cuenta)
+        municipios: Municipio de cada registro (nulos como categoría propia)
+        periodos: Mes AAAAMM de cada registro (ver month_periods; NaN = sin fecha)
+        pesos: Conteo de cada registro (filas ya agregadas, p. ej. desde SQL)
+
+    Returns:
+        dict: {"conteos": ndarray (municipios, periodos, EDAD_MAXIMA + 1),
+               "municipios": list, "periodos": list 'AAAA-MM', "sin_edad": int}
+    """
+    edades = pd.Series(edades).to_numpy(dtype="float64", na_value=np.nan)
+    validas = ~np.isnan(edades)
+    pesos = np.ones(len(edades), dtype="int64") if pesos is None else np.asarray(pesos)
+
+    cod_municipio, nombres_municipio = _factorize_labels(
+        pd.Series(municipios, copy=False), SIN_MUNICIPIO
+    )
+    cod_periodo, nombres_periodo = _month_codes(
+        pd.Series(periodos, copy=False).to_numpy(dtype="float64", na_value=np.nan)[validas]
+    )
+    cod_municipio = cod_municipio[validas]
+
+    n_edades = EDAD_MAXIMA + 1
+    edad = np.clip(edades[validas], 0, EDAD_MAXIMA).astype("int64")
+    forma = (len(nombres_municipio), len(nombres_periodo), n_edades)
+    indice = (cod_municipio * forma[1] + cod_periodo) * n_edades + edad
+
+    conteos = np.bincount(indice, weights=pesos[validas], minlength=int(np.prod(forma)))
+    return {
+        "conteos": conteos.astype("int32").reshape(forma),
+        "municipios": nombres_municipio,
+        "periodos": nombres_periodo,
+        "sin_edad": int(pesos[~validas].sum()),
+    }
+
+
+def freeze_histogram(histograma):
+    """
+    Marca los conteos como solo lectura: el histograma se comparte entre sesiones
+    (st.cache_resource) en vez de copiarse en cada ejecución
+    """
+    if histograma is not None:
+        histograma["conteos"].flags.writeable = False
+    return histograma
+
+
+def frame_age_histogram(df, edades):
+    """Histograma del registro individual: edades dadas, municipio y mes de FA UNICA"""
+    sin_dato = pd.Series(np.nan, index=df.index)
+    municipios = df[COLUMNA_MUNICIPIO] if COLUMNA_MUNICIPIO in df.columns else sin_dato
+    if COLUMNA_VACUNACION in df.columns:
+        periodos = month_periods(df[COLUMNA_VACUNACION])
+    else:
+        periodos = sin_dato
+    return build_age_histogram(edades, municipios, periodos)
+
+
+def ages_total(histograma, municipios=None, periodos=None):
+    """Conteo por edad simple, sumando los municipios y periodos indicados (todos si None)"""
+    conteos = histograma["conteos"]
+    if municipios is not None:
+        conteos = conteos[[histograma["municipios"].index(m) for m in municipios
+                           if m in histograma["municipios"]]]
+    if periodos is not None:
+        conteos = conteos[:, [histograma["periodos"].index(p) for p in periodos
+                              if p in histograma["periodos"]]]
+    return conteos.sum(axis=(0, 1))
+
+
+def parse_age_limits(texto):
+    """
+    Límites inferiores escritos por el usuario ("0, 1, 6, 11") como lista ordenada
+
+    Raises:
+        ValueError: Si hay valores no enteros o fuera de 0-EDAD_MAXIMA
+    """
+    try:
+        partes = [parte for parte in texto.replace(";", ",").split(",") if parte.strip()]
+        limites = sorted({int(parte) for parte in partes})
+    except ValueError:
+        raise ValueError("Los límites deben ser números enteros separados por coma")
+    if not limites or limites[0] < 0 or limites[-1] > EDAD_MAXIMA:
+        raise ValueError(f"Los límites deben ser enteros entre 0 y {EDAD_MAXIMA}")
+    if limites[0] != 0:
+        limites.insert(0, 0)
+    return limites
+
+
+def bin_labels(limites):
+    """Etiquetas 'a-b' de cada rango; el último es 'a+'"""
+    etiquetas = []
+    for inicio, siguiente in zip(limites, limites[1:] + [None]):
+        if siguiente is None:
+            etiquetas.append(f"{inicio}+")
+        elif siguiente - inicio == 1:
+            etiquetas.append(str(inicio))
+        else:
+            etiquetas.append(f"{inicio}-{siguiente - 1}")
+    return etiquetas
+
+
+def age_distribution(histograma, limites, etiquetas=None, municipios=None, periodos=None):
+    """
+    Conteos por rango de edad a partir del histograma (np.add.reduceat sobre las edades)
+
+    Returns:
+        dict: {etiqueta: conteo} en el orden de los rangos
+    """
+    etiquetas = etiquetas or bin_labels(limites)
+    por_edad = ages_total(histograma, municipios, periodos)
+    conteos = np.add.reduceat(por_edad, limites)
+    return {etiqueta: int(n) for etiqueta, n in zip(etiquetas, conteos)}
+
+
+def is_coarsening(limites, base=LIMITES_PAI):
+    """True si cada rango de limites es unión de rangos de base (conteos reagrupables)"""
+    return set(limites) <= set(base)
+
+
+def regroup_counts(conteos_base, limites, etiquetas=None, base=LIMITES_PAI,
+                   etiquetas_base=ETIQUETAS_RANGOS_EDAD):
+    """
+    Reagrupa conteos ya agregados en rangos base (p. ej. barridos en rangos PAI)
+    en una agrupación más gruesa (requiere is_coarsening)
+    """
+    etiquetas = etiquetas or bin_labels(limites)
+    destino = np.searchsorted(limites, base, side="right") - 1
+    resultado = dict.fromkeys(etiquetas, 0)
+    for indice, etiqueta_base in zip(destino, etiquetas_base):
+        resultado[etiquetas[indice]] += conteos_base.get(etiqueta_base, 0)
+    return resultado
+
+
+if __name__ == "__main__":
+    import time
+
+    # Benchmark: agrupaciones desde el histograma vs clasificar cada registro
+    n = 2_000_000
+    rng = np.random.default_rng(0)
+    edades = rng.integers(0, 95, n).astype("float64")
+    municipios = rng.choice([f"M{i:02d}" for i in range(47)], n)
+    fechas = pd.Series(pd.to_datetime("2016-01-01") + pd.to_timedelta(rng.integers(0, 3600, n), "D"))
+
+    inicio = time.perf_counter()
+    histograma = build_age_histogram(edades, municipios, month_periods(fechas))
+    construccion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for nombre, agrupacion in AGRUPACIONES_EDAD.items():
+        age_distribution(histograma, agrupacion["limites"], agrupacion["etiquetas"])
+    reagrupacion = (time.perf_counter() - inicio) / len(AGRUPACIONES_EDAD)
+
+    inicio = time.perf_counter()
+    pd.cut(edades, bins=LIMITES_PAI + [np.inf], right=False).value_counts()
+    por_registro = time.perf_counter() - inicio
+
+    print(f"Histograma {histograma['conteos'].shape}: construcción {construccion * 1000:.0f} ms")
+    print(f"Agrupación desde histograma: {reagrupacion * 1e6:.0f} µs")
+    print(f"Agrupación por registro (pd.cut): {por_registro * 1000:.0f} ms")
@@ -1,14 +1,26 @@
 """app.py - Dashboard de Vacunación Fiebre Amarilla - Tolima"""
 
+from instrumentation import (
+    start_script_timer,
+    record_startup_mark,
+    timed_import,
+    instrumented,
+    measure_stage,
+    configure as configure_instrumentation,
+)
+
+start_script_timer()
+
+import logging
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, date, timedelta
 import os
 from pathlib import Path
 
+# Logging configurado una vez en el punto de entrada (los módulos solo crean su logger)
+logging.basicConfig(level=logging.INFO)
+
 # Configuración de página
 st.set_page_config(
     page_title="Dashboard Vacunación Fiebre Amarilla - Tolima",
@@ -17,14 +29,111 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Importar vistas
-from vistas.overview import show_overview_tab
-from vistas.temporal import show_temporal_tab
-from vistas.geographic import show_geographic_tab
-from vistas.population import show_population_tab
+# Las vistas (plotly) se importan de forma diferida en main()
 
 # Importar cargador de Google Drive
-from google_drive_loader import load_from_drive, check_drive_availability
+from google_drive_loader import (
+    load_from_drive,
+    check_drive_availability,
+    cached_download,
+    cached_file_path,
+    revalidate_download,
+)
+
+# Importar ingesta paralela del registro individual
+from parallel_loader import (
+    ingest_parallel,
+    summarize_individual,
+    aggregate_frame,
+    subtract_aggregates,
+    compute_age_vectorized,
+    add_vaccination_age,
+    COLUMNA_EDAD_VACUNACION,
+)
+from age_histogram import LIMITES_PAI, age_distribution, frame_age_histogram, freeze_histogram
+
+# Importar detección de duplicados
+from deduplication import (
+    COLUMNA_DUPLICADO,
+    mark_individual_duplicates,
+    mark_barridos_duplicates,
+    drop_flagged_duplicates,
+    report_flagged_duplicates,
+    attach_duplicate_report,
+    get_duplicate_report,
+)
+
+# Importar conversión de fechas sobre valores únicos
+from date_parsing import parse_date_columns
+
+# Importar dataset compartido entre sesiones (copy-on-write)
+from shared_data import enable_copy_on_write, session_view
+
+enable_copy_on_write()
+
+# Importar soporte de archivos comprimidos (gzip, zstd, zip)
+from compression import find_data_file, is_compressed
+from input_schema import (
+    PATRONES_EDAD_BARRIDOS,
+    read_options,
+    pipeline_stages,
+    canonical_columns,
+    missing_fields,
+)
+from csv_engines import MOTOR_PANDAS, MOTORES, read_registry_csv, resolve_engine
+
+# Importar tokens de versión de datos (claves de caché sin hashear DataFrames)
+from data_version import file_fingerprint, attach_version, version_key
+
+# Importar snapshot Arrow compartido entre procesos
+from snapshot import (
+    DIRECTORIO_POR_DEFECTO as DIRECTORIO_SNAPSHOTS,
+    read_manifest,
+    write_snapshot,
+    open_snapshot,
+)
+
+# Importar cortacircuitos para Google Drive
+from circuit_breaker import (
+    UMBRAL_FALLOS,
+    ESPERA_BASE_S,
+    ESPERA_MAXIMA_S,
+    CircuitOpenError,
+    call_with_breaker,
+    remember_good,
+    last_good,
+)
+
+CIRCUITO_DRIVE = "google_drive"
+
+# Importar selección de fuente por frescura (local vs Drive)
+from source_resolver import (
+    DATASETS,
+    DATASETS_CRITICOS,
+    DRIVE,
+    LOCAL,
+    resolve_sources,
+    record_provenance,
+)
+
+# Importar backend analítico fuera de memoria (SQLite)
+from sql_backend import (
+    RUTA_POR_DEFECTO as RUTA_BACKEND_POR_DEFECTO,
+    ensure_individual_store,
+    query_individual_summary,
+    query_vaccination_age_histogram,
+    query_daily_counts,
+    query_duplicate_report,
+)
+
+# Importar catálogo de veredas (agregación de barridos por vereda)
+from vereda_catalog import (
+    CAPA_VEREDAS,
+    LIBRO_VEREDAS,
+    aggregate_sweeps_by_vereda,
+    build_vereda_index,
+    load_vereda_catalog,
+)
 
 # Colores institucionales
 COLORS = {
@@ -110,6 +219,41 @@ def setup_sidebar():
             unsafe_allow_html=True
         )
 
+def get_performance_config():
+    """Lee la sección [rendimiento] de los secretos (opcional)"""
+    try:
+        return dict(st.secrets.get("rendimiento", {}))
+    except Exception:
+        return {}
+
+def get_csv_engine():
+    """Motor de lectura del CSV individual: "pandas" o "arrow" (requiere pyarrow)"""
+    motor = str(get_performance_config().get("motor_csv", MOTOR_PANDAS)).lower()
+    return motor if motor in MOTORES else MOTOR_PANDAS
+
+def get_dedup_settings():
+    """Configuración de deduplicación: (activa, particiones de hash)"""
+    config = get_performance_config()
+    return bool(config.get("deduplicar", True)), int(config.get("particiones_dedup", 1))
+
+def get_barridos_dedup():
+    """Retirar las filas repetidas de barridos (por defecto solo se reportan)"""
+    return bool(get_performance_config().get("deduplicar_barridos", False))
+
+def get_sql_backend_path():
+    """Ruta del almacén SQLite si el backend analítico es 'sqlite' (None con pandas)"""
+    config = get_performance_config()
+    if config.get("backend_analitico", "pandas") != "sqlite":
+        return None
+    return config.get("ruta_backend", RUTA_BACKEND_POR_DEFECTO)
+
+def get_snapshot_dir():
+    """Directorio de snapshots Arrow si están activados (None si no)"""
+    config = get_performance_config()
+    if not config.get("snapshot_arrow", False):
+        return None
+    return config.get("ruta_snapshots", DIRECTORIO_SNAPSHOTS)
+
 def calculate_age_robust(birth_date):
     """Función para calcular edad"""
     if pd.isna(birth_date):
@@ -186,86 +330,367 @@ def detect_population_columns(df):
     
     return municipio_col, poblacion_cols
 
+@instrumented()
 def load_data_smart():
     """Carga datos de forma inteligente con conversión"""
-    # Intentar Google Drive primero
+    # Google Drive solo si tiene datos más recientes (protegido por el cortacircuitos)
     try:
         available, message = check_drive_availability()
         if available:
-            results = load_from_drive("all")
-            
-            if results["status"]["vacunacion"] and results["status"]["barridos"]:
-                # Aplicar conversión robusta a los datos de Google Drive
-                df_individual = apply_robust_date_conversion(results["vacunacion"])
-                df_barridos = apply_robust_date_conversion(results["barridos"], is_barridos=True)
-                
-                return df_individual, df_barridos, results["poblacion"]
+            fuentes = resolve_data_sources()
+            criticos = [fuentes[d] for d in DATASETS_CRITICOS]
+            if any(decision["fuente"] == DRIVE for decision in criticos):
+                # Sin metadatos (Drive caído o circuito abierto) no se intenta descargar:
+                # se sirve la última copia buena de Drive
+                intentar = not any(decision.get("sin_metadatos") for decision in criticos)
+                datos = load_drive_data_guarded(intentar)
+                if datos is not None:
+                    return datos
+            else:
+                for dataset, decision in fuentes.items():
+                    record_provenance(dataset, LOCAL, decision["motivo"])
+                return load_local_data_robust()
     except Exception:
         pass
 
     # Fallback a archivos locales
+    record_all_provenance(LOCAL, "Drive no disponible o no configurado")
     return load_local_data_robust()
 
+def resolve_data_sources():
+    """
+    Fuente más reciente por conjunto de datos (metadatos, sin descargar). La consulta
+    pasa por el cortacircuitos de Drive y compara también con la última descarga
+    """
+    drive_config = st.secrets.get("google_drive", {})
+    drive_ids = {
+        dataset: drive_config.get(info["secreto"]) for dataset, info in DATASETS.items()
+    }
+    descargas = {dataset: cached_download(info["secreto"]) for dataset, info in DATASETS.items()}
+    max_age_s = float(get_performance_config().get("intervalo_resolucion_s", 60))
+    return resolve_sources(
+        drive_ids,
+        drive_config.get("api_key"),
+        max_age_s,
+        descargas=descargas,
+        revalidar=lambda dataset: revalidate_download(DATASETS[dataset]["secreto"]),
+        circuito=CIRCUITO_DRIVE,
+        settings=get_breaker_settings(),
+    )
+
+def record_all_provenance(fuente, motivo):
+    """Registra la misma procedencia para todos los conjuntos de datos"""
+    for dataset in DATASETS:
+        record_provenance(dataset, fuente, motivo)
+
+def get_breaker_settings():
+    """Umbral y esperas del cortacircuitos de Drive ([rendimiento] en secretos)"""
+    config = get_performance_config()
+    return {
+        "umbral": int(config.get("drive_umbral_fallos", UMBRAL_FALLOS)),
+        "base": float(config.get("drive_espera_base_s", ESPERA_BASE_S)),
+        "maximo": float(config.get("drive_espera_maxima_s", ESPERA_MAXIMA_S)),
+    }
+
+def load_drive_data_guarded(intentar=True):
+    """
+    Datos de Google Drive a través del cortacircuitos
+    Si Drive falla, el circuito está abierto o no se intenta (intentar=False) se sirve
+    el último resultado bueno de inmediato (None si aún no hay ninguno: se usan los
+    archivos locales)
+    """
+    results = None
+    try:
+        if intentar:
+            results = call_with_breaker(
+                CIRCUITO_DRIVE,
+                load_from_drive,
+                "all",
+                is_failure=lambda r: not (r["status"]["vacunacion"] and r["status"]["barridos"]),
+                settings=get_breaker_settings(),
+            )
+    except CircuitOpenError:
+        pass
+    except Exception as e:
+        st.warning(f"⚠️ Error accediendo a Google Drive: {str(e)}")
+
+    if results is None or not (results["status"]["vacunacion"] and results["status"]["barridos"]):
+        respaldo = last_good(CIRCUITO_DRIVE)
+        if respaldo is None:
+            return None
+        momento = datetime.fromtimestamp(respaldo["momento"]).strftime("%H:%M:%S")
+        record_all_provenance("respaldo", f"último resultado bueno de Drive ({momento})")
+        return tuple(session_view(df) for df in respaldo["valor"])
+
+    datos = prepare_drive_data(results)
+    remember_good(CIRCUITO_DRIVE, datos)
+    record_all_provenance(DRIVE, "descarga de Drive")
+    return tuple(session_view(df) for df in datos)
+
+def prepare_drive_data(results):
+    """Conversión, retiro de duplicados y versión de datos de lo descargado de Drive"""
+    # Aplicar conversión robusta a los datos de Google Drive
+    df_individual = apply_robust_date_conversion(results["vacunacion"])
+    df_barridos = apply_robust_date_conversion(results["barridos"], is_barridos=True)
+
+    # Retirar duplicados una vez: el resultado es el que se guarda como respaldo
+    deduplicar, particiones = get_dedup_settings()
+    retirar_barridos = get_barridos_dedup()
+    if deduplicar:
+        df_individual = mark_individual_duplicates(df_individual, particiones)
+        df_barridos = mark_barridos_duplicates(df_barridos)
+    df_individual = attach_duplicate_report(
+        *drop_flagged_duplicates(df_individual, "NombreMunicipioResidencia")
+    )
+    paso_barridos = drop_flagged_duplicates if retirar_barridos else report_flagged_duplicates
+    df_barridos = attach_duplicate_report(*paso_barridos(df_barridos, "MUNICIPIO"))
+
+    # Versión de datos: huella de los archivos descargados
+    attach_version(
+        df_individual,
+        file_fingerprint(cached_file_path("vacunacion_csv"), extra=(deduplicar, particiones)),
+    )
+    attach_version(
+        df_barridos,
+        file_fingerprint(
+            cached_file_path("resumen_barridos_xlsx"), extra=(deduplicar, retirar_barridos)
+        ),
+    )
+
+    return df_individual, df_barridos, results["poblacion"]
+
+@instrumented()
 def apply_robust_date_conversion(df, is_barridos=False):
     """Aplica conversión de fechas garantizando datetime objects"""
     if df.empty:
         return df
     
     df_converted = df.copy()
-    
-    # Convertir FechaNacimiento si existe
-    if "FechaNacimiento" in df_converted.columns:
-        df_converted["FechaNacimiento"] = pd.to_datetime(
-            df_converted["FechaNacimiento"], 
-            format='%Y-%m-%d',
-            errors='coerce'
-        )
-        
-        # VERIFICACIÓN: Asegurar que es datetime object
-        if not pd.api.types.is_datetime64_any_dtype(df_converted["FechaNacimiento"]):
-            st.error("❌ CRÍTICO: FechaNacimiento no se convirtió a datetime")
-    
-    # Convertir FA UNICA si existe
-    if "FA UNICA" in df_converted.columns:
-        df_converted["FA UNICA"] = pd.to_datetime(
-            df_converted["FA UNICA"], 
-            format='%Y-%m-%d',
-            errors='coerce'
-        )
-        
-        # VERIFICACIÓN
-        if not pd.api.types.is_datetime64_any_dtype(df_converted["FA UNICA"]):
-            st.error("❌ CRÍTICO: FA UNICA no se convirtió a datetime")
-    
-    # Convertir FECHA para barridos
-    if is_barridos and "FECHA" in df_converted.columns:
-        df_converted["FECHA"] = pd.to_datetime(
-            df_converted["FECHA"], 
-            errors='coerce'
-        )
-        
-        if not pd.api.types.is_datetime64_any_dtype(df_converted["FECHA"]):
-            st.error("❌ CRÍTICO: FECHA de barridos no se convirtió a datetime")
+
+    # Conversión sobre valores únicos (formato del PAI primero, luego alternativos)
+    columnas = ["FechaNacimiento", "FA UNICA"] + (["FECHA"] if is_barridos else [])
+    reportes = parse_date_columns(df_converted, columnas)
+    df_converted.attrs["conversion_fechas"] = reportes
+
+    # Edad al vacunarse (UInt8): se calcula una vez al cargar y no cambia con el día
+    if not is_barridos:
+        add_vaccination_age(df_converted)
+
+    # VERIFICACIÓN: Asegurar que son datetime objects
+    for col in reportes:
+        if not pd.api.types.is_datetime64_any_dtype(df_converted[col]):
+            st.error(f"❌ CRÍTICO: {col} no se convirtió a datetime")
     
     return df_converted
 
+@instrumented()
 def load_local_data_robust():
     """Carga datos locales con conversión ROBUSTA"""
     # Cargar vacunación individual
     df_individual = load_individual_data_robust()
     
-    # Cargar barridos
-    df_barridos = load_barridos_data_robust()
+    # Cargar barridos (la versión de datos también es la clave de la caché)
+    deduplicar = get_dedup_settings()[0]
+    retirar_barridos = get_barridos_dedup()
+    version_barridos = file_fingerprint("data/Resumen.xlsx", extra=(deduplicar, retirar_barridos))
+    df_barridos = attach_version(
+        session_view(load_barridos_data_robust(deduplicar, version_barridos, retirar_barridos)),
+        version_barridos,
+    )
     
     # Cargar población con función corregida
     df_population = load_population_data_robust()
     
     return df_individual, df_barridos, df_population
 
-@st.cache_data
+@instrumented()
 def load_individual_data_robust():
-    """Carga datos individuales con conversión"""
-    file_path = "data/vacunacion_fa.csv"
+    """Carga datos individuales (serial o en paralelo según configuración)"""
+    file_path = find_data_file("data/vacunacion_fa.csv")
+    workers = int(get_performance_config().get("workers_ingesta", 1))
+    deduplicar, particiones = get_dedup_settings()
+    motor = resolve_engine(get_csv_engine(), file_path)
+    version = file_fingerprint(file_path, extra=(deduplicar, particiones, motor))
+
+    # Backend SQL: el registro no se carga en memoria, se consulta en main()
+    db_path = get_sql_backend_path()
+    if db_path and os.path.exists(file_path):
+        try:
+            prepare_individual_store(file_path, db_path, deduplicar, *_file_signature(file_path))
+            return pd.DataFrame()
+        except Exception as e:
+            st.warning(f"⚠️ Backend SQL no disponible, usando pandas: {str(e)}")
+
+    # Snapshot Arrow mapeado en memoria, compartido por todos los procesos
+    snapshot_dir = get_snapshot_dir()
+    if snapshot_dir and os.path.exists(file_path):
+        try:
+            df = load_individual_snapshot(snapshot_dir, deduplicar, particiones, version, motor)
+            return attach_version(session_view(df), version)
+        except Exception as e:
+            st.warning(f"⚠️ Snapshot no disponible, usando carga directa: {str(e)}")
+
+    # La ingesta paralela divide por rangos de bytes: solo para CSV sin comprimir
+    if workers > 1 and os.path.exists(file_path) and not is_compressed(file_path):
+        stat = os.stat(file_path)
+        try:
+            ingesta = ingest_individual_parallel(
+                file_path, workers, stat.st_mtime, stat.st_size, deduplicar, particiones
+            )
+            return attach_version(session_view(ingesta["df"]), version)
+        except Exception as e:
+            st.warning(f"⚠️ Ingesta paralela no disponible, usando carga serial: {str(e)}")
+
+    # Una sola copia compartida por todas las sesiones; cada una recibe una vista
+    return attach_version(
+        session_view(load_individual_data_serial(deduplicar, particiones, version, motor)),
+        version,
+    )
+
+def load_individual_snapshot(directory, deduplicar, particiones, version, motor=MOTOR_PANDAS):
+    """
+    Registro individual desde el snapshot vigente; si el manifiesto no corresponde a la
+    versión de datos actual, este proceso procesa el CSV y publica un snapshot nuevo
+    """
+    manifest = read_manifest(directory)
+
+    if manifest is None or manifest["version"] != version:
+        df = load_individual_data_serial(deduplicar, particiones, version, motor)
+        if df.empty:
+            return df
+        manifest = write_snapshot(df, version, directory)
+        # La copia en memoria se libera: desde aquí se usa la versión mapeada
+        load_individual_data_serial.clear()
+
+    return open_individual_snapshot(directory, manifest["archivo"], manifest["checksum"])
+
+@st.cache_resource(max_entries=2)
+def open_individual_snapshot(directory, archivo, checksum):
+    """Abre un snapshot con memory-map (uno por archivo; un manifiesto nuevo cambia la clave)"""
+    return open_snapshot({"archivo": archivo, "checksum": checksum}, directory)
+
+@st.cache_resource
+def ingest_individual_parallel(file_path, workers, file_mtime, file_size, deduplicar=True, particiones=1):
+    """Ingesta paralela cacheada por archivo (mtime y tamaño invalidan la caché)"""
+    ingesta = ingest_parallel(file_path, workers=workers, deduplicar=deduplicar)
+
+    if deduplicar and not ingesta["df"].empty:
+        ingesta["df"] = mark_individual_duplicates(ingesta["df"], particiones)
+
+        # Descontar de los pre-agregados los registros duplicados
+        df_dup = ingesta["df"][ingesta["df"][COLUMNA_DUPLICADO]]
+        if not df_dup.empty:
+            parcial = aggregate_frame(df_dup, ingesta["agregados"]["fecha_referencia"])
+            ingesta["agregados"] = subtract_aggregates(ingesta["agregados"], parcial)
+
+        # Retirarlos una sola vez: las sesiones reciben vistas del resultado
+        ingesta["df"] = attach_duplicate_report(
+            *drop_flagged_duplicates(ingesta["df"], "NombreMunicipioResidencia")
+        )
+
+    # Marca para reconocer las vistas de sesión de este DataFrame
+    ingesta["df"].attrs["ingesta_id"] = id(ingesta)
+    return ingesta
+
+def get_parallel_preaggregates(df_individual):
+    """Retorna los pre-agregados de la ingesta paralela si corresponden a df_individual"""
+    file_path = find_data_file("data/vacunacion_fa.csv")
+    workers = int(get_performance_config().get("workers_ingesta", 1))
+
+    if workers <= 1 or not os.path.exists(file_path) or is_compressed(file_path):
+        return None
+
+    stat = os.stat(file_path)
+    deduplicar, particiones = get_dedup_settings()
+    ingesta = ingest_individual_parallel(
+        file_path, workers, stat.st_mtime, stat.st_size, deduplicar, particiones
+    )
+    if df_individual.attrs.get("ingesta_id") == id(ingesta):
+        return ingesta["agregados"]
+    return None
+
+def _file_signature(file_path):
+    """(mtime, tamaño) del archivo: invalidan las cachés que dependen de él"""
+    stat = os.stat(file_path)
+    return stat.st_mtime, stat.st_size
+
+@st.cache_resource
+def prepare_individual_store(file_path, db_path, deduplicar, file_mtime, file_size):
+    """Construye (o reutiliza) el almacén SQLite del registro individual"""
+    return ensure_individual_store(file_path, db_path, deduplicar)
+
+def get_sql_individual_store():
+    """Metadatos del almacén SQL activo (None si se usa el backend pandas)"""
+    file_path = find_data_file("data/vacunacion_fa.csv")
+    db_path = get_sql_backend_path()
+    if not db_path or not os.path.exists(file_path):
+        return None
+
+    deduplicar, _ = get_dedup_settings()
+    metadata = prepare_individual_store(file_path, db_path, deduplicar, *_file_signature(file_path))
+    return {"ruta": db_path, "firma": metadata["firma_fuente"]}
+
+@instrumented()
+@st.cache_data
+def query_individual_store(db_path, firma):
+    """Serie diaria y reporte de duplicados del almacén SQL (la firma invalida la caché)"""
+    return {
+        "serie_diaria": query_daily_counts(db_path),
+        "duplicados": query_duplicate_report(db_path),
+    }
+
+@instrumented()
+@st.cache_resource(max_entries=4)
+def summarize_individual_store(db_path, firma, fecha_corte, fecha_referencia):
+    """
+    Resumen PRE-emergencia calculado en SQL (mismo formato que el procesamiento pandas),
+    compartido entre sesiones: solo lectura
+    """
+    result = query_individual_summary(db_path, fecha_corte, fecha_referencia)
+    freeze_histogram(result.get("histograma_edad"))
+    return result
+
+@instrumented()
+@st.cache_resource(max_entries=4)
+def vaccination_age_store(db_path, firma, fecha_corte):
+    """Histograma de edad al vacunarse en SQL (sin fecha de referencia: estable entre días)"""
+    return freeze_histogram(query_vaccination_age_histogram(db_path, fecha_corte))
+
+def read_individual_csv(file_path, deduplicar=True, motor=MOTOR_PANDAS):
+    """
+    Lee el CSV de vacunación individual solo con las columnas del esquema (análisis y,
+    si se deduplica, identidad). Motor "pandas": todo como texto; motor "arrow"
+    (si pyarrow está instalado): fechas y municipio ya tipados
+    Acepta .csv.gz, .csv.zst y .zip: se descomprime en flujo, sin archivo intermedio
+    """
+    df = read_registry_csv(file_path, motor, "vacunacion", pipeline_stages(deduplicar))
+    faltantes = missing_fields(df, "vacunacion")
+    if faltantes:
+        st.warning(f"⚠️ Columnas no encontradas en vacunación: {', '.join(faltantes)}")
+    return df
+
+def read_barridos_excel(file_path, deduplicar=True):
+    """Lee la hoja de barridos probando nombres conocidos (None si ninguna existe)"""
+    opciones = read_options("barridos", pipeline_stages(deduplicar), fechas_como_texto=False)
+    for sheet in ["Barridos", "Vacunacion", 0]:
+        try:
+            df = pd.read_excel(file_path, sheet_name=sheet, **opciones)
+        except:
+            continue
+        canonical_columns(df, "barridos")
+        return df
+    return None
+
+@instrumented()
+@st.cache_resource
+def load_individual_data_serial(deduplicar=True, particiones=1, version=None, motor=MOTOR_PANDAS):
+    """
+    Carga datos individuales con conversión y retiro de duplicados
+    Caché de recurso: un único DataFrame compartido (usar con session_view), con el
+    reporte de duplicados en df.attrs; version (huella del archivo) invalida la caché
+    cuando el CSV cambia
+    """
+    file_path = find_data_file("data/vacunacion_fa.csv")
 
     if not os.path.exists(file_path):
         st.error(f"❌ Archivo no encontrado: {file_path}")
@@ -274,20 +699,30 @@ def load_individual_data_robust():
 
     try:
         # Cargar CSV como strings primero
-        df = pd.read_csv(file_path, low_memory=False, encoding="utf-8", dtype=str)
+        df = read_individual_csv(file_path, deduplicar, motor)
         
         # Aplicar conversión robusta
         df_converted = apply_robust_date_conversion(df)
+
+        # Retirar duplicados una sola vez (el resultado y su reporte quedan en caché)
+        if deduplicar:
+            df_converted = mark_individual_duplicates(df_converted, particiones)
         
-        return df_converted
+        return attach_duplicate_report(
+            *drop_flagged_duplicates(df_converted, "NombreMunicipioResidencia")
+        )
 
     except Exception as e:
         st.error(f"❌ Error cargando datos individuales: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data  
-def load_barridos_data_robust():
-    """Carga datos de barridos con conversión"""
+@instrumented()
+@st.cache_data
+def load_barridos_data_robust(deduplicar=True, version=None, retirar=False):
+    """
+    Carga datos de barridos con conversión y reporte de filas repetidas en df.attrs;
+    las filas solo se retiran con retirar=True (no identifican personas)
+    """
     file_path = "data/Resumen.xlsx"
 
     if not os.path.exists(file_path):
@@ -296,26 +731,25 @@ def load_barridos_data_robust():
         return pd.DataFrame()
 
     try:
-        # Intentar diferentes hojas
-        for sheet in ["Barridos", "Vacunacion", 0]:
-            try:
-                df = pd.read_excel(file_path, sheet_name=sheet)
-                break
-            except:
-                continue
-        else:
+        df = read_barridos_excel(file_path, deduplicar)
+        if df is None:
             st.error("❌ No se pudo leer el archivo de barridos")
             return pd.DataFrame()
 
         # Aplicar conversión robusta para barridos
         df_converted = apply_robust_date_conversion(df, is_barridos=True)
 
-        return df_converted
+        if deduplicar:
+            df_converted = mark_barridos_duplicates(df_converted)
+
+        paso = drop_flagged_duplicates if retirar else report_flagged_duplicates
+        return attach_duplicate_report(*paso(df_converted, "MUNICIPIO"))
 
     except Exception as e:
         st.error(f"❌ Error cargando barridos: {str(e)}")
         return pd.DataFrame()
 
+@instrumented()
 @st.cache_data
 def load_population_data_robust():
     """
@@ -391,11 +825,30 @@ def determine_cutoff_date(df_barridos):
     fecha_corte = fechas_validas.min()
     return fecha_corte
 
-def process_individual_pre_barridos_robust(df_individual, fecha_corte):
+@instrumented()
+def process_individual_pre_barridos_robust(df_individual, fecha_corte, preagregados=None):
     """Procesamiento de datos individuales"""
     if df_individual.empty:
         return {"total": 0, "por_edad": {}, "por_municipio": {}}
 
+    # Atajo: conteos ya calculados por la ingesta paralela. Las edades de la ingesta
+    # quedan fijas a su fecha de referencia (la caché de recurso sobrevive al cambio
+    # de día): los rangos se derivan aquí del histograma con la fecha de hoy
+    if preagregados is not None:
+        result = summarize_individual(preagregados, fecha_corte)
+        if "FechaNacimiento" in df_individual.columns and result["total"] > 0:
+            if fecha_corte and "FA UNICA" in df_individual.columns:
+                df_pre = df_individual[
+                    safe_date_comparison(df_individual["FA UNICA"], fecha_corte, "less")
+                ]
+            else:
+                df_pre = df_individual
+            edades = compute_age_vectorized(df_pre["FechaNacimiento"], pd.Timestamp.now().normalize())
+            histograma = frame_age_histogram(df_pre, edades)
+            result["por_edad"] = age_distribution(histograma, LIMITES_PAI, list(RANGOS_EDAD))
+            result["histograma_edad"] = histograma
+        return result
+
     # Filtrar datos PRE-emergencia con comparación robusta
     if fecha_corte and "FA UNICA" in df_individual.columns:
         mask_pre = safe_date_comparison(df_individual["FA UNICA"], fecha_corte, "less")
@@ -415,37 +868,59 @@ def process_individual_pre_barridos_robust(df_individual, fecha_corte):
             st.error("❌ CRÍTICO: FechaNacimiento no es datetime en procesamiento")
             return result
         
-        # Aplicar función robusta de cálculo de edad
-        df_pre["edad_actual"] = df_pre["FechaNacimiento"].apply(calculate_age_robust)
-        df_pre["rango_edad"] = df_pre["edad_actual"].apply(classify_age_group_robust)
+        # Edad cumplida vectorizada (mismo criterio que calculate_age_robust) e
+        # histograma de edades simples por municipio y mes de vacunación
+        with measure_stage("calculo_edad", rows_in=len(df_pre)) as stage:
+            edades = compute_age_vectorized(df_pre["FechaNacimiento"], pd.Timestamp.now().normalize())
+            histograma = frame_age_histogram(df_pre, edades)
+            stage["filas_salida"] = int(edades.notna().sum())
 
-        # Contar por rangos de edad
-        age_counts = df_pre["rango_edad"].value_counts()
-        for rango in RANGOS_EDAD.keys():
-            result["por_edad"][rango] = age_counts.get(rango, 0)
+        # Rangos PAI sumando celdas del histograma (cualquier otra agrupación, igual)
+        result["por_edad"] = age_distribution(histograma, LIMITES_PAI, list(RANGOS_EDAD))
+        result["histograma_edad"] = histograma
 
     # Contar por municipio
     if "NombreMunicipioResidencia" in df_pre.columns:
         municipio_counts = df_pre["NombreMunicipioResidencia"].value_counts()
-        result["por_municipio"] = municipio_counts.to_dict()
+        # Con municipio categórico (motor Arrow) se omiten categorías sin registros
+        result["por_municipio"] = municipio_counts[municipio_counts > 0].to_dict()
 
     return result
 
+@st.cache_resource(show_spinner=False, max_entries=4)
+def process_individual_cached(_df_individual, version, fecha_corte, fecha_referencia, _preagregados=None):
+    """
+    Procesamiento individual cacheado por versión de datos (no hashea el DataFrame)
+    fecha_referencia (hoy) invalida la caché al cambiar el día: las edades dependen de ella
+    Caché de recurso: el resultado (con el histograma de edades) se comparte entre
+    sesiones sin serializarse en cada ejecución, así que es de solo lectura
+    """
+    result = process_individual_pre_barridos_robust(_df_individual, fecha_corte, _preagregados)
+    freeze_histogram(result.get("histograma_edad"))
+    return result
+
+def vaccination_age_histogram(df_individual, fecha_corte):
+    """Histograma de edad al vacunarse de los registros PRE-emergencia (None sin la columna)"""
+    if df_individual.empty or COLUMNA_EDAD_VACUNACION not in df_individual.columns:
+        return None
+    if fecha_corte and "FA UNICA" in df_individual.columns:
+        df_pre = df_individual[safe_date_comparison(df_individual["FA UNICA"], fecha_corte, "less")]
+    else:
+        df_pre = df_individual
+    return frame_age_histogram(df_pre, df_pre[COLUMNA_EDAD_VACUNACION])
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def vaccination_age_cached(_df_individual, version, fecha_corte):
+    """
+    Histograma de edad al vacunarse cacheado por versión de datos y fecha de corte:
+    a diferencia de la edad actual, no se invalida al cambiar el día. Compartido entre
+    sesiones (solo lectura)
+    """
+    return freeze_histogram(vaccination_age_histogram(_df_individual, fecha_corte))
+
 def detect_barridos_columns(df):
     """Detecta columnas de barridos (sin cambios)"""
-    age_patterns = {
-        "<1": ["< 1", "<1", "MENOR 1", "LACTANTE"],
-        "1-5": ["1-5", "1 A 5", "PREESCOLAR"],
-        "6-10": ["6-10", "6 A 10", "ESCOLAR"],
-        "11-20": ["11-20", "11 A 20", "ADOLESCENTE"],
-        "21-30": ["21-30", "21 A 30"],
-        "31-40": ["31-40", "31 A 40"],
-        "41-50": ["41-50", "41 A 50"],
-        "51-59": ["51-59", "51 A 59"],
-        "60+": ["60+", "60 Y MAS", "MAYOR 60"],
-        "60-69": ["60-69", "60 A 69"],
-        "70+": ["70+", "70 Y MAS", "MAYOR 70"],
-    }
+    age_patterns = PATRONES_EDAD_BARRIDOS
 
     result = {
         "vacunados_barrido": {},
@@ -481,6 +956,7 @@ def detect_barridos_columns(df):
 
     return result
 
+@instrumented()
 def process_barridos_data(df_barridos):
     """Procesa datos de barridos"""
     if df_barridos.empty:
@@ -548,6 +1024,24 @@ def process_barridos_data(df_barridos):
 
     return result
 
+@st.cache_data(show_spinner=False)
+def process_barridos_cached(_df_barridos, version):
+    """Procesamiento de barridos cacheado por versión de datos"""
+    return process_barridos_data(_df_barridos)
+
+@st.cache_resource(show_spinner=False)
+def vereda_index(version):
+    """Catálogo de veredas e índice de nombres, construidos una vez por versión del catálogo"""
+    catalogo = load_vereda_catalog()
+    return catalogo, build_vereda_index(catalogo)
+
+@st.cache_data(show_spinner=False)
+def process_vereda_sweeps_cached(_df_barridos, version, version_catalogo, _columns_info):
+    """Barridos por vereda (TPVB, TPNVP y veredas nunca barridas) cacheados por versión"""
+    catalogo, indice = vereda_index(version_catalogo)
+    return aggregate_sweeps_by_vereda(_df_barridos, _columns_info, catalogo, indice)
+
+@instrumented()
 def process_population_data_robust(df_population):
     """
     Procesa datos de población con detección automática de columnas
@@ -606,12 +1100,19 @@ def process_population_data_robust(df_population):
 
 def main():
     """Función principal del dashboard"""
+    config = get_performance_config()
+    configure_instrumentation(
+        jsonl_path=config.get("instrumentacion_jsonl"),
+        track_memory=config.get("instrumentacion_memoria", False),
+    )
+
     # Configurar barra lateral
     setup_sidebar()
     
     # Título principal con indicador de fiabilidad
     st.title("🏥 Dashboard de Vacunación Fiebre Amarilla")
     st.markdown("**Departamento del Tolima**")
+    record_startup_mark("encabezado")
 
     with st.spinner("Cargando y verificando datos..."):
         try:
@@ -619,22 +1120,58 @@ def main():
         except Exception as e:
             st.error(f"❌ Error cargando datos: {str(e)}")
             return
+    record_startup_mark("datos_cargados")
 
     # Verificar datos mínimos
     if df_individual.empty and df_barridos.empty:
         st.error("❌ Sin datos suficientes para mostrar el dashboard")
         return
 
+    # Registro individual en el almacén SQL (solo agregados en memoria)
+    almacen_sql = get_sql_individual_store() if df_individual.empty else None
+    serie_diaria_individual = None
+
+    # Pre-agregados de la ingesta paralela (ya descuentan duplicados)
+    preagregados = get_parallel_preaggregates(df_individual)
+
+    # Los duplicados ya se retiraron en la carga (en caché): aquí solo sus reportes
+    duplicados_individual = get_duplicate_report(df_individual, "NombreMunicipioResidencia")
+    if almacen_sql:
+        consulta = query_individual_store(almacen_sql["ruta"], almacen_sql["firma"])
+        serie_diaria_individual = consulta["serie_diaria"]
+        duplicados_individual = consulta["duplicados"]
+    duplicados_barridos = get_duplicate_report(df_barridos, "MUNICIPIO")
+
     # Determinar fecha de corte con verificación robusta
     fecha_corte = determine_cutoff_date(df_barridos)
 
     with st.spinner("Procesando datos..."):
         try:
             # Procesamiento ROBUSTO de datos individuales
-            individual_data = process_individual_pre_barridos_robust(df_individual, fecha_corte)
+            if almacen_sql:
+                # Copia superficial: el resultado en caché es compartido entre sesiones
+                individual_data = dict(summarize_individual_store(
+                    almacen_sql["ruta"], almacen_sql["firma"], fecha_corte, date.today()
+                ))
+                individual_data["histograma_edad_vacunacion"] = vaccination_age_store(
+                    almacen_sql["ruta"], almacen_sql["firma"], fecha_corte
+                )
+            else:
+                individual_data = dict(process_individual_cached(
+                    df_individual, version_key(df_individual), fecha_corte, date.today(), preagregados
+                ))
+                individual_data["histograma_edad_vacunacion"] = vaccination_age_cached(
+                    df_individual, version_key(df_individual), fecha_corte
+                )
 
             # Procesamiento de barridos
-            barridos_data = process_barridos_data(df_barridos)
+            barridos_data = process_barridos_cached(df_barridos, version_key(df_barridos))
+            barridos_veredas = process_vereda_sweeps_cached(
+                df_barridos,
+                version_key(df_barridos),
+                file_fingerprint(f"{CAPA_VEREDAS}.dbf", LIBRO_VEREDAS),
+                barridos_data.get("columns_info", {}),
+            )
 
             # Procesamiento CORREGIDO de población
             population_data = process_population_data_robust(df_population)
@@ -647,8 +1184,14 @@ def main():
     combined_data = {
         "individual_pre": individual_data,
         "barridos": barridos_data,
+        "barridos_veredas": barridos_veredas,
         "population": population_data,
+        "duplicados": {
+            "individual": duplicados_individual,
+            "barridos": duplicados_barridos,
+        },
         "fecha_corte": fecha_corte,
+        "serie_diaria_individual": serie_diaria_individual,
         "total_individual_pre": individual_data["total"],
         "total_barridos": barridos_data["vacunados_barrido"]["total"],
         "total_renuentes": barridos_data["renuentes"]["total"],
@@ -696,25 +1239,35 @@ def main():
 
     # Tabs principales
     try:
+        # Importación diferida: plotly solo se carga al construir las pestañas
+        vistas = timed_import("vistas")
+
         tab1, tab2, tab3, tab4 = st.tabs(
             ["📊 Resumen", "📅 Temporal", "🗺️ Geográfico", "🏘️ Poblacional"]
         )
 
         with tab1:
-            show_overview_tab(combined_data, COLORS, RANGOS_EDAD)
+            vistas.show_overview_tab(combined_data, COLORS, RANGOS_EDAD)
 
         with tab2:
-            show_temporal_tab(combined_data, df_individual, df_barridos, COLORS)
+            vistas.show_temporal_tab(combined_data, df_individual, df_barridos, COLORS)
 
         with tab3:
-            show_geographic_tab(combined_data, COLORS)
+            vistas.show_geographic_tab(combined_data, COLORS)
 
         with tab4:
-            show_population_tab(combined_data, COLORS)
+            vistas.show_population_tab(combined_data, COLORS)
+
+        record_startup_mark("pestanas")
             
     except Exception as e:
         st.error(f"❌ Error mostrando pestañas: {str(e)}")
         st.info("💡 Revisa que todas las vistas estén correctamente configuradas")
+        return
+
+    # Panel oculto de rendimiento
+    if vistas.should_show_diagnostics(config):
+        vistas.show_performance_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+Suite de benchmarks del dashboard con datos sintéticos con forma del Tolima
+"""
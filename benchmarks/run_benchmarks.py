@@ -0,0 +1,282 @@
+"""
+benchmarks/run_benchmarks.py - Tiempos por etapa del pipeline sobre datos sintéticos
+
+Uso:
+    python -m benchmarks.run_benchmarks --escenario 100000:1000 --escenario 1000000:10000
+    python -m benchmarks.run_benchmarks --salida resultados.json --comparar base.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import ensure_dataset, generate_population_frame
+
+# Umbral de regresión: una etapa es regresión si tarda más de este factor respecto a la base
+UMBRAL_REGRESION = 1.20
+
+# Diferencias menores a este valor se consideran ruido de medición
+MINIMO_ABSOLUTO_S = 0.005
+
+
+def _time_stage(func, repeticiones):
+    """Ejecuta una etapa varias veces y retorna (resultado, tiempos)"""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = func()
+        tiempos.append(time.perf_counter() - inicio)
+    return resultado, tiempos
+
+
+def run_scenario(n_individuos, n_barridos, repeticiones=3, data_dir=None, seed=0):
+    """
+    Ejecuta todas las etapas del pipeline para un escenario
+
+    Returns:
+        dict: Tiempos por etapa y tamaños de entrada
+    """
+    import app
+    from csv_engines import MOTOR_ARROW, arrow_available
+    from deduplication import mark_individual_duplicates
+    from vistas.population import calculate_municipal_coverage
+    from vistas.temporal import safe_group_by_date
+
+    data_dir = data_dir or os.path.join(ROOT_DIR, "benchmarks", "datos")
+
+    inicio_generacion = time.perf_counter()
+    paths = ensure_dataset(data_dir, n_individuos, n_barridos, seed)
+    tiempo_generacion = time.perf_counter() - inicio_generacion
+
+    etapas = {}
+
+    def registrar(nombre, func):
+        resultado, tiempos = _time_stage(func, repeticiones)
+        etapas[nombre] = {
+            "min_s": min(tiempos),
+            "mediana_s": statistics.median(tiempos),
+            "repeticiones": len(tiempos),
+        }
+        return resultado
+
+    # 1. Carga de archivos
+    df_raw = registrar("carga_csv", lambda: app.read_individual_csv(paths["vacunacion_csv"]))
+    df_barr_raw = registrar("carga_excel", lambda: app.read_barridos_excel(paths["barridos_xlsx"]))
+
+    # Lector CSV de Arrow (opcional): lectura con fechas ya tipadas más su conversión
+    if arrow_available():
+        registrar(
+            "carga_csv_arrow",
+            lambda: app.apply_robust_date_conversion(
+                app.read_individual_csv(paths["vacunacion_csv"], motor=MOTOR_ARROW)
+            ),
+        )
+
+    # 2. Conversión de fechas
+    df_individual = registrar(
+        "conversion_fechas", lambda: app.apply_robust_date_conversion(df_raw)
+    )
+    df_barridos = app.apply_robust_date_conversion(df_barr_raw, is_barridos=True)
+
+    # 3. Detección de duplicados (hash de identidad + fecha de dosis)
+    registrar("deduplicacion", lambda: mark_individual_duplicates(df_individual))
+
+    fecha_corte = app.determine_cutoff_date(df_barridos)
+
+    # 4. Edad y agregación individual (filtro PRE, edades, rangos, municipios)
+    individual_data = registrar(
+        "edad_individual",
+        lambda: app.process_individual_pre_barridos_robust(df_individual, fecha_corte),
+    )
+
+    # 5. Agregación de barridos
+    barridos_data = registrar("agregacion_barridos", lambda: app.process_barridos_data(df_barridos))
+
+    # 6. Cobertura municipal
+    population_data = app.process_population_data_robust(generate_population_frame())
+    combined_data = {
+        "individual_pre": individual_data,
+        "barridos": barridos_data,
+        "population": population_data,
+    }
+    registrar("cobertura", lambda: calculate_municipal_coverage(combined_data))
+
+    # 7. Series temporales (diaria PRE-emergencia y barridos por fecha)
+    def series_temporales():
+        mask_pre = app.safe_date_comparison(df_individual["FA UNICA"], fecha_corte, "less")
+        return (
+            safe_group_by_date(df_individual[mask_pre], "FA UNICA"),
+            safe_group_by_date(df_barridos, "FECHA"),
+        )
+
+    registrar("serie_temporal", series_temporales)
+
+    return {
+        "individuos": n_individuos,
+        "barridos": n_barridos,
+        "semilla": seed,
+        "generacion_s": tiempo_generacion,
+        "total_pre": int(individual_data["total"]),
+        "etapas": etapas,
+    }
+
+
+def _package_version(nombre):
+    """Versión de un paquete opcional (None si no está instalado)"""
+    try:
+        from importlib.metadata import version
+
+        return version(nombre)
+    except Exception:
+        return None
+
+
+def environment_info():
+    """Información del entorno para que los resultados sean comparables"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=ROOT_DIR,
+        ).stdout.strip()
+    except Exception:
+        commit = None
+
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": _package_version("pyarrow"),
+        "plataforma": platform.platform(),
+        "nucleos": os.cpu_count(),
+    }
+
+
+def compare_results(actual, base, umbral=UMBRAL_REGRESION):
+    """
+    Compara dos resultados y retorna las etapas que empeoraron más allá del umbral
+    """
+    base_por_escenario = {
+        (e["individuos"], e["barridos"]): e for e in base.get("escenarios", [])
+    }
+
+    regresiones = []
+    for escenario in actual["escenarios"]:
+        clave = (escenario["individuos"], escenario["barridos"])
+        if clave not in base_por_escenario:
+            continue
+
+        for etapa, medida in escenario["etapas"].items():
+            medida_base = base_por_escenario[clave]["etapas"].get(etapa)
+            if not medida_base or medida_base["min_s"] <= 0:
+                continue
+
+            factor = medida["min_s"] / medida_base["min_s"]
+            diferencia = medida["min_s"] - medida_base["min_s"]
+            if factor > umbral and diferencia > MINIMO_ABSOLUTO_S:
+                regresiones.append(
+                    {
+                        "escenario": f"{clave[0]}:{clave[1]}",
+                        "etapa": etapa,
+                        "base_s": medida_base["min_s"],
+                        "actual_s": medida["min_s"],
+                        "factor": factor,
+                    }
+                )
+
+    return regresiones
+
+
+def parse_scenario(texto):
+    """Convierte 'individuos:barridos' (admite sufijos k y M) en una tupla de enteros"""
+
+    def to_int(valor):
+        valor = valor.strip().lower()
+        multiplicador = 1
+        if valor.endswith("k"):
+            multiplicador, valor = 1_000, valor[:-1]
+        elif valor.endswith("m"):
+            multiplicador, valor = 1_000_000, valor[:-1]
+        return int(float(valor) * multiplicador)
+
+    individuos, barridos = texto.split(":")
+    return to_int(individuos), to_int(barridos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline del dashboard")
+    parser.add_argument(
+        "--escenario",
+        action="append",
+        type=parse_scenario,
+        help="individuos:barridos, p. ej. 100k:1k o 20M:200k (repetible)",
+    )
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--datos", default=None, help="Directorio de datos sintéticos")
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", default=None, help="JSON base para detectar regresiones")
+    args = parser.parse_args(argv)
+
+    escenarios = args.escenario or [(100_000, 1_000)]
+
+    resultados = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "entorno": environment_info(),
+        "escenarios": [],
+    }
+
+    for n_individuos, n_barridos in escenarios:
+        print(f"▶️ Escenario {n_individuos:,} individuos / {n_barridos:,} barridos")
+        escenario = run_scenario(
+            n_individuos, n_barridos, args.repeticiones, args.datos, args.semilla
+        )
+        resultados["escenarios"].append(escenario)
+
+        for etapa, medida in escenario["etapas"].items():
+            print(f"   {etapa:<22} {medida['min_s']:>9.3f} s (mediana {medida['mediana_s']:.3f} s)")
+
+    salida = json.dumps(resultados, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(salida)
+        print(f"💾 Resultados guardados en {args.salida}")
+    else:
+        print(salida)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+
+        regresiones = compare_results(resultados, base)
+        if regresiones:
+            print("❌ Regresiones detectadas:")
+            for r in regresiones:
+                print(
+                    f"   [{r['escenario']}] {r['etapa']}: {r['base_s']:.3f}s → "
+                    f"{r['actual_s']:.3f}s (x{r['factor']:.2f})"
+                )
+            return 1
+        print("✅ Sin regresiones respecto a la base")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""
+benchmarks/synthetic_data.py - Generación de datos sintéticos con forma del Tolima
+Produce vacunacion_fa.csv y Resumen.xlsx de tamaño configurable
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Los 47 municipios del Tolima (código DANE, nombre, población asegurada de referencia)
+MUNICIPIOS_TOLIMA = [
+    ("73001", "IBAGUÉ", 607506),
+    ("73024", "ALPUJARRA", 3311),
+    ("73026", "ALVARADO", 6683),
+    ("73030", "AMBALEMA", 4607),
+    ("73043", "ANZOÁTEGUI", 8978),
+    ("73055", "ARMERO", 9943),
+    ("73067", "ATACO", 18267),
+    ("73124", "CAJAMARCA", 15317),
+    ("73148", "CARMEN DE APICALÁ", 6640),
+    ("73152", "CASABIANCA", 5819),
+    ("73168", "CHAPARRAL", 49655),
+    ("73200", "COELLO", 4272),
+    ("73217", "COYAIMA", 21364),
+    ("73226", "CUNDAY", 6201),
+    ("73236", "DOLORES", 7138),
+    ("73268", "ESPINAL", 79340),
+    ("73270", "FALÁN", 5896),
+    ("73275", "FLANDES", 9283),
+    ("73283", "FRESNO", 29732),
+    ("73319", "GUAMO", 25510),
+    ("73347", "HERVEO", 3744),
+    ("73349", "HONDA", 25248),
+    ("73352", "ICONONZO", 7506),
+    ("73408", "LÉRIDA", 16388),
+    ("73411", "LÍBANO", 39250),
+    ("73443", "MARIQUITA", 35563),
+    ("73449", "MELGAR", 38252),
+    ("73461", "MURILLO", 2827),
+    ("73483", "NATAGAIMA", 12993),
+    ("73504", "ORTEGA", 24515),
+    ("73520", "PALOCABILDO", 9101),
+    ("73547", "PIEDRAS", 2914),
+    ("73555", "PLANADAS", 30167),
+    ("73563", "PRADO", 7598),
+    ("73585", "PURIFICACIÓN", 22174),
+    ("73616", "RIOBLANCO", 23622),
+    ("73622", "RONCESVALLES", 4350),
+    ("73624", "ROVIRA", 24203),
+    ("73671", "SALDAÑA", 11543),
+    ("73675", "SAN ANTONIO", 12335),
+    ("73678", "SAN LUIS", 8767),
+    ("73686", "SANTA ISABEL", 4653),
+    ("73770", "SUÁREZ", 2631),
+    ("73854", "VALLE DE SAN JUAN", 3693),
+    ("73861", "VENADILLO", 10656),
+    ("73870", "VILLAHERMOSA", 6880),
+    ("73873", "VILLARRICA", 4196),
+]
+
+# Encabezado real de la hoja "Vacunacion" de Resumen.xlsx (secciones TPE, TPVP, TPNVP, TPVB)
+ENCABEZADO_BARRIDOS = [
+    "FECHA", "MUNICIPIO", "VEREDAS", " Efectivas (E)", "  No Efectivas (NE)",
+    "Fallidas (F)", "Casa renuente",
+    "< 1 AÑO", "1-5 AÑOS", "6-10 AÑOS", "11-20 AÑOS", "21-30 AÑOS", "31-40 AÑOS",
+    "41-50 AÑOS", "51-59 AÑOS", "60 Y MAS", "60-69 AÑOS27", "70 AÑOS Y MAS269", "TPE",
+    "< 1 AÑO2", "1-5 AÑOS2", "6-10 AÑOS3", "11-20 AÑOS4", "21-30 AÑOS5", "31-40 AÑOS6",
+    "41-50 AÑOS7", "51-59 AÑOS8", "60 Y MAS9", "60-69 AÑOS272", "70 AÑOS Y MAS2693", "TPVP",
+    "< 1 AÑO3", "1-5 AÑOS11", "6-10 AÑOS12", "11-20 AÑOS13", "21-30 AÑOS14", "31-40 AÑOS15",
+    "41-50 AÑOS16", "51-59 AÑOS17", "60 Y MAS18", "60-69 AÑOS273", "70 AÑOS Y MAS2694", "TPNVP",
+    "< 1 AÑO4", "1-5 AÑOS21", "6-10 AÑOS21", "11-20 AÑOS22", "21-30 AÑOS23", "31-40 AÑOS24",
+    "41-50 AÑOS25", "51-59 AÑOS26", "60 Y MAS182", "60-69 AÑOS274", "70 AÑOS Y MAS2695", "TPVB",
+]
+
+SECCIONES_BARRIDOS = ["TPE", "TPVP", "TPNVP", "TPVB"]
+
+# Peso relativo de cada rango de edad en un barrido (9 rangos + 60-69 y 70+)
+PESOS_EDAD_BARRIDOS = np.array([0.01, 0.06, 0.07, 0.15, 0.14, 0.13, 0.13, 0.12, 0.19, 0.0, 0.0])
+
+# Período de la emergencia (barridos) y del registro histórico individual
+INICIO_EMERGENCIA = pd.Timestamp("2024-11-03")
+FIN_EMERGENCIA = pd.Timestamp("2025-05-15")
+INICIO_HISTORICO = pd.Timestamp("2008-01-01")
+
+COLUMNAS_INDIVIDUAL = [
+    "Consecutivo",
+    "TipoIdentificacion",
+    "Documento",
+    "PrimerNombre",
+    "PrimerApellido",
+    "Sexo",
+    "FechaNacimiento",
+    "CodigoMunicipioResidencia",
+    "NombreMunicipioResidencia",
+    "AreaResidencia",
+    "Aseguradora",
+    "FA UNICA",
+]
+
+NOMBRES = ["MARIA", "JOSE", "LUIS", "ANA", "CARLOS", "LUZ", "JUAN", "DIANA", "JORGE", "SANDRA"]
+APELLIDOS = ["RODRIGUEZ", "GOMEZ", "GONZALEZ", "MARTINEZ", "GARCIA", "LOPEZ", "DIAZ", "ORTIZ"]
+ASEGURADORAS = ["NUEVA EPS", "SALUD TOTAL", "SANITAS", "ASMET SALUD", "FAMISANAR", "PIJAOS"]
+
+
+def municipality_weights():
+    """Probabilidad de residencia por municipio (proporcional a la población)"""
+    poblacion = np.array([pop for _, _, pop in MUNICIPIOS_TOLIMA], dtype=float)
+    return poblacion / poblacion.sum()
+
+
+def _vaccination_dates(rng, n):
+    """
+    Fechas FA UNICA: fondo histórico diario más jornadas de campaña y la emergencia
+    Resultan pocos miles de fechas distintas, como en el registro real
+    """
+    dias_historico = (INICIO_EMERGENCIA - INICIO_HISTORICO).days
+    dias_emergencia = (FIN_EMERGENCIA - INICIO_EMERGENCIA).days
+
+    # Jornadas de campaña: 40 días con alta concentración
+    jornadas = rng.integers(0, dias_historico, 40)
+
+    tipo = rng.random(n)
+    offsets = np.where(
+        tipo < 0.55,
+        # Fondo histórico con tendencia creciente
+        (np.sqrt(rng.random(n)) * dias_historico).astype(int),
+        np.where(
+            tipo < 0.75,
+            jornadas[rng.integers(0, len(jornadas), n)],
+            # Vacunación individual durante la emergencia
+            dias_historico + rng.integers(0, dias_emergencia, n),
+        ),
+    )
+    return INICIO_HISTORICO + pd.to_timedelta(offsets, unit="D")
+
+
+def _birth_dates(rng, fechas_vacunacion):
+    """Nacimientos: 30% niños vacunados cerca del año de edad, el resto 1-80 años"""
+    n = len(fechas_vacunacion)
+    ninos = rng.random(n) < 0.30
+
+    edad_dias = np.where(
+        ninos,
+        365 + rng.integers(-20, 120, n),
+        (rng.triangular(1, 18, 80, n) * 365.25).astype(int),
+    )
+    return fechas_vacunacion - pd.to_timedelta(edad_dias, unit="D")
+
+
+def generate_individual_chunk(rng, n, start_id=0, duplicate_fraction=0.0):
+    """Genera un bloque de registros individuales con el formato del export PAI"""
+    pesos = municipality_weights()
+    idx_mun = rng.choice(len(MUNICIPIOS_TOLIMA), size=n, p=pesos)
+    codigos = np.array([cod for cod, _, _ in MUNICIPIOS_TOLIMA])
+    nombres_mun = np.array([nom for _, nom, _ in MUNICIPIOS_TOLIMA])
+
+    fechas_fa = _vaccination_dates(rng, n)
+    nacimientos = _birth_dates(rng, fechas_fa)
+
+    df = pd.DataFrame(
+        {
+            "Consecutivo": np.arange(start_id, start_id + n),
+            "TipoIdentificacion": rng.choice(["CC", "TI", "RC", "CE"], n, p=[0.6, 0.15, 0.2, 0.05]),
+            "Documento": rng.integers(10_000_000, 1_999_999_999, n),
+            "PrimerNombre": rng.choice(NOMBRES, n),
+            "PrimerApellido": rng.choice(APELLIDOS, n),
+            "Sexo": rng.choice(["F", "M"], n),
+            "FechaNacimiento": nacimientos.strftime("%Y-%m-%d"),
+            "CodigoMunicipioResidencia": codigos[idx_mun],
+            "NombreMunicipioResidencia": nombres_mun[idx_mun],
+            "AreaResidencia": rng.choice(["URBANA", "RURAL"], n, p=[0.7, 0.3]),
+            "Aseguradora": rng.choice(ASEGURADORAS, n),
+            "FA UNICA": fechas_fa.strftime("%Y-%m-%d"),
+        }
+    )
+
+    # Anomalías reales del export: fechas vacías y en formato dd/mm/yyyy
+    vacias = rng.random(n) < 0.005
+    df.loc[vacias, "FA UNICA"] = ""
+    formato_alterno = rng.random(n) < 0.002
+    df.loc[formato_alterno, "FechaNacimiento"] = nacimientos[formato_alterno].strftime("%d/%m/%Y")
+
+    # Registros repetidos (misma persona y fecha de dosis)
+    if duplicate_fraction > 0 and n > 1:
+        n_dup = int(n * duplicate_fraction)
+        origen = rng.integers(0, n, n_dup)
+        destino = rng.integers(0, n, n_dup)
+        columnas_identidad = [c for c in COLUMNAS_INDIVIDUAL if c != "Consecutivo"]
+        df.loc[destino, columnas_identidad] = df.loc[origen, columnas_identidad].to_numpy()
+
+    return df
+
+
+def generate_individual_csv(file_path, n_individuos, seed=0, chunk_size=500_000, duplicate_fraction=0.01):
+    """Escribe vacunacion_fa.csv por bloques (memoria acotada para tamaños grandes)"""
+    rng = np.random.default_rng(seed)
+
+    with open(file_path, "w", encoding="utf-8", newline="") as f:
+        escritos = 0
+        while escritos < n_individuos:
+            n = min(chunk_size, n_individuos - escritos)
+            chunk = generate_individual_chunk(rng, n, escritos, duplicate_fraction)
+            chunk.to_csv(f, index=False, header=(escritos == 0))
+            escritos += n
+
+    return file_path
+
+
+def generate_barridos_frame(n_barridos, seed=0):
+    """Genera filas de barridos con el encabezado real de Resumen.xlsx"""
+    rng = np.random.default_rng(seed + 1)
+    pesos = municipality_weights()
+    nombres_mun = np.array([nom for _, nom, _ in MUNICIPIOS_TOLIMA])
+
+    dias = (FIN_EMERGENCIA - INICIO_EMERGENCIA).days
+    fechas = INICIO_EMERGENCIA + pd.to_timedelta(np.sort(rng.integers(0, dias, n_barridos)), unit="D")
+
+    idx_mun = rng.choice(len(MUNICIPIOS_TOLIMA), size=n_barridos, p=pesos)
+    veredas = np.char.add("VEREDA ", rng.integers(1, 60, n_barridos).astype(str))
+
+    data = {
+        "FECHA": fechas,
+        "MUNICIPIO": nombres_mun[idx_mun],
+        "VEREDAS": veredas,
+        " Efectivas (E)": rng.integers(5, 80, n_barridos),
+        "  No Efectivas (NE)": rng.integers(0, 6, n_barridos).astype(float),
+        "Fallidas (F)": rng.integers(0, 4, n_barridos).astype(float),
+        "Casa renuente": rng.integers(0, 5, n_barridos).astype(float),
+    }
+
+    # Cada sección: 11 columnas por edad seguidas de su total
+    personas = rng.poisson(30, n_barridos)
+    proporcion_seccion = {"TPE": 1.0, "TPVP": 0.25, "TPNVP": 0.12, "TPVB": 0.63}
+    columnas_edad = [c for c in ENCABEZADO_BARRIDOS[7:] if c not in SECCIONES_BARRIDOS]
+
+    for i, seccion in enumerate(SECCIONES_BARRIDOS):
+        totales = rng.binomial(personas, proporcion_seccion[seccion])
+        por_edad = np.array([rng.multinomial(t, PESOS_EDAD_BARRIDOS) for t in totales])
+
+        for j, col in enumerate(columnas_edad[i * 11:(i + 1) * 11]):
+            valores = por_edad[:, j].astype(float)
+            # Las planillas dejan celdas vacías en lugar de ceros
+            valores[(valores == 0) & (rng.random(n_barridos) < 0.6)] = np.nan
+            data[col] = valores
+
+        data[seccion] = totales
+
+    return pd.DataFrame(data)[ENCABEZADO_BARRIDOS]
+
+
+def generate_barridos_xlsx(file_path, n_barridos, seed=0):
+    """Escribe Resumen.xlsx con la hoja Vacunacion"""
+    df = generate_barridos_frame(n_barridos, seed)
+    df.to_excel(file_path, sheet_name="Vacunacion", index=False)
+    return file_path
+
+
+def generate_population_frame():
+    """Población asegurada sintética con el formato 'CÓDIGO - NOMBRE' de Poblacion_aseguramiento.xlsx"""
+    return pd.DataFrame(
+        {
+            "Municipio": [f"{cod} - {nom}" for cod, nom, _ in MUNICIPIOS_TOLIMA],
+            "Total general": [pop for _, _, pop in MUNICIPIOS_TOLIMA],
+        }
+    )
+
+
+def ensure_dataset(directory, n_individuos, n_barridos, seed=0):
+    """
+    Genera (o reutiliza) el conjunto sintético de un escenario
+
+    Returns:
+        dict: Rutas de los archivos generados
+    """
+    os.makedirs(directory, exist_ok=True)
+    csv_path = os.path.join(directory, f"vacunacion_fa_{n_individuos}_s{seed}.csv")
+    xlsx_path = os.path.join(directory, f"Resumen_{n_barridos}_s{seed}.xlsx")
+
+    if not os.path.exists(csv_path):
+        generate_individual_csv(csv_path + ".tmp", n_individuos, seed)
+        os.replace(csv_path + ".tmp", csv_path)
+
+    if not os.path.exists(xlsx_path):
+        generate_barridos_xlsx(xlsx_path + ".tmp.xlsx", n_barridos, seed)
+        os.replace(xlsx_path + ".tmp.xlsx", xlsx_path)
+
+    return {"vacunacion_csv": csv_path, "barridos_xlsx": xlsx_path}
@@ -0,0 +1,162 @@
+"""
+circuit_breaker.py - Cortacircuitos para fuentes remotas (Google Drive)
+Cuenta fallos consecutivos; al superar el umbral el circuito se abre y las
+solicitudes se atienden de inmediato con el último resultado bueno. Tras una espera
+exponencial con jitter pasa a semiabierto y deja pasar un solo intento de prueba
+"""
+
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+UMBRAL_FALLOS = 3
+ESPERA_BASE_S = 30.0
+ESPERA_MAXIMA_S = 900.0
+
+# Estado por nombre de circuito (compartido por todas las sesiones del proceso)
+_breakers = {}
+_last_good = {}
+_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: no se intenta la fuente remota"""
+
+
+def backoff_delay(aperturas, base=ESPERA_BASE_S, maximo=ESPERA_MAXIMA_S):
+    """Espera exponencial con jitter: entre la mitad y el total de base * 2^(aperturas-1)"""
+    espera = min(maximo, base * (2 ** max(aperturas - 1, 0)))
+    return random.uniform(espera / 2, espera)
+
+
+def _get(name):
+    if name not in _breakers:
+        _breakers[name] = {
+            "estado": CERRADO,
+            "fallos": 0,
+            "aperturas": 0,
+            "abierto_hasta": None,
+            "prueba_en_curso": False,
+            "ultimo_error": None,
+            "ultimo_fallo": None,
+            "ultimo_exito": None,
+            "rechazadas": 0,
+        }
+    return _breakers[name]
+
+
+def allow_request(name):
+    """
+    Decide si se intenta la fuente remota; en semiabierto solo pasa un intento a la vez
+    """
+    with _lock:
+        breaker = _get(name)
+
+        if breaker["estado"] == ABIERTO:
+            if time.time() < breaker["abierto_hasta"]:
+                breaker["rechazadas"] += 1
+                return False
+            breaker["estado"] = SEMIABIERTO
+            breaker["prueba_en_curso"] = False
+
+        if breaker["estado"] == SEMIABIERTO:
+            if breaker["prueba_en_curso"]:
+                breaker["rechazadas"] += 1
+                return False
+            breaker["prueba_en_curso"] = True
+
+        return True
+
+
+def record_success(name):
+    """Intento exitoso: el circuito se cierra y se reinician los contadores"""
+    with _lock:
+        breaker = _get(name)
+        if breaker["estado"] != CERRADO:
+            logger.info(f"Circuito {name} cerrado tras intento exitoso")
+        breaker.update(
+            estado=CERRADO,
+            fallos=0,
+            aperturas=0,
+            abierto_hasta=None,
+            prueba_en_curso=False,
+            ultimo_exito=time.time(),
+        )
+
+
+def record_failure(name, error=None, umbral=UMBRAL_FALLOS, base=ESPERA_BASE_S,
+                   maximo=ESPERA_MAXIMA_S):
+    """Intento fallido: abre el circuito al llegar al umbral o si falló la prueba"""
+    with _lock:
+        breaker = _get(name)
+        breaker["fallos"] += 1
+        breaker["ultimo_error"] = str(error) if error else None
+        breaker["ultimo_fallo"] = time.time()
+
+        if breaker["estado"] == SEMIABIERTO or breaker["fallos"] >= umbral:
+            breaker["aperturas"] += 1
+            espera = backoff_delay(breaker["aperturas"], base, maximo)
+            breaker.update(
+                estado=ABIERTO,
+                abierto_hasta=time.time() + espera,
+                prueba_en_curso=False,
+            )
+            logger.warning(f"Circuito {name} abierto por {espera:.0f}s: {breaker['ultimo_error']}")
+
+
+def call_with_breaker(name, func, *args, is_failure=None, settings=None, **kwargs):
+    """
+    Ejecuta func protegida por el circuito
+
+    Args:
+        is_failure (callable): Determina si un resultado sin excepción es un fallo
+        settings (dict): umbral, base y maximo (opcional)
+
+    Raises:
+        CircuitOpenError: Si el circuito no permite el intento
+    """
+    settings = settings or {}
+    if not allow_request(name):
+        raise CircuitOpenError(f"Circuito {name} abierto")
+
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        record_failure(name, e, **settings)
+        raise
+
+    if is_failure and is_failure(result):
+        record_failure(name, "resultado incompleto", **settings)
+    else:
+        record_success(name)
+    return result
+
+
+def remember_good(name, value):
+    """Guarda el último resultado bueno para servirlo con el circuito abierto"""
+    with _lock:
+        _last_good[name] = {"valor": value, "momento": time.time()}
+
+
+def last_good(name):
+    """Último resultado bueno ({"valor", "momento"}) o None"""
+    with _lock:
+        return _last_good.get(name)
+
+
+def get_breaker_states():
+    """Copia del estado de todos los circuitos (para diagnóstico)"""
+    with _lock:
+        states = {}
+        for name, breaker in _breakers.items():
+            state = dict(breaker)
+            state["respaldo_disponible"] = name in _last_good
+            states[name] = state
+        return states
@@ -0,0 +1,66 @@
+"""
+compression.py - Archivos de datos comprimidos (gzip, zstd, zip)
+La compresión se detecta por los bytes iniciales (no por la extensión) y pandas
+descomprime en flujo hacia el parser: nunca se escribe un archivo intermedio
+"""
+
+import importlib.util
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Firmas de inicio de archivo y nombre de compresión para pandas
+FIRMAS_COMPRESION = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"PK\x03\x04", "zip"),
+]
+
+# Variantes aceptadas de un archivo de datos, en orden de preferencia
+EXTENSIONES_COMPRIMIDAS = [".gz", ".zst"]
+
+
+def detect_compression(path):
+    """
+    Compresión del archivo según sus bytes iniciales (None si es texto plano)
+
+    Raises:
+        ImportError: Si es zstd y el paquete opcional zstandard no está instalado
+    """
+    try:
+        with open(path, "rb") as f:
+            inicio = f.read(4)
+    except OSError:
+        return None
+
+    for firma, compresion in FIRMAS_COMPRESION:
+        if inicio.startswith(firma):
+            if compresion == "zstd" and importlib.util.find_spec("zstandard") is None:
+                raise ImportError(
+                    f"{path} está comprimido con zstd: instala el paquete opcional 'zstandard'"
+                )
+            return compresion
+    return None
+
+
+def compressed_variants(path):
+    """Rutas aceptadas para un archivo: plano, .gz, .zst y .zip"""
+    base, _ = os.path.splitext(path)
+    return [path] + [path + ext for ext in EXTENSIONES_COMPRIMIDAS] + [base + ".zip"]
+
+
+def find_data_file(path):
+    """Primera variante existente de un archivo de datos (la ruta plana si ninguna existe)"""
+    for candidate in compressed_variants(path):
+        if os.path.exists(candidate):
+            return candidate
+    return path
+
+
+def is_compressed(path):
+    """True si el archivo está comprimido (no admite lectura por rangos de bytes)"""
+    try:
+        return detect_compression(path) is not None
+    except ImportError:
+        return True
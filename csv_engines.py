@@ -0,0 +1,216 @@
+"""
+csv_engines.py - Motores de lectura del CSV individual
+"pandas": parser C de pandas (todo como texto; las fechas las convierte date_parsing)
+"arrow": lector CSV multihilo de pyarrow (opcional) que entrega columnas ya tipadas:
+fechas como timestamp y municipio codificado como diccionario (categoría en pandas)
+"""
+
+import importlib.util
+import logging
+import time
+
+import pandas as pd
+
+from compression import detect_compression
+from date_parsing import FORMATOS_FECHA
+from input_schema import (
+    FECHA,
+    canonical_columns,
+    column_selector,
+    pipeline_stages,
+    read_options,
+    resolve_fields,
+)
+
+logger = logging.getLogger(__name__)
+
+MOTOR_PANDAS = "pandas"
+MOTOR_ARROW = "arrow"
+MOTORES = [MOTOR_PANDAS, MOTOR_ARROW]
+
+# Valores nulos por defecto de pandas.read_csv (Arrow usa una lista distinta)
+VALORES_NULOS = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+# Compresiones que el lector de Arrow descomprime en flujo (zip no es un flujo)
+COMPRESION_ARROW = {None: None, "gzip": "gzip", "zstd": "zstd"}
+
+
+def arrow_available():
+    """True si pyarrow está instalado"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def resolve_engine(motor, file_path=None):
+    """
+    Motor efectivo: "arrow" solo si pyarrow está instalado y el archivo es legible
+    en flujo por Arrow; en otro caso, el parser de pandas
+    """
+    if motor != MOTOR_ARROW:
+        return MOTOR_PANDAS
+    if not arrow_available():
+        logger.info("pyarrow no está instalado: se usa el parser de pandas")
+        return MOTOR_PANDAS
+    if file_path is not None and detect_compression(file_path) not in COMPRESION_ARROW:
+        return MOTOR_PANDAS
+    return MOTOR_ARROW
+
+
+def read_csv_pandas(file_path, dataset="vacunacion", etapas=None):
+    """Lectura con el parser de pandas (columnas del esquema, todo como texto)"""
+    df = pd.read_csv(
+        file_path,
+        low_memory=False,
+        encoding="utf-8",
+        compression=detect_compression(file_path),
+        **read_options(dataset, etapas),
+    )
+    canonical_columns(df, dataset)
+    return df
+
+
+def _arrow_column_types(campos, fechas_tipadas):
+    """Tipos de Arrow por columna: timestamp, diccionario o texto"""
+    import pyarrow as pa
+
+    tipos = {}
+    for column, campo in campos.items():
+        if campo["tipo"] == FECHA and fechas_tipadas:
+            tipos[column] = pa.timestamp("s")
+        elif campo.get("categoria"):
+            tipos[column] = pa.dictionary(pa.int32(), pa.string())
+        else:
+            tipos[column] = pa.string()
+    return tipos
+
+
+def _read_arrow_table(file_path, columnas, tipos):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    compresion = COMPRESION_ARROW[detect_compression(file_path)]
+    with pa.input_stream(file_path, compression=compresion) as stream:
+        return pacsv.read_csv(
+            stream,
+            read_options=pacsv.ReadOptions(use_threads=True, encoding="utf8"),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=columnas,
+                column_types=tipos,
+                null_values=VALORES_NULOS,
+                strings_can_be_null=True,
+                timestamp_parsers=FORMATOS_FECHA,
+            ),
+        )
+
+
+def read_csv_arrow(file_path, dataset="vacunacion", etapas=None):
+    """
+    Lectura multihilo con pyarrow, directo a columnas tipadas
+
+    Las fechas se convierten en el lector con los formatos de date_parsing; si algún
+    valor no corresponde a ninguno (texto sucio, seriales de Excel, fechas fuera de
+    rango) se vuelve a leer con las fechas como texto y date_parsing aplica su
+    conversión tolerante sobre valores únicos
+    """
+    import pyarrow as pa
+
+    encabezado = pd.read_csv(
+        file_path, nrows=0, encoding="utf-8", compression=detect_compression(file_path)
+    )
+    seleccionar = column_selector(dataset, etapas)
+    columnas = [col for col in encabezado.columns if seleccionar(col)]
+    campos = resolve_fields(columnas, dataset, etapas)
+
+    try:
+        table = _read_arrow_table(file_path, columnas, _arrow_column_types(campos, True))
+        df = table.to_pandas(coerce_temporal_nanoseconds=True)
+    except (pa.ArrowInvalid, OverflowError) as e:
+        logger.info(f"Fechas no convertibles en Arrow, se leen como texto: {str(e)[:120]}")
+        table = _read_arrow_table(file_path, columnas, _arrow_column_types(campos, False))
+        df = table.to_pandas()
+
+    canonical_columns(df, dataset)
+    return df
+
+
+def read_registry_csv(file_path, motor=MOTOR_PANDAS, dataset="vacunacion", etapas=None):
+    """Lee el CSV con el motor indicado (o el parser de pandas si Arrow no aplica)"""
+    if resolve_engine(motor, file_path) == MOTOR_ARROW:
+        return read_csv_arrow(file_path, dataset, etapas)
+    return read_csv_pandas(file_path, dataset, etapas)
+
+
+def conformance_check(csv_path, fecha_corte=None, deduplicar=True):
+    """
+    Compara los agregados del dashboard con ambos motores: PRE-emergencia (total,
+    rangos de edad, municipios), duplicados y serie diaria de vacunación
+
+    Returns:
+        dict: {"coincide": bool, "diferencias": [..], "tiempos": {...}}
+    """
+    import app
+    from deduplication import drop_flagged_duplicates, mark_individual_duplicates
+    from vistas.temporal import safe_group_by_date
+
+    resultados = {}
+    tiempos = {}
+    for motor in MOTORES:
+        inicio = time.perf_counter()
+        df = read_registry_csv(csv_path, motor, etapas=pipeline_stages(deduplicar))
+        tiempos[f"lectura_{motor}_s"] = time.perf_counter() - inicio
+
+        df = app.apply_robust_date_conversion(df)
+        if deduplicar:
+            df = mark_individual_duplicates(df)
+        df, reporte = drop_flagged_duplicates(df, "NombreMunicipioResidencia")
+
+        pre = app.process_individual_pre_barridos_robust(df, fecha_corte)
+        diaria = safe_group_by_date(df, "FA UNICA")
+        resultados[motor] = {
+            "total": {"total": pre["total"]},
+            "por_edad": pre["por_edad"],
+            "por_municipio": pre["por_municipio"],
+            "duplicados": {"duplicados": reporte["duplicados"]},
+            "duplicados_municipio": reporte["por_municipio"],
+            "serie_diaria": dict(zip(diaria.iloc[:, 0].astype(str), diaria.iloc[:, 1])),
+        }
+
+    diferencias = []
+    esperado, obtenido = resultados[MOTOR_PANDAS], resultados[MOTOR_ARROW]
+    for clave in esperado:
+        claves = set(esperado[clave]) | set(obtenido[clave])
+        for k in sorted(claves, key=str):
+            a, b = int(esperado[clave].get(k, 0)), int(obtenido[clave].get(k, 0))
+            if a != b:
+                diferencias.append(f"{clave}[{k}]: pandas={a} arrow={b}")
+
+    return {"coincide": not diferencias, "diferencias": diferencias, "tiempos": tiempos}
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Conformidad: agregados idénticos con el parser de pandas y el lector de Arrow
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "data/vacunacion_fa.csv"
+    fecha_corte = pd.Timestamp(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print("🏹 CONFORMIDAD MOTORES CSV (pandas vs Arrow)")
+    print("=" * 50)
+    if not arrow_available():
+        print("⚠️ pyarrow no está instalado: solo está disponible el parser de pandas")
+        sys.exit(0)
+
+    resultado = conformance_check(csv_path, fecha_corte)
+    print(
+        f"lectura pandas: {resultado['tiempos']['lectura_pandas_s']:.2f}s - "
+        f"lectura arrow: {resultado['tiempos']['lectura_arrow_s']:.2f}s"
+    )
+    if resultado["coincide"]:
+        print("✅ Agregados idénticos")
+    else:
+        print("❌ Diferencias:")
+        for diferencia in resultado["diferencias"][:50]:
+            print(f"   {diferencia}")
+        sys.exit(1)
@@ -0,0 +1,104 @@
+"""
+data_version.py - Tokens de versión de datos para las cachés de Streamlit
+Una huella de los archivos fuente se calcula una vez al cargar y viaja con el
+DataFrame (df.attrs); las funciones cacheadas reciben el DataFrame como parámetro
+_df (Streamlit no lo hashea) y usan el token como clave
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+import pandas as pd
+
+ATRIBUTO_VERSION = "version_datos"
+
+# Filas de muestra para estimar el costo de hashear un DataFrame completo
+FILAS_MUESTRA_HASH = 10_000
+
+# Contadores de hasheo evitado (todas las sesiones)
+HASH_STATS = {"llamadas": 0, "filas_evitadas": 0, "hash_evitado_s": 0.0}
+_stats_lock = threading.Lock()
+_hash_cost_per_row = {}
+
+
+def file_fingerprint(*paths, extra=None):
+    """
+    Huella barata de archivos: ruta, tamaño y fecha de modificación (sin leerlos)
+
+    Args:
+        paths (str): Archivos fuente
+        extra: Configuración que cambia el resultado de la carga (p. ej. deduplicar)
+
+    Returns:
+        str: Token hexadecimal de 16 caracteres
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            firma = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        except (OSError, TypeError):
+            # Archivo inexistente (o ruta None): el token refleja su ausencia
+            firma = f"{path}|ausente"
+        digest.update(firma.encode("utf-8"))
+    digest.update(repr(extra).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def content_fingerprint(df):
+    """Huella por contenido (respaldo para DataFrames sin token): hashea todas las filas"""
+    digest = hashlib.sha1()
+    digest.update(repr((df.shape, list(df.columns))).encode("utf-8"))
+    if not df.empty:
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def attach_version(df, token):
+    """Asocia el token de versión al DataFrame (se conserva en vistas y filtros)"""
+    if df is not None:
+        df.attrs[ATRIBUTO_VERSION] = token
+    return df
+
+
+def get_version(df):
+    """Token de versión del DataFrame; si no tiene, se calcula por contenido una vez"""
+    token = df.attrs.get(ATRIBUTO_VERSION)
+    if token is None:
+        token = attach_version(df, content_fingerprint(df)).attrs[ATRIBUTO_VERSION]
+    return token
+
+
+def _estimated_hash_cost(df):
+    """Segundos que tomaría hashear df, estimados con una muestra (por esquema de columnas)"""
+    esquema = tuple(str(dtype) for dtype in df.dtypes)
+    if esquema not in _hash_cost_per_row:
+        muestra = df.head(FILAS_MUESTRA_HASH)
+        inicio = time.perf_counter()
+        pd.util.hash_pandas_object(muestra, index=True)
+        _hash_cost_per_row[esquema] = (time.perf_counter() - inicio) / max(len(muestra), 1)
+    return _hash_cost_per_row[esquema] * len(df)
+
+
+def version_key(df):
+    """
+    Token para usar como clave de caché en lugar del DataFrame
+    Suma a HASH_STATS el hasheo que Streamlit habría hecho sobre el DataFrame
+    """
+    token = get_version(df)
+    costo = _estimated_hash_cost(df) if not df.empty else 0.0
+
+    with _stats_lock:
+        HASH_STATS["llamadas"] += 1
+        HASH_STATS["filas_evitadas"] += len(df)
+        HASH_STATS["hash_evitado_s"] += costo
+
+    return token
+
+
+def get_hash_stats():
+    """Copia de los contadores de hasheo evitado"""
+    with _stats_lock:
+        return dict(HASH_STATS)
@@ -0,0 +1,172 @@
+"""
+date_parsing.py - Conversión de fechas sobre valores únicos
+Cada columna se factoriza, solo sus valores distintos se convierten (formato rápido
+primero, luego formatos alternativos y seriales de Excel) y el resultado se expande
+de vuelta con take: el costo escala con la cardinalidad, no con las filas
+"""
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Formatos en orden de prueba: el primero es el del export del PAI
+FORMATOS_FECHA = [
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+    "%d-%m-%Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+]
+
+# Seriales de Excel (días desde 1899-12-30) aceptados: 1900-01-01 a 2099-12-31
+ORIGEN_EXCEL = "1899-12-30"
+SERIAL_EXCEL_MIN = 2
+SERIAL_EXCEL_MAX = 73050
+
+ETIQUETA_EXCEL = "serial_excel"
+
+
+def _empty_report(formatos):
+    """Reporte vacío: filas convertidas por formato, fallidas y valores únicos"""
+    report = {formato: 0 for formato in formatos}
+    report[ETIQUETA_EXCEL] = 0
+    report.update({"fallidos": 0, "nulos": 0, "unicos": 0, "filas": 0})
+    return report
+
+
+def parse_dates(series, formatos=None, seriales_excel=True):
+    """
+    Convierte una columna a datetime procesando solo sus valores únicos
+
+    Args:
+        series (pd.Series): Columna de texto, números u objetos fecha
+        formatos (list): Formatos strptime en orden de prueba (FORMATOS_FECHA por defecto)
+        seriales_excel (bool): Interpretar números 2-73050 como seriales de Excel
+
+    Returns:
+        tuple: (pd.Series datetime64, reporte de filas por formato y fallidas)
+    """
+    formatos = formatos or FORMATOS_FECHA
+    report = _empty_report(formatos)
+    report["filas"] = len(series)
+
+    # Columnas ya tipadas (p. ej. FECHA leída de Excel) no se reprocesan
+    if pd.api.types.is_datetime64_any_dtype(series):
+        report["nulos"] = int(series.isna().sum())
+        report["directo"] = report["filas"] - report["nulos"]
+        return series, report
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    n_unicos = len(uniques)
+    report["unicos"] = n_unicos
+
+    # Filas por valor único, para que el reporte cuente filas y no valores
+    filas_por_unico = np.bincount(codes[codes >= 0], minlength=n_unicos)
+    report["nulos"] = int((codes < 0).sum())
+
+    textos = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    valores = np.full(n_unicos + 1, np.datetime64("NaT"), dtype="datetime64[ns]")
+    pendientes = np.ones(n_unicos, dtype=bool)
+
+    for formato in formatos:
+        if not pendientes.any():
+            break
+        indices = np.flatnonzero(pendientes)
+        intento = pd.to_datetime(textos.iloc[indices], format=formato, errors="coerce")
+        convertidos = intento.notna().to_numpy()
+        if convertidos.any():
+            aceptados = indices[convertidos]
+            valores[aceptados] = intento[convertidos].to_numpy(dtype="datetime64[ns]")
+            pendientes[aceptados] = False
+            report[formato] = int(filas_por_unico[aceptados].sum())
+
+    if seriales_excel and pendientes.any():
+        indices = np.flatnonzero(pendientes)
+        numeros = pd.to_numeric(textos.iloc[indices], errors="coerce")
+        validos = numeros.between(SERIAL_EXCEL_MIN, SERIAL_EXCEL_MAX).to_numpy()
+        if validos.any():
+            aceptados = indices[validos]
+            fechas = pd.to_datetime(
+                numeros[validos].to_numpy(), unit="D", origin=ORIGEN_EXCEL
+            )
+            valores[aceptados] = fechas.to_numpy(dtype="datetime64[ns]")
+            pendientes[aceptados] = False
+            report[ETIQUETA_EXCEL] = int(filas_por_unico[aceptados].sum())
+
+    report["fallidos"] = int(filas_por_unico[pendientes].sum())
+
+    # El centinela -1 (nulos) toma el último elemento: NaT
+    return pd.Series(valores.take(codes), index=series.index, name=series.name), report
+
+
+def parse_date_columns(df, columnas, formatos=None, seriales_excel=True):
+    """
+    Convierte varias columnas de un DataFrame (in situ sobre df)
+
+    Returns:
+        dict: Reporte por columna
+    """
+    reports = {}
+    for col in columnas:
+        if col not in df.columns:
+            continue
+        inicio = time.perf_counter()
+        df[col], reports[col] = parse_dates(df[col], formatos, seriales_excel)
+        reports[col]["tiempo_s"] = time.perf_counter() - inicio
+        logger.info(f"{col}: {summarize_report(reports[col])}")
+    return reports
+
+
+def summarize_report(report):
+    """Texto corto con las filas convertidas por formato (solo formatos usados)"""
+    usados = [
+        f"{clave}: {valor:,}"
+        for clave, valor in report.items()
+        if clave not in ("unicos", "filas", "nulos", "fallidos", "tiempo_s") and valor
+    ]
+    return (
+        f"{report['filas']:,} filas, {report['unicos']:,} únicos - "
+        + ", ".join(usados + [f"fallidos: {report['fallidos']:,}"])
+    )
+
+
+if __name__ == "__main__":
+    # Benchmark: conversión fila a fila vs valores únicos con cardinalidades realistas
+    # (FA UNICA: ~2 mil fechas distintas; FechaNacimiento: ~36 mil)
+    rng = np.random.default_rng(0)
+    escenarios = [("FA UNICA", 2_000), ("FechaNacimiento", 36_500)]
+
+    print("📅 CONVERSIÓN DE FECHAS: FILA A FILA vs VALORES ÚNICOS")
+    print("=" * 60)
+    for n_filas in [100_000, 1_000_000, 5_000_000]:
+        for nombre, cardinalidad in escenarios:
+            base = pd.Timestamp("1930-01-01") if nombre == "FechaNacimiento" else pd.Timestamp("2020-01-01")
+            dias = rng.integers(0, cardinalidad, n_filas)
+            fechas = (base + pd.to_timedelta(dias, unit="D")).strftime("%Y-%m-%d")
+            textos = pd.Series(np.asarray(fechas, dtype=object))
+            # 0,5% en formato dd/mm/aaaa y 0,1% basura, como en los exports reales
+            alternos = rng.random(n_filas) < 0.005
+            textos[alternos] = pd.to_datetime(textos[alternos]).dt.strftime("%d/%m/%Y")
+            textos[rng.random(n_filas) < 0.001] = "SIN DATO"
+
+            inicio = time.perf_counter()
+            esperado = pd.to_datetime(textos, format="%Y-%m-%d", errors="coerce")
+            tiempo_filas = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            obtenido, reporte = parse_dates(textos)
+            tiempo_unicos = time.perf_counter() - inicio
+
+            mask = esperado.notna()
+            coincide = (obtenido[mask] == esperado[mask]).all()
+            print(
+                f"{nombre:<16} {n_filas:>9,} filas: fila a fila {tiempo_filas:6.3f}s - "
+                f"únicos {tiempo_unicos:6.3f}s (x{tiempo_filas / tiempo_unicos:4.1f}) "
+                f"{'✅' if coincide else '❌'}"
+            )
+            print(f"   {summarize_report(reporte)}")
@@ -0,0 +1,243 @@
+"""
+deduplication.py - Detección de registros duplicados
+Individual: hash de campos de identidad normalizados + fecha de dosis
+Barridos: filas idénticas (misma fecha, municipio, vereda y conteos), solo reportadas
+salvo que se pida retirarlas
+"""
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+COLUMNA_DUPLICADO = "es_duplicado"
+
+# Reporte de duplicados retirados en la carga (viaja con el DataFrame en df.attrs)
+ATRIBUTO_REPORTE = "reporte_duplicados"
+
+# Alias de columnas de identidad en los exports del PAI
+ALIAS_DOCUMENTO = [
+    "Documento",
+    "NumeroIdentificacion",
+    "NumeroDocumento",
+    "NroDocumento",
+    "Identificacion",
+]
+ALIAS_NOMBRES = [
+    "PrimerNombre",
+    "SegundoNombre",
+    "PrimerApellido",
+    "SegundoApellido",
+    "NombreCompleto",
+]
+ALIAS_SEXO = ["Sexo", "Genero"]
+
+COLUMNA_NACIMIENTO = "FechaNacimiento"
+COLUMNA_DOSIS = "FA UNICA"
+COLUMNA_MUNICIPIO = "NombreMunicipioResidencia"
+
+# Documentos de relleno que no identifican a nadie ("0", "SD", "000000"...)
+LONGITUD_MINIMA_DOCUMENTO = 4
+
+
+def _normalize_text(value):
+    """Mayúsculas, sin acentos ni signos"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    text = unicodedata.normalize("NFD", str(value))
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return re.sub(r"[^0-9A-Z]", "", text.upper())
+
+
+def normalize_column(series):
+    """
+    Normaliza una columna de texto procesando solo sus valores únicos
+    (factorize + take: el costo escala con la cardinalidad, no con las filas)
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    normalized = np.array([_normalize_text(u) for u in uniques] + [""], dtype=object)
+    # El centinela -1 (nulos) toma el último elemento: cadena vacía
+    return pd.Series(normalized.take(codes), index=series.index)
+
+
+def _first_present(df, aliases):
+    """Primera columna existente de una lista de alias"""
+    return next((col for col in aliases if col in df.columns), None)
+
+
+def identity_columns(df):
+    """Columnas de identidad disponibles en el DataFrame"""
+    return {
+        "documento": _first_present(df, ALIAS_DOCUMENTO),
+        "nombres": [col for col in ALIAS_NOMBRES if col in df.columns],
+        "sexo": _first_present(df, ALIAS_SEXO),
+        "nacimiento": COLUMNA_NACIMIENTO if COLUMNA_NACIMIENTO in df.columns else None,
+        "dosis": COLUMNA_DOSIS if COLUMNA_DOSIS in df.columns else None,
+    }
+
+
+def _date_key(series):
+    """Fecha como entero (NaT -> mínimo) para el hash"""
+    fechas = pd.to_datetime(series, errors="coerce")
+    return fechas.to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def identity_hashes(df):
+    """
+    Hash de 64 bits por registro: documento normalizado (o nombres si el documento
+    no es válido) + sexo + fecha de nacimiento + fecha de dosis
+    """
+    columnas = identity_columns(df)
+
+    if not columnas["documento"] and not columnas["nombres"]:
+        return None
+
+    # Identidad por nombres (respaldo para documentos vacíos o de relleno)
+    if columnas["nombres"]:
+        nombres = normalize_column(df[columnas["nombres"][0]])
+        for col in columnas["nombres"][1:]:
+            nombres = nombres + "|" + normalize_column(df[col])
+    else:
+        nombres = pd.Series("", index=df.index)
+
+    if columnas["documento"]:
+        documento = normalize_column(df[columnas["documento"]]).str.lstrip("0")
+        invalido = documento.str.len() < LONGITUD_MINIMA_DOCUMENTO
+        identidad = documento.where(~invalido, "N:" + nombres)
+    else:
+        identidad = "N:" + nombres
+
+    claves = {"identidad": identidad.to_numpy()}
+    if columnas["sexo"]:
+        claves["sexo"] = normalize_column(df[columnas["sexo"]]).to_numpy()
+    if columnas["nacimiento"]:
+        claves["nacimiento"] = _date_key(df[columnas["nacimiento"]])
+    if columnas["dosis"]:
+        claves["dosis"] = _date_key(df[columnas["dosis"]])
+
+    return pd.util.hash_pandas_object(pd.DataFrame(claves), index=False).to_numpy()
+
+
+def find_duplicates(hashes, n_partitions=1):
+    """
+    Marca como duplicado toda aparición de un hash después de la primera
+
+    Con n_partitions > 1 se particiona por hash para acotar el tamaño de cada tabla
+    (las repeticiones de un mismo hash siempre caen en la misma partición)
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+
+    if n_partitions <= 1:
+        return pd.Series(hashes).duplicated(keep="first").to_numpy()
+
+    duplicados = np.zeros(len(hashes), dtype=bool)
+    particion = hashes % np.uint64(n_partitions)
+    for p in range(n_partitions):
+        indices = np.flatnonzero(particion == p)
+        if len(indices):
+            duplicados[indices] = pd.Series(hashes[indices]).duplicated(keep="first").to_numpy()
+
+    return duplicados
+
+
+def mark_individual_duplicates(df, n_partitions=1):
+    """Agrega la columna es_duplicado al registro individual"""
+    if df.empty:
+        return df
+
+    hashes = identity_hashes(df)
+    df = df.copy()
+    if hashes is None:
+        df[COLUMNA_DUPLICADO] = False
+    else:
+        df[COLUMNA_DUPLICADO] = find_duplicates(hashes, n_partitions)
+    return df
+
+
+def mark_barridos_duplicates(df):
+    """
+    Agrega es_duplicado a barridos: filas idénticas en todas las columnas. Las filas
+    no identifican personas, así que por defecto solo se reportan (ver
+    report_flagged_duplicates)
+    """
+    if df.empty:
+        return df
+
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    df = df.copy()
+    df[COLUMNA_DUPLICADO] = find_duplicates(hashes)
+    return df
+
+
+def duplicate_report(df, municipio_col):
+    """
+    Resumen de duplicados marcados: total y conteo por municipio
+
+    Returns:
+        dict: {"total_registros", "duplicados", "por_municipio"}
+    """
+    if df.empty or COLUMNA_DUPLICADO not in df.columns:
+        return {"total_registros": len(df), "duplicados": 0, "por_municipio": {}}
+
+    mask = df[COLUMNA_DUPLICADO].to_numpy(dtype=bool)
+    por_municipio = {}
+    if municipio_col in df.columns and mask.any():
+        conteos = df.loc[mask, municipio_col].value_counts()
+        por_municipio = conteos[conteos > 0].to_dict()
+
+    return {
+        "total_registros": len(df),
+        "duplicados": int(mask.sum()),
+        "por_municipio": por_municipio,
+    }
+
+
+def drop_flagged_duplicates(df, municipio_col):
+    """
+    Retira las filas marcadas como duplicadas y la columna de marca
+
+    Returns:
+        tuple: (DataFrame sin duplicados, reporte de duplicados)
+    """
+    report = duplicate_report(df, municipio_col)
+
+    if df.empty or COLUMNA_DUPLICADO not in df.columns:
+        return df, report
+
+    if report["duplicados"] == 0:
+        return df.drop(columns=[COLUMNA_DUPLICADO]), report
+
+    df_unique = df.loc[~df[COLUMNA_DUPLICADO].to_numpy(dtype=bool)]
+    return df_unique.drop(columns=[COLUMNA_DUPLICADO]).reset_index(drop=True), report
+
+
+def report_flagged_duplicates(df, municipio_col):
+    """
+    Reporta las filas marcadas sin retirarlas (solo se quita la columna de marca):
+    para filas sin identidad de persona, como las de barridos, una fila repetida
+    puede ser otra vacunación real
+
+    Returns:
+        tuple: (DataFrame con todas sus filas, reporte con "retirados": False)
+    """
+    report = {**duplicate_report(df, municipio_col), "retirados": False}
+    if df.empty or COLUMNA_DUPLICADO not in df.columns:
+        return df, report
+    return df.drop(columns=[COLUMNA_DUPLICADO]), report
+
+
+def attach_duplicate_report(df, report):
+    """Asocia al DataFrame el reporte de los duplicados que se le retiraron"""
+    if df is not None:
+        df.attrs[ATRIBUTO_REPORTE] = report
+    return df
+
+
+def get_duplicate_report(df, municipio_col):
+    """
+    Reporte de duplicados del DataFrame: el que se guardó al retirarlos en la carga
+    o, si no lo tiene, el de las filas aún marcadas
+    """
+    report = df.attrs.get(ATRIBUTO_REPORTE)
+    return report if report is not None else duplicate_report(df, municipio_col)
@@ -0,0 +1,321 @@
+"""
+disk_cache.py - Caché en disco compartida entre procesos (réplicas del dashboard)
+- Bloqueos de archivo consultivos (fcntl en POSIX, msvcrt en Windows)
+- Construcción única: un proceso descarga/genera y los demás esperan y reutilizan
+- Nombres por contenido (SHA-256): lectores nunca ven archivos a medio escribir
+- Límite de tamaño con desalojo LRU; no se desalojan entradas ni objetos entregados
+  hace menos de GRACIA_DESALOJO_S (otro proceso puede estar por abrirlos)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from functools import partial
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_POR_DEFECTO = "temp/cache"
+ARCHIVO_INDICE = "indice.json"
+LIMITE_POR_DEFECTO_MB = 2048
+
+# Espera máxima por un bloqueo (una descarga lenta de Drive puede tardar)
+ESPERA_BLOQUEO_S = 180
+INTERVALO_REINTENTO_S = 0.1
+
+# Tiempo desde la última entrega de una ruta durante el cual no se desaloja
+GRACIA_DESALOJO_S = 120
+
+
+@contextmanager
+def file_lock(path, timeout=ESPERA_BLOQUEO_S):
+    """
+    Bloqueo exclusivo entre procesos sobre un archivo de bloqueo
+
+    Raises:
+        TimeoutError: Si no se obtiene el bloqueo en timeout segundos
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    f = open(path, "a+b")
+    limite = time.monotonic() + timeout
+
+    try:
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() > limite:
+                    raise TimeoutError(f"Tiempo de espera agotado por el bloqueo {path}")
+                time.sleep(INTERVALO_REINTENTO_S)
+
+        yield
+
+    finally:
+        try:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        f.close()
+
+
+def _safe_name(key):
+    """Nombre de archivo seguro para una clave"""
+    return re.sub(r"[^0-9A-Za-z_.-]", "_", key)[:120]
+
+
+def _paths(directory):
+    return {
+        "indice": os.path.join(directory, ARCHIVO_INDICE),
+        "bloqueo_indice": os.path.join(directory, "bloqueos", "_indice.lock"),
+        "objetos": os.path.join(directory, "objetos"),
+        "bloqueos": os.path.join(directory, "bloqueos"),
+    }
+
+
+def _read_index(directory):
+    try:
+        with open(_paths(directory)["indice"], encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(directory, index):
+    """Escritura atómica del índice (llamar con el bloqueo del índice tomado)"""
+    path = _paths(directory)["indice"]
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def lookup(key, directory=DIRECTORIO_POR_DEFECTO):
+    """Entrada del índice para una clave (None si no existe o su objeto falta)"""
+    entry = _read_index(directory).get(key)
+    if entry and os.path.exists(entry["ruta"]):
+        return entry
+    return None
+
+
+def _touch(directory, key):
+    """
+    Actualiza el último acceso de una entrada (orden LRU) y la fecha de modificación
+    de su objeto, que protege al objeto del desalojo aunque la entrada se reemplace
+    """
+    paths = _paths(directory)
+    with file_lock(paths["bloqueo_indice"]):
+        index = _read_index(directory)
+        if key in index:
+            index[key]["ultimo_acceso"] = time.time()
+            _write_index(directory, index)
+            try:
+                os.utime(index[key]["ruta"])
+            except OSError:
+                pass
+
+
+def revalidate(key, directory=DIRECTORIO_POR_DEFECTO):
+    """
+    Marca una entrada como recién construida (su contenido se confirmó vigente por
+    otra vía, p. ej. metadatos remotos): get_or_build la reutiliza sin reconstruir
+    hasta que vuelva a vencer
+
+    Returns:
+        bool: Si la entrada existía
+    """
+    paths = _paths(directory)
+    with file_lock(paths["bloqueo_indice"]):
+        index = _read_index(directory)
+        entry = index.get(key)
+        if not entry or not os.path.exists(entry["ruta"]):
+            return False
+        entry["creado"] = entry["ultimo_acceso"] = time.time()
+        _write_index(directory, index)
+        try:
+            os.utime(entry["ruta"])
+        except OSError:
+            pass
+    return True
+
+
+def get_or_build(key, builder, directory=DIRECTORIO_POR_DEFECTO, max_age_s=None,
+                 suffix="", limit_mb=LIMITE_POR_DEFECTO_MB):
+    """
+    Ruta del objeto en caché para key; lo construye si no existe o está vencido
+
+    Con varias réplicas, solo una ejecuta builder: las demás esperan el bloqueo de la
+    clave y reutilizan el resultado (cualquier entrada creada mientras esperaban
+    se considera vigente aunque max_age_s sea 0)
+
+    Args:
+        key (str): Clave lógica (p. ej. drive-<id>)
+        builder (callable): builder(ruta_temporal) escribe el contenido en esa ruta
+        max_age_s (float): Antigüedad máxima para reutilizar (None = sin vencimiento)
+        suffix (str): Extensión del objeto (.csv, .xlsx) para los lectores
+        limit_mb (float): Tamaño máximo de la caché (desalojo LRU)
+
+    Returns:
+        str: Ruta del objeto (inmutable: nombre derivado de su contenido)
+    """
+    paths = _paths(directory)
+    os.makedirs(paths["objetos"], exist_ok=True)
+    solicitud = time.time()
+
+    with file_lock(os.path.join(paths["bloqueos"], f"{_safe_name(key)}.lock")):
+        entry = lookup(key, directory)
+        if entry and (
+            max_age_s is None
+            or entry["creado"] >= solicitud
+            or solicitud - entry["creado"] <= max_age_s
+        ):
+            _touch(directory, key)
+            return entry["ruta"]
+
+        # Construcción: temporal propio del proceso, luego nombre por contenido
+        tmp_path = os.path.join(paths["objetos"], f".{_safe_name(key)}.{os.getpid()}.tmp")
+        try:
+            builder(tmp_path)
+            sha256 = _sha256(tmp_path)
+            ruta = os.path.join(paths["objetos"], f"{sha256}{suffix}")
+            if os.path.exists(ruta):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, ruta)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        ahora = time.time()
+        with file_lock(paths["bloqueo_indice"]):
+            index = _read_index(directory)
+            index[key] = {
+                "ruta": ruta,
+                "sha256": sha256,
+                "bytes": os.path.getsize(ruta),
+                "creado": ahora,
+                "ultimo_acceso": ahora,
+            }
+            _evict(directory, index, limit_mb, protegida=key)
+            _write_index(directory, index)
+
+    return ruta
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def _evict(directory, index, limit_mb, protegida=None, gracia_s=GRACIA_DESALOJO_S):
+    """
+    Desaloja entradas por último acceso hasta respetar el límite y borra objetos
+    que ya no referencia ninguna entrada (llamar con el bloqueo del índice tomado).
+    Las entradas accedidas y los objetos entregados en los últimos gracia_s segundos
+    se conservan: get_or_build pudo devolver su ruta a otro proceso que aún no la abre
+    """
+    limite = limit_mb * 1e6
+    reciente = time.time() - gracia_s
+
+    def total(idx):
+        return sum(obj["bytes"] for obj in {e["ruta"]: e for e in idx.values()}.values())
+
+    for key in sorted(index, key=lambda k: index[k]["ultimo_acceso"]):
+        if total(index) <= limite:
+            break
+        if key != protegida and index[key]["ultimo_acceso"] < reciente:
+            logger.info(f"Caché en disco: desalojando {key}")
+            del index[key]
+
+    referenciados = {os.path.abspath(e["ruta"]) for e in index.values()}
+    objetos = _paths(directory)["objetos"]
+    for nombre in os.listdir(objetos):
+        path = os.path.abspath(os.path.join(objetos, nombre))
+        if nombre.startswith(".") or path in referenciados:
+            continue
+        try:
+            if os.path.getmtime(path) < reciente:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def cache_stats(directory=DIRECTORIO_POR_DEFECTO):
+    """Resumen de la caché: entradas, objetos y tamaño total"""
+    index = _read_index(directory)
+    objetos = {e["ruta"]: e["bytes"] for e in index.values()}
+    return {
+        "entradas": len(index),
+        "objetos": len(objetos),
+        "mb": sum(objetos.values()) / 1e6,
+    }
+
+
+def _build_test_object(ruta, directorio):
+    """Constructor de la prueba de concurrencia: simula una descarga lenta de 1 MB"""
+    time.sleep(1.0)
+    with open(ruta, "wb") as f:
+        f.write(os.urandom(1024 * 1024))
+    with open(os.path.join(directorio, "construcciones.log"), "a") as log:
+        log.write(f"{os.getpid()}\n")
+
+
+def _request_test_object(directorio):
+    """Una réplica pide la clave de prueba (a nivel de módulo: sirve también con spawn)"""
+    return get_or_build(
+        "prueba", partial(_build_test_object, directorio=directorio), directorio,
+        max_age_s=0, suffix=".bin",
+    )
+
+
+if __name__ == "__main__":
+    import sys
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Prueba de concurrencia: N procesos piden la misma clave a la vez
+    directorio = sys.argv[1] if len(sys.argv) > 1 else "temp/cache_prueba"
+    n_procesos = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    os.makedirs(directorio, exist_ok=True)
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(n_procesos) as pool:
+        rutas = list(pool.map(_request_test_object, [directorio] * n_procesos))
+
+    with open(os.path.join(directorio, "construcciones.log")) as log:
+        construcciones = len(log.read().split())
+
+    print("🔒 CACHÉ EN DISCO COMPARTIDA")
+    print("=" * 50)
+    print(f"{n_procesos} procesos en {time.perf_counter() - inicio:.1f}s")
+    print(f"Construcciones: {construcciones} - rutas distintas: {len(set(rutas))}")
+    print(f"{'✅' if construcciones == 1 and len(set(rutas)) == 1 else '❌'} {cache_stats(directorio)}")
+
+    # Desalojo: con un límite menor que dos objetos, la entrada recién entregada se
+    # conserva dentro del periodo de gracia
+    def escribir(ruta):
+        with open(ruta, "wb") as f:
+            f.write(os.urandom(1024 * 1024))
+
+    get_or_build("otra", escribir, directorio, suffix=".bin", limit_mb=1.5)
+    conservada = lookup("prueba", directorio) is not None and os.path.exists(rutas[0])
+    print(f"{'✅' if conservada else '❌'} Entrada entregada hace < {GRACIA_DESALOJO_S}s conservada al desalojar")
@@ -0,0 +1,296 @@
+"""
+geo_layers.py - Capas geográficas preprocesadas para los mapas del dashboard
+El shapefile municipal se simplifica una sola vez (importancia topológica por vértice)
+en varios niveles de detalle, se reproyecta a WGS84 y cada nivel se guarda como
+GeoJSON compacto (clave MpCodigo) en la caché de disco; cada render solo lee esos
+GeoJSON y elige el nivel más fino que cabe en el presupuesto de la vista. Las capas
+completas en lon/lat (geometría ya reproyectada) también quedan en la caché, como .npz
+"""
+
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_version import file_fingerprint
+from disk_cache import get_or_build
+from geometry_simplify import simplify_geometry, vertex_importance
+from projection import read_prj, to_wgs84
+from shapefile_reader import list_layers, read_dbf, read_geometry, read_shapefile
+
+logger = logging.getLogger(__name__)
+
+CAPA_MUNICIPIOS = "data/geo/municipios_tolima"
+DIRECTORIO_CACHE = "data/cache/geo"
+
+# Niveles de detalle: tolerancia de simplificación en metros, de grueso a fino. Con un
+# mapa de ~550 px el departamento se ve a ~500 m/px, un municipio a ~80 m/px y una
+# vereda a unos pocos metros por píxel
+NIVELES_DETALLE = {
+    "departamento": 250.0,
+    "municipio": 40.0,
+    "vereda": 8.0,
+}
+NIVEL_POR_DEFECTO = "departamento"
+
+# Tamaño máximo de la geometría enviada al navegador en cada vista
+PRESUPUESTO_MAPA_BYTES = 400 * 1024
+
+# Alto del mapa en píxeles (vistas/geographic.py) y metros por grado de latitud
+PIXELES_MAPA = 550
+METROS_POR_GRADO = 111_320
+
+# 5 decimales de grado ≈ 1 m, por debajo de la tolerancia del nivel más fino
+DECIMALES = 5
+
+# Cambia si cambia el formato del GeoJSON generado (invalida la caché)
+VERSION_GEOJSON = 2
+
+
+def _signed_area(anillo):
+    """Área con signo (fórmula del polígono): negativa en anillos horarios"""
+    x, y = anillo[:, 0], anillo[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def record_geometry(coordenadas, anillos, primero, ultimo):
+    """
+    Geometría GeoJSON de un registro: en shapefile los anillos exteriores son horarios
+    y los huecos antihorarios; cada exterior abre un polígono nuevo. Se conserva el
+    sentido horario del exterior, que es el que espera d3-geo (mapas geo de Plotly)
+    """
+    poligonos = []
+    for a in range(primero, ultimo):
+        anillo = coordenadas[anillos[a] : anillos[a + 1]]
+        if _signed_area(anillo) <= 0 or not poligonos:
+            poligonos.append([])
+        poligonos[-1].append(np.round(anillo, DECIMALES).tolist())
+
+    if len(poligonos) == 1:
+        return {"type": "Polygon", "coordinates": poligonos[0]}
+    return {"type": "MultiPolygon", "coordinates": poligonos}
+
+
+def build_municipal_geojson(capa, simple, params):
+    """
+    GeoJSON de municipios a partir de la geometría ya simplificada en metros
+    (coordenadas planas del shapefile), reproyectada a lon/lat
+
+    Returns:
+        dict: FeatureCollection con id = MpCodigo, propiedades MpCodigo, MpNombre y
+        bbox [oeste, sur, este, norte] por municipio
+    """
+    coordenadas = to_wgs84(simple, params)["coordenadas"]
+    atributos = capa["atributos"]
+    registros, anillos = simple["registros"], simple["anillos"]
+    features = []
+    for r in range(len(registros) - 1):
+        if registros[r] == registros[r + 1]:
+            continue
+        codigo = str(atributos["MpCodigo"].iloc[r])
+        puntos = coordenadas[anillos[registros[r]] : anillos[registros[r + 1]]]
+        features.append({
+            "type": "Feature",
+            "id": codigo,
+            "bbox": np.round([*puntos.min(axis=0), *puntos.max(axis=0)], DECIMALES).tolist(),
+            "properties": {"MpCodigo": codigo, "MpNombre": atributos["MpNombre"].iloc[r]},
+            "geometry": record_geometry(coordenadas, anillos, registros[r], registros[r + 1]),
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def geo_version(base_path=CAPA_MUNICIPIOS):
+    """Versión de la capa: huella de .shp/.dbf/.prj y parámetros de preprocesamiento"""
+    return file_fingerprint(
+        *(f"{base_path}.{ext}" for ext in ("shp", "dbf", "prj")),
+        extra=(sorted(NIVELES_DETALLE.items()), DECIMALES, VERSION_GEOJSON),
+    )
+
+
+def municipal_geojson_paths(base_path=CAPA_MUNICIPIOS, directory=DIRECTORIO_CACHE):
+    """
+    Rutas de los GeoJSON por nivel de detalle en caché de disco. Si falta alguno, la
+    importancia de los vértices se calcula una vez y sirve para todos los niveles
+
+    Returns:
+        dict: Nivel -> ruta del GeoJSON
+    """
+    preparado = {}
+
+    def preparar():
+        if not preparado:
+            capa = read_shapefile(base_path)
+            preparado.update(
+                capa=capa, params=read_prj(base_path), importancia=vertex_importance(capa)
+            )
+        return preparado
+
+    version = geo_version(base_path)
+    rutas = {}
+    for nivel, tolerancia in NIVELES_DETALLE.items():
+
+        def construir(tmp_path, nivel=nivel, tolerancia=tolerancia):
+            inicio = time.perf_counter()
+            datos = preparar()
+            simple = simplify_geometry(datos["capa"], tolerancia, datos["importancia"])
+            geojson = build_municipal_geojson(datos["capa"], simple, datos["params"])
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(geojson, f, ensure_ascii=False, separators=(",", ":"))
+            logger.info(
+                f"GeoJSON municipal '{nivel}': {len(datos['capa']['coordenadas']):,} -> "
+                f"{len(simple['coordenadas']):,} vértices (tolerancia {tolerancia:.0f} m) "
+                f"en {time.perf_counter() - inicio:.1f}s"
+            )
+
+        clave = f"geo-municipios-{nivel}-{version}"
+        rutas[nivel] = get_or_build(clave, construir, directory=directory, suffix=".geojson")
+    return rutas
+
+
+def load_municipal_levels(base_path=CAPA_MUNICIPIOS):
+    """GeoJSON municipal de cada nivel de detalle (los construye si no están en caché)"""
+    niveles = {}
+    for nivel, ruta in municipal_geojson_paths(base_path).items():
+        with open(ruta, encoding="utf-8") as f:
+            niveles[nivel] = json.load(f)
+    return niveles
+
+
+def load_municipal_geojson(nivel=NIVEL_POR_DEFECTO, base_path=CAPA_MUNICIPIOS):
+    """GeoJSON municipal de un nivel de detalle, listo para Plotly"""
+    with open(municipal_geojson_paths(base_path)[nivel], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def feature_payloads(geojson):
+    """Bytes serializados de cada municipio (id -> bytes), como se envían al navegador"""
+    return {
+        f["id"]: len(json.dumps(f, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        for f in geojson["features"]
+    }
+
+
+def features_in_view(geojson, codigo=None):
+    """
+    Municipios visibles: todos si no hay municipio seleccionado; si no, los que cruzan
+    la caja envolvente del seleccionado (él y sus vecinos, para dar contexto)
+    """
+    cajas = {f["id"]: f["bbox"] for f in geojson["features"]}
+    if codigo is None or codigo not in cajas:
+        return list(cajas)
+    oeste, sur, este, norte = cajas[codigo]
+    return [
+        c for c, (o, s, e, n) in cajas.items()
+        if o <= este and e >= oeste and s <= norte and n >= sur
+    ]
+
+
+def view_resolution(geojson, codigos, pixeles=PIXELES_MAPA):
+    """Metros por píxel de la vista ajustada a los municipios visibles"""
+    cajas = np.array([f["bbox"] for f in geojson["features"] if f["id"] in set(codigos)])
+    if not len(cajas):
+        return 0.0
+    oeste, sur = cajas[:, :2].min(axis=0)
+    este, norte = cajas[:, 2:].max(axis=0)
+    ancho = (este - oeste) * np.cos(np.radians((sur + norte) / 2))
+    return float(max(ancho, norte - sur) * METROS_POR_GRADO / pixeles)
+
+
+def select_level(pesos, codigos, resolucion=0.0, presupuesto=PRESUPUESTO_MAPA_BYTES):
+    """
+    Nivel de detalle de la vista: se descartan los niveles con tolerancia menor que un
+    octavo de píxel (el detalle extra no se ve ni en pantallas de alta densidad ni al
+    acercar el mapa unas veces) y, de los demás, se toma el más fino cuya geometría
+    para los municipios visibles cabe en el presupuesto (el más grueso si ninguno cabe)
+
+    Args:
+        pesos (dict): Nivel -> {id: bytes}, de feature_payloads
+        codigos: Municipios visibles
+        resolucion (float): Metros por píxel de la vista, de view_resolution
+
+    Returns:
+        tuple: (nivel, bytes de la vista)
+    """
+    niveles = sorted(pesos, key=NIVELES_DETALLE.get)
+    utiles = [n for n in niveles if NIVELES_DETALLE[n] >= resolucion / 8] or niveles[-1:]
+    for nivel in utiles:
+        total = sum(pesos[nivel].get(c, 0) for c in codigos)
+        if total <= presupuesto:
+            return nivel, total
+    nivel = niveles[-1]
+    return nivel, sum(pesos[nivel].get(c, 0) for c in codigos)
+
+
+def load_layer_wgs84(base_path, directory=DIRECTORIO_CACHE):
+    """
+    Capa completa en lon/lat: la geometría reproyectada se guarda una vez por versión
+    de .shp/.shx/.prj en la caché de disco; los atributos se leen del .dbf. Las capas
+    geográficas o sin .shp se devuelven tal como las lee shapefile_reader
+
+    Returns:
+        dict: Misma estructura que read_shapefile
+    """
+    params = read_prj(base_path)
+    if params is None or not os.path.exists(f"{base_path}.shp"):
+        return read_shapefile(base_path)
+
+    def construir(tmp_path):
+        capa = to_wgs84(read_geometry(base_path), params)
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                tipo=np.array(capa["tipo"]),
+                coordenadas=capa["coordenadas"],
+                anillos=capa["anillos"],
+                registros=capa["registros"],
+                bbox=np.asarray(capa["bbox"]),
+            )
+
+    version = file_fingerprint(
+        *(f"{base_path}.{ext}" for ext in ("shp", "shx", "prj")), extra=VERSION_GEOJSON
+    )
+    clave = f"geo-wgs84-{os.path.basename(base_path)}-{version}"
+    ruta = get_or_build(clave, construir, directory=directory, suffix=".npz")
+
+    with np.load(ruta) as datos:
+        capa = {
+            "tipo": str(datos["tipo"]),
+            "coordenadas": datos["coordenadas"],
+            "anillos": datos["anillos"],
+            "registros": datos["registros"],
+            "bbox": tuple(float(v) for v in datos["bbox"]),
+        }
+    capa["atributos"] = read_dbf(base_path) if os.path.exists(f"{base_path}.dbf") else pd.DataFrame()
+    return capa
+
+
+if __name__ == "__main__":
+    # Preprocesamiento: GeoJSON municipal por nivel de detalle y capas completas en lon/lat
+    inicio = time.perf_counter()
+    rutas = municipal_geojson_paths()
+    print(f"GeoJSON por nivel en {time.perf_counter() - inicio:.2f}s "
+          f"(shapefile original: {os.path.getsize(f'{CAPA_MUNICIPIOS}.shp') / 1024:.0f} KB)")
+    niveles = load_municipal_levels()
+    pesos = {nivel: feature_payloads(geojson) for nivel, geojson in niveles.items()}
+    for nivel, ruta in rutas.items():
+        print(f"  {nivel:>12} ({NIVELES_DETALLE[nivel]:>5.0f} m): "
+              f"{os.path.getsize(ruta) / 1024:>6.0f} KB, {len(niveles[nivel]['features'])} municipios")
+
+    # Nivel elegido por vista (escala y presupuesto de PRESUPUESTO_MAPA_BYTES)
+    geojson = niveles[NIVEL_POR_DEFECTO]
+    for codigo in [None] + [f["id"] for f in geojson["features"][:5]]:
+        visibles = features_in_view(geojson, codigo)
+        resolucion = view_resolution(geojson, visibles)
+        nivel, total = select_level(pesos, visibles, resolucion)
+        print(f"  vista {codigo or 'departamento'}: {len(visibles)} municipios, "
+              f"{resolucion:.0f} m/px -> {nivel} ({total / 1024:.0f} KB)")
+
+    for base_path in list_layers():
+        inicio = time.perf_counter()
+        capa = load_layer_wgs84(base_path)
+        vertices = 0 if capa["coordenadas"] is None else len(capa["coordenadas"])
+        print(f"{base_path}: {vertices:,} vértices en lon/lat - "
+              f"{(time.perf_counter() - inicio) * 1000:.1f} ms")
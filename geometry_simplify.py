@@ -0,0 +1,197 @@
+"""
+geometry_simplify.py - Simplificación topológica (Douglas-Peucker) para mapas web
+Opera sobre la estructura de shapefile_reader (coordenadas, inicio de anillos y
+registros). Los anillos se parten en arcos en los nodos donde cambia el conjunto de
+anillos que comparten el vértice, y Douglas-Peucker se corre una sola vez, vectorizado
+sobre todos los arcos, hasta tolerancia cero: cada vértice guarda la tolerancia a la
+que desaparece (su importancia). Cualquier nivel de detalle es entonces un umbral, y
+los bordes compartidos entre municipios se simplifican igual a ambos lados
+"""
+
+import numpy as np
+
+# Vértices mínimos de un anillo cerrado válido (triángulo + cierre)
+MINIMO_VERTICES_ANILLO = 4
+
+
+def _ring_index(anillos):
+    """Anillo al que pertenece cada vértice"""
+    return np.repeat(np.arange(len(anillos) - 1), np.diff(anillos))
+
+
+def topology_nodes(coordenadas, anillos):
+    """
+    Nodos topológicos: vértices donde empieza o termina un borde compartido (cambia el
+    conjunto de anillos que pasan por el vértice respecto al anterior o al siguiente),
+    más el inicio de cada anillo. La marca se decide por coordenada, así que un nodo lo
+    es en todos los anillos que lo comparten
+
+    Returns:
+        tuple: (máscara de nodos por vértice, id de coordenada por vértice)
+    """
+    n = len(coordenadas)
+    _, coordenada = np.unique(coordenadas, axis=0, return_inverse=True)
+    coordenada = coordenada.ravel()
+    n_coordenadas = int(coordenada.max()) + 1 if n else 0
+    anillo = _ring_index(anillos)
+    inicios, finales = anillos[:-1], anillos[1:]
+
+    # El vértice de cierre repite el inicio: no cuenta para la firma
+    abierto = np.ones(n, dtype=bool)
+    abierto[finales[finales > inicios] - 1] = False
+
+    # Firma del conjunto de anillos por coordenada (exacta para hasta 3 anillos)
+    conteo = np.bincount(coordenada[abierto], minlength=n_coordenadas)
+    suma = np.bincount(coordenada[abierto], weights=anillo[abierto], minlength=n_coordenadas)
+    minimo = np.full(n_coordenadas, n, dtype="int64")
+    maximo = np.full(n_coordenadas, -1, dtype="int64")
+    np.minimum.at(minimo, coordenada[abierto], anillo[abierto])
+    np.maximum.at(maximo, coordenada[abierto], anillo[abierto])
+    firma = np.stack([conteo, suma, minimo, maximo], axis=1)[coordenada]
+
+    # Vecinos dentro del anillo cerrado: el anterior del inicio es el último abierto
+    anterior = np.arange(n) - 1
+    validos = finales - inicios >= 2
+    anterior[inicios[validos]] = finales[validos] - 2
+    siguiente = np.minimum(np.arange(n) + 1, n - 1)
+    cambia = (firma != firma[anterior]).any(axis=1) | (firma != firma[siguiente]).any(axis=1)
+
+    nodo_coordenada = np.bincount(coordenada[abierto & cambia], minlength=n_coordenadas) > 0
+    nodo_coordenada[coordenada[inicios[finales > inicios]]] = True
+    return nodo_coordenada[coordenada], coordenada
+
+
+def _segment_distances(puntos, inicio, fin):
+    """Distancia de cada punto a su segmento inicio-fin (filas alineadas)"""
+    direccion = fin - inicio
+    largo2 = np.einsum("ij,ij->i", direccion, direccion)
+    t = np.einsum("ij,ij->i", puntos - inicio, direccion) / np.where(largo2 > 0, largo2, 1)
+    proyeccion = inicio + np.clip(t, 0, 1)[:, None] * direccion
+    return np.hypot(*(puntos - proyeccion).T)
+
+
+def douglas_peucker_importance(puntos, inicios, fines):
+    """
+    Douglas-Peucker vectorizado sobre muchos tramos a la vez: en cada pasada se parte
+    cada tramo activo en su vértice más lejano. La importancia de un vértice es su
+    distancia al partir, acotada por la del vértice que creó su tramo, de modo que
+    conservar "importancia > tolerancia" equivale a Douglas-Peucker con esa tolerancia
+
+    Args:
+        puntos: ndarray (n, 2)
+        inicios, fines: Índices de los extremos de cada tramo (los extremos son fijos)
+
+    Returns:
+        ndarray: Importancia por vértice (inf en los extremos de los tramos)
+    """
+    importancia = np.zeros(len(puntos))
+    inicios, fines = np.asarray(inicios, dtype="int64"), np.asarray(fines, dtype="int64")
+    importancia[inicios] = importancia[fines] = np.inf
+    limites = np.full(len(inicios), np.inf)
+
+    while True:
+        activos = fines - inicios >= 2
+        inicios, fines, limites = inicios[activos], fines[activos], limites[activos]
+        if not len(inicios):
+            return importancia
+
+        interiores = fines - inicios - 1
+        desplazamientos = np.concatenate([[0], np.cumsum(interiores)[:-1]])
+        tramo = np.repeat(np.arange(len(inicios)), interiores)
+        posicion = np.arange(len(tramo))
+        indices = inicios[tramo] + 1 + posicion - desplazamientos[tramo]
+
+        distancias = _segment_distances(
+            puntos[indices], puntos[inicios][tramo], puntos[fines][tramo]
+        )
+        maximos = np.maximum.reduceat(distancias, desplazamientos)
+        # Primer vértice que alcanza el máximo de cada tramo
+        candidatos = np.where(distancias == maximos[tramo], posicion, len(posicion))
+        lejanos = indices[np.minimum.reduceat(candidatos, desplazamientos)]
+
+        importancia[lejanos] = np.minimum(maximos, limites)
+        inicios, fines = np.concatenate([inicios, lejanos]), np.concatenate([lejanos, fines])
+        limites = np.tile(importancia[lejanos], 2)
+
+
+def vertex_importance(geometria):
+    """
+    Importancia topológica por vértice: Douglas-Peucker sobre los arcos entre nodos.
+    Un arco compartido por dos anillos se recorre en sentidos opuestos; la importancia
+    se unifica por coordenada (máximo) para que ambos lados conserven los mismos vértices
+
+    Returns:
+        ndarray: Importancia por vértice, en unidades de las coordenadas (inf en nodos)
+    """
+    coordenadas, anillos = geometria["coordenadas"], geometria["anillos"]
+    if not len(coordenadas):
+        return np.zeros(0)
+    nodos, coordenada = topology_nodes(coordenadas, anillos)
+
+    # Arcos: de cada nodo al siguiente nodo del mismo anillo (el cierre es nodo)
+    posiciones = np.flatnonzero(nodos)
+    mismo_anillo = _ring_index(anillos)[posiciones[:-1]] == _ring_index(anillos)[posiciones[1:]]
+    importancia = douglas_peucker_importance(
+        coordenadas, posiciones[:-1][mismo_anillo], posiciones[1:][mismo_anillo]
+    )
+
+    por_coordenada = np.full(int(coordenada.max()) + 1, -np.inf)
+    np.maximum.at(por_coordenada, coordenada, importancia)
+    return por_coordenada[coordenada]
+
+
+def simplify_geometry(geometria, tolerancia, importancia=None):
+    """
+    Conserva los vértices con importancia mayor que la tolerancia. Se descartan los
+    anillos que colapsan (islas o huecos menores que la tolerancia) salvo el primero de
+    cada registro, que se conserva con cuatro vértices repartidos
+
+    Returns:
+        dict: Misma estructura que la entrada (coordenadas, anillos, registros)
+    """
+    if importancia is None:
+        importancia = vertex_importance(geometria)
+    coordenadas, anillos, registros = (
+        geometria["coordenadas"], geometria["anillos"], geometria["registros"]
+    )
+    n_anillos = len(anillos) - 1
+    anillo = _ring_index(anillos)
+
+    conservar = importancia > tolerancia
+    validos = np.bincount(anillo[conservar], minlength=n_anillos) >= MINIMO_VERTICES_ANILLO
+    primeros = np.zeros(n_anillos, dtype=bool)
+    primeros[registros[:-1][registros[:-1] < registros[1:]]] = True
+    conservar &= validos[anillo]
+
+    for a in np.flatnonzero(~validos & primeros):
+        conservar[anillos[a] : anillos[a + 1]] = False
+        reparto = np.linspace(anillos[a], anillos[a + 1] - 1, MINIMO_VERTICES_ANILLO)
+        conservar[reparto.astype("int64")] = True
+
+    anillos_conservados = validos | primeros
+    vertices = np.bincount(anillo[conservar], minlength=n_anillos)[anillos_conservados]
+    acumulado = np.concatenate([[0], np.cumsum(anillos_conservados)])
+    return {
+        **geometria,
+        "coordenadas": coordenadas[conservar],
+        "anillos": np.concatenate([[0], np.cumsum(vertices)]).astype("int64"),
+        "registros": acumulado[registros].astype("int64"),
+    }
+
+
+def simplify_levels(geometria, tolerancias, importancia=None):
+    """
+    Varios niveles de detalle con una sola pasada de Douglas-Peucker
+
+    Args:
+        tolerancias (dict): Nombre del nivel -> tolerancia, en unidades de las coordenadas
+
+    Returns:
+        dict: Nombre del nivel -> geometría simplificada
+    """
+    if importancia is None:
+        importancia = vertex_importance(geometria)
+    return {
+        nivel: simplify_geometry(geometria, tolerancia, importancia)
+        for nivel, tolerancia in tolerancias.items()
+    }
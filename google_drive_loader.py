@@ -6,15 +6,21 @@ VERSIÓN CORREGIDA - Compatible con la configuración de secretos actual
 import streamlit as st
 import pandas as pd
 import os
-import tempfile
-import requests
+import shutil
 from pathlib import Path
 import logging
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+from instrumentation import instrumented
+from compression import detect_compression
+from input_schema import canonical_columns, read_options
+from disk_cache import DIRECTORIO_POR_DEFECTO, LIMITE_POR_DEFECTO_MB, get_or_build, lookup, revalidate
+
+# El logging se configura en el punto de entrada, no al importar el módulo
 logger = logging.getLogger(__name__)
 
+# Bytes por bloque al escribir una descarga en disco
+TAMANO_BLOQUE_DESCARGA = 1024 * 1024
+
 
 def validate_secrets():
     """
@@ -55,10 +61,37 @@ def validate_secrets():
         return False, f"Error validando secretos: {str(e)}"
 
 
-def download_from_drive(file_id, file_name, target_dir="temp"):
+def _cache_settings():
+    """Configuración de la caché de descargas ([rendimiento] en secretos)"""
+    try:
+        config = dict(st.secrets.get("rendimiento", {}))
+    except Exception:
+        config = {}
+    return {
+        "directory": config.get("ruta_cache_descargas", DIRECTORIO_POR_DEFECTO),
+        "max_age_s": float(config.get("ttl_descargas_s", 300)),
+        "limit_mb": float(config.get("cache_descargas_mb", LIMITE_POR_DEFECTO_MB)),
+    }
+
+
+def _cache_key(file_id):
+    return f"drive-{file_id}"
+
+
+@instrumented()
+def download_from_drive(file_id, file_name, target_dir=None):
     """
     Descarga un archivo específico desde Google Drive usando su ID
+
+    La descarga pasa por la caché en disco compartida: con varias réplicas solo una
+    descarga y las demás reutilizan el archivo (nombre por contenido, nunca a medias)
+
+    Args:
+        target_dir (str): Directorio donde dejar además una copia con file_name (opcional)
     """
+    # Importación diferida: requests solo se necesita al descargar
+    import requests
+
     try:
         if not file_id:
             logger.warning(f"No se proporcionó ID para {file_name}")
@@ -67,25 +100,37 @@ def download_from_drive(file_id, file_name, target_dir="temp"):
         # URL de descarga directa de Google Drive
         download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
 
-        # Crear directorio temporal si no existe
-        temp_dir = Path(target_dir)
-        temp_dir.mkdir(exist_ok=True)
-
-        # Ruta de destino
-        target_path = temp_dir / file_name
-
-        logger.info(f"Descargando {file_name} desde Google Drive...")
-
-        # Realizar la descarga
-        response = requests.get(download_url, timeout=30)
-        response.raise_for_status()
+        def descargar(tmp_path):
+            logger.info(f"Descargando {file_name} desde Google Drive...")
+            # En flujo: una descarga grande (comprimida o no) no se retiene en memoria
+            with requests.get(download_url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for bloque in response.iter_content(chunk_size=TAMANO_BLOQUE_DESCARGA):
+                        f.write(bloque)
+
+        settings = _cache_settings()
+        cached_path = get_or_build(
+            _cache_key(file_id),
+            descargar,
+            directory=settings["directory"],
+            max_age_s=settings["max_age_s"],
+            suffix=Path(file_name).suffix,
+            limit_mb=settings["limit_mb"],
+        )
 
-        # Guardar archivo
-        with open(target_path, "wb") as f:
-            f.write(response.content)
+        if target_dir:
+            # Copia con nombre fijo, reemplazada de forma atómica
+            target_path = Path(target_dir) / file_name
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target_path.with_name(f".{file_name}.{os.getpid()}.tmp")
+            with open(cached_path, "rb") as src, open(tmp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, TAMANO_BLOQUE_DESCARGA)
+            os.replace(tmp_path, target_path)
+            cached_path = str(target_path)
 
-        logger.info(f"Archivo descargado exitosamente: {target_path}")
-        return str(target_path)
+        logger.info(f"Archivo disponible: {cached_path}")
+        return str(cached_path)
 
     except requests.RequestException as e:
         logger.error(f"Error de red descargando {file_name}: {str(e)}")
@@ -95,6 +140,31 @@ def download_from_drive(file_id, file_name, target_dir="temp"):
         return None
 
 
+def cached_download(secret_key):
+    """Última descarga en la caché compartida para un ID de secretos ({"ruta", "creado", ...} o None)"""
+    file_id = st.secrets.get("google_drive", {}).get(secret_key)
+    if not file_id:
+        return None
+    return lookup(_cache_key(file_id), _cache_settings()["directory"])
+
+
+def cached_file_path(secret_key):
+    """Ruta en la caché compartida del último archivo descargado para un ID de secretos"""
+    entry = cached_download(secret_key)
+    return entry["ruta"] if entry else None
+
+
+def revalidate_download(secret_key):
+    """
+    Confirma como vigente la descarga en caché (sus metadatos coinciden con Drive):
+    no se vuelve a descargar hasta que venza de nuevo
+    """
+    file_id = st.secrets.get("google_drive", {}).get(secret_key)
+    if file_id:
+        revalidate(_cache_key(file_id), _cache_settings()["directory"])
+
+
+@instrumented()
 def load_vaccination_data():
     """
     Carga datos históricos de vacunación individual desde Google Drive
@@ -114,10 +184,17 @@ def load_vaccination_data():
             logger.error("No se pudo descargar el archivo de vacunación")
             return pd.DataFrame()
 
-        # Cargar CSV
+        # Cargar CSV (acepta gzip, zstd o zip: se detecta por contenido), solo con
+        # las columnas del esquema de entrada
         df = pd.read_csv(
-            file_path, low_memory=False, encoding="utf-8", on_bad_lines="skip"
+            file_path,
+            low_memory=False,
+            encoding="utf-8",
+            on_bad_lines="skip",
+            compression=detect_compression(file_path),
+            **read_options("vacunacion"),
         )
+        canonical_columns(df, "vacunacion")
 
         logger.info(f"Datos de vacunación cargados: {len(df):,} registros")
 
@@ -141,6 +218,7 @@ def load_vaccination_data():
         return pd.DataFrame()
 
 
+@instrumented()
 def load_barridos_data():
     """
     Carga datos de barridos territoriales desde Google Drive
@@ -166,7 +244,10 @@ def load_barridos_data():
 
         for sheet in sheet_names:
             try:
-                df = pd.read_excel(file_path, sheet_name=sheet)
+                df = pd.read_excel(
+                    file_path, sheet_name=sheet, **read_options("barridos", fechas_como_texto=False)
+                )
+                canonical_columns(df, "barridos")
                 logger.info(
                     f"Datos de barridos cargados desde hoja '{sheet}': {len(df):,} registros"
                 )
@@ -214,6 +295,7 @@ def load_barridos_data():
         return pd.DataFrame()
 
 
+@instrumented()
 def load_population_data():
     """
     Carga datos de población por municipios desde Google Drive (OPCIONAL)
@@ -297,6 +379,7 @@ def load_logo():
         return None
 
 
+@instrumented()
 def load_from_drive(file_type="all"):
     """
     Función principal para cargar datos específicos o todos desde Google Drive
@@ -427,6 +510,8 @@ def get_drive_file_info():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     # Script de prueba para validar configuración
     print("🔍 VALIDADOR DE CONFIGURACIÓN GOOGLE DRIVE")
     print("=" * 50)
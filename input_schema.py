@@ -0,0 +1,229 @@
+"""
+input_schema.py - Registro de columnas de entrada por conjunto de datos
+Declara qué columnas usa cada etapa del pipeline (nombre canónico, alias y tipo);
+los lectores derivan de aquí usecols y dtype, de modo que el costo de lectura
+escala con las columnas que se usan y no con el ancho completo del export
+"""
+
+import re
+import unicodedata
+
+from deduplication import (
+    ALIAS_DOCUMENTO,
+    ALIAS_NOMBRES,
+    ALIAS_SEXO,
+    COLUMNA_DOSIS,
+    COLUMNA_MUNICIPIO,
+    COLUMNA_NACIMIENTO,
+)
+
+TEXTO = "texto"
+FECHA = "fecha"
+NUMERO = "numero"
+
+# Etapas del pipeline que consumen columnas
+ANALISIS = "analisis"
+DEDUPLICACION = "deduplicacion"
+
+# Tipo de lectura por tipo declarado (None: el lector infiere; las fechas se leen
+# como texto y las convierte date_parsing)
+DTYPE_LECTURA = {TEXTO: str, FECHA: str, NUMERO: None}
+
+# Columnas de rango de edad en Resumen.xlsx (mismos patrones que detect_barridos_columns)
+PATRONES_EDAD_BARRIDOS = {
+    "<1": ["< 1", "<1", "MENOR 1", "LACTANTE"],
+    "1-5": ["1-5", "1 A 5", "PREESCOLAR"],
+    "6-10": ["6-10", "6 A 10", "ESCOLAR"],
+    "11-20": ["11-20", "11 A 20", "ADOLESCENTE"],
+    "21-30": ["21-30", "21 A 30"],
+    "31-40": ["31-40", "31 A 40"],
+    "41-50": ["41-50", "41 A 50"],
+    "51-59": ["51-59", "51 A 59"],
+    "60+": ["60+", "60 Y MAS", "MAYOR 60"],
+    "60-69": ["60-69", "60 A 69"],
+    "70+": ["70+", "70 Y MAS", "MAYOR 70"],
+}
+
+ESQUEMAS = {
+    "vacunacion": [
+        {
+            "nombre": COLUMNA_NACIMIENTO,
+            "alias": ["FechaNac", "FecNacimiento"],
+            "tipo": FECHA,
+            "etapas": [ANALISIS, DEDUPLICACION],
+        },
+        {
+            "nombre": COLUMNA_DOSIS,
+            "alias": ["FechaVacunacion", "FechaAplicacion"],
+            "tipo": FECHA,
+            "etapas": [ANALISIS, DEDUPLICACION],
+        },
+        {
+            "nombre": COLUMNA_MUNICIPIO,
+            "alias": ["MunicipioResidencia"],
+            "tipo": TEXTO,
+            # Baja cardinalidad: los lectores que lo soportan la codifican como diccionario
+            "categoria": True,
+            "etapas": [ANALISIS],
+        },
+        {
+            "nombre": ALIAS_DOCUMENTO[0],
+            "alias": ALIAS_DOCUMENTO[1:],
+            "tipo": TEXTO,
+            "etapas": [DEDUPLICACION],
+        },
+        {
+            "nombre": ALIAS_SEXO[0],
+            "alias": ALIAS_SEXO[1:],
+            "tipo": TEXTO,
+            "etapas": [DEDUPLICACION],
+        },
+    ]
+    + [
+        {"nombre": nombre, "alias": [], "tipo": TEXTO, "etapas": [DEDUPLICACION]}
+        for nombre in ALIAS_NOMBRES
+    ],
+    "barridos": [
+        {"nombre": "FECHA", "alias": ["FECHA_BARRIDO"], "tipo": FECHA,
+         "etapas": [ANALISIS, DEDUPLICACION]},
+        {"nombre": "MUNICIPIO", "alias": [], "tipo": TEXTO, "etapas": [ANALISIS, DEDUPLICACION]},
+        {"nombre": "VEREDAS", "alias": ["VEREDA"], "tipo": TEXTO,
+         "etapas": [ANALISIS, DEDUPLICACION]},
+        # Conteos por rango de edad de todas las secciones (TPE, TPVP, TPNVP, TPVB):
+        # se conservan todos y en orden porque la detección es posicional
+        {
+            "contiene": [p for patrones in PATRONES_EDAD_BARRIDOS.values() for p in patrones]
+            + ["60"],
+            "tipo": NUMERO,
+            "etapas": [ANALISIS, DEDUPLICACION],
+        },
+        # Resto de conteos del export: solo definen filas idénticas al deduplicar
+        {"contiene": ["AÑO"], "tipo": NUMERO, "etapas": [DEDUPLICACION]},
+    ]
+    + [
+        {"nombre": nombre, "alias": [], "tipo": NUMERO, "etapas": [DEDUPLICACION]}
+        for nombre in [
+            "Efectivas (E)", "No Efectivas (NE)", "Fallidas (F)", "Casa renuente",
+            "TPE", "TPVP", "TPNVP", "TPVB",
+        ]
+    ],
+}
+
+
+def _normalize_name(name):
+    """Nombre de columna comparable: mayúsculas, sin acentos, espacios ni signos"""
+    text = unicodedata.normalize("NFD", str(name))
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return re.sub(r"[^0-9A-Z]", "", text.upper())
+
+
+def schema_fields(dataset, etapas=None):
+    """Campos del esquema que usan las etapas indicadas (todas si etapas es None)"""
+    campos = ESQUEMAS[dataset]
+    if etapas is None:
+        return list(campos)
+    return [campo for campo in campos if set(campo["etapas"]) & set(etapas)]
+
+
+def _matches(campo, column):
+    """True si la columna del archivo corresponde al campo (nombre, alias o patrón)"""
+    if "contiene" in campo:
+        texto = str(column).upper()
+        return any(patron in texto for patron in campo["contiene"])
+    nombres = [campo["nombre"]] + campo["alias"]
+    return _normalize_name(column) in {_normalize_name(n) for n in nombres}
+
+
+def resolve_fields(columnas, dataset, etapas=None):
+    """
+    Campo del esquema de cada columna del archivo que usan las etapas
+
+    Returns:
+        dict: {columna del archivo: campo}, en el orden del archivo
+    """
+    campos = schema_fields(dataset, etapas)
+    resueltas = {}
+    for column in columnas:
+        campo = next((campo for campo in campos if _matches(campo, column)), None)
+        if campo is not None:
+            resueltas[column] = campo
+    return resueltas
+
+
+def column_selector(dataset, etapas=None):
+    """
+    Filtro de columnas para usecols (read_csv y read_excel aceptan un callable):
+    conserva solo las columnas declaradas por las etapas, en su orden original
+    """
+    campos = schema_fields(dataset, etapas)
+    return lambda column: any(_matches(campo, column) for campo in campos)
+
+
+def read_options(dataset, etapas=None, fechas_como_texto=True):
+    """
+    Argumentos usecols/dtype para el lector del conjunto de datos
+
+    Args:
+        fechas_como_texto (bool): Leer fechas como texto (CSV); en Excel las
+            fechas ya vienen tipadas y se dejan al lector
+
+    Returns:
+        dict: {"usecols": callable, "dtype": tipo único o {columna o alias: tipo}}
+    """
+    lectura = dict(DTYPE_LECTURA)
+    if not fechas_como_texto:
+        lectura[FECHA] = None
+    campos = schema_fields(dataset, etapas)
+
+    # Un único tipo para todas las columnas cubre también alias no declarados
+    distintos = {lectura[campo["tipo"]] for campo in campos}
+    if len(distintos) == 1 and None not in distintos:
+        dtype = distintos.pop()
+    else:
+        dtype = {}
+        for campo in campos:
+            if lectura[campo["tipo"]] is None or "contiene" in campo:
+                continue
+            for nombre in [campo["nombre"]] + campo["alias"]:
+                dtype[nombre] = lectura[campo["tipo"]]
+
+    return {"usecols": column_selector(dataset, etapas), "dtype": dtype}
+
+
+def pipeline_stages(deduplicar=True):
+    """Etapas que consumen un conjunto de datos según la configuración"""
+    return [ANALISIS, DEDUPLICACION] if deduplicar else [ANALISIS]
+
+
+def canonical_columns(df, dataset):
+    """
+    Renombra a su nombre canónico las columnas de análisis leídas con un alias (en el
+    lugar); si varias columnas corresponden al mismo campo se usa la primera. Las de
+    deduplicación conservan su nombre: deduplication resuelve sus propios alias
+
+    Returns:
+        list: Campos de análisis que no se encontraron en el archivo
+    """
+    renombres = {}
+    faltantes = []
+    for campo in schema_fields(dataset, [ANALISIS]):
+        if "nombre" not in campo or campo["nombre"] in df.columns:
+            continue
+        encontrada = next((col for col in df.columns if _matches(campo, col)), None)
+        if encontrada is None or encontrada in renombres:
+            faltantes.append(campo["nombre"])
+        else:
+            renombres[encontrada] = campo["nombre"]
+
+    if renombres:
+        df.rename(columns=renombres, inplace=True)
+    return faltantes
+
+
+def missing_fields(df, dataset):
+    """Campos de análisis ausentes en un DataFrame ya leído (nombres canónicos)"""
+    return [
+        campo["nombre"]
+        for campo in schema_fields(dataset, [ANALISIS])
+        if "nombre" in campo and campo["nombre"] not in df.columns
+    ]
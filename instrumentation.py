@@ -0,0 +1,276 @@
+"""
+instrumentation.py - Medición de rendimiento del dashboard
+Tiempos de importación, marcas de arranque y métricas por etapa del pipeline
+"""
+
+import functools
+import importlib
+import itertools
+import json
+import logging
+import re
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Tiempo de la primera importación de cada módulo en este proceso (segundos)
+IMPORT_TIMES = {}
+
+# Registros de etapas de las últimas ejecuciones (todas las sesiones)
+STAGE_RECORDS = deque(maxlen=1000)
+_records_lock = threading.Lock()
+_run_counter = itertools.count(1)
+
+# Estado por hilo: cada ejecución del script de Streamlit corre en su propio hilo
+_local = threading.local()
+
+# Configuración de la instrumentación
+_config = {"jsonl_path": None, "track_memory": False}
+
+# Módulos que carga el dashboard, para el perfil de arranque en frío
+DASHBOARD_MODULES = [
+    "streamlit",
+    "pandas",
+    "numpy",
+    "plotly.express",
+    "plotly.graph_objects",
+    "requests",
+    "google_drive_loader",
+    "parallel_loader",
+    "sql_backend",
+    "vistas",
+]
+
+
+def configure(jsonl_path=None, track_memory=False):
+    """
+    Configura la instrumentación
+
+    Args:
+        jsonl_path (str): Archivo JSON Lines donde se agregan los registros (opcional)
+        track_memory (bool): Medir memoria pico con tracemalloc (agrega sobrecosto)
+    """
+    _config["jsonl_path"] = jsonl_path
+    _config["track_memory"] = bool(track_memory)
+
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not track_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def timed_import(module_name):
+    """Importa un módulo registrando el tiempo de su primera importación"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    inicio = time.perf_counter()
+    module = importlib.import_module(module_name)
+    IMPORT_TIMES[module_name] = time.perf_counter() - inicio
+
+    return module
+
+
+def start_script_timer():
+    """Inicia una nueva ejecución: reinicia las marcas de arranque y el id de ejecución"""
+    _local.script_start = time.perf_counter()
+    _local.startup_marks = {}
+    _local.run_id = next(_run_counter)
+    _local.stack = []
+
+
+def _state():
+    """Estado del hilo actual (se inicializa si el script no llamó start_script_timer)"""
+    if not hasattr(_local, "run_id"):
+        start_script_timer()
+    return _local
+
+
+def current_run_id():
+    """Id de la ejecución del script en el hilo actual"""
+    return _state().run_id
+
+
+def record_startup_mark(name):
+    """Registra el tiempo transcurrido desde el inicio del script hasta un evento"""
+    state = _state()
+    state.startup_marks[name] = time.perf_counter() - state.script_start
+    return state.startup_marks[name]
+
+
+def get_startup_marks():
+    """Marcas de arranque de la ejecución actual"""
+    return dict(_state().startup_marks)
+
+
+def _count_rows(obj):
+    """Cuenta filas de DataFrames en un objeto (DataFrame, tupla o lista de ellos)"""
+    if hasattr(obj, "shape") and hasattr(obj, "columns"):
+        return int(obj.shape[0])
+    if isinstance(obj, (tuple, list)):
+        counts = [_count_rows(item) for item in obj]
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+@contextmanager
+def measure_stage(name, rows_in=None):
+    """
+    Mide una etapa: tiempo de reloj, tiempo de CPU, filas y memoria pico
+
+    Uso:
+        with measure_stage("edad", rows_in=len(df)) as stage:
+            ...
+            stage["filas_salida"] = len(resultado)
+    """
+    state = _state()
+    track_memory = _config["track_memory"] and tracemalloc.is_tracing()
+
+    frame = {
+        "etapa": name,
+        "ejecucion": state.run_id,
+        "padre": state.stack[-1]["etapa"] if state.stack else None,
+        "inicio": datetime.now().isoformat(timespec="milliseconds"),
+        "filas_entrada": rows_in,
+        "filas_salida": None,
+        "error": None,
+        "_pico_hijos": 0,
+    }
+
+    if track_memory:
+        frame["_memoria_inicial"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    state.stack.append(frame)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+
+    try:
+        yield frame
+    except Exception as e:
+        frame["error"] = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        frame["wall_s"] = time.perf_counter() - wall_start
+        frame["cpu_s"] = time.thread_time() - cpu_start
+        state.stack.pop()
+
+        frame["memoria_pico_mb"] = None
+        if track_memory:
+            # El pico de una etapa incluye el de sus sub-etapas
+            pico_abs = max(tracemalloc.get_traced_memory()[1], frame["_pico_hijos"])
+            frame["memoria_pico_mb"] = (pico_abs - frame["_memoria_inicial"]) / 1e6
+            if state.stack:
+                state.stack[-1]["_pico_hijos"] = max(
+                    state.stack[-1]["_pico_hijos"], pico_abs
+                )
+
+        _store_record(frame)
+
+
+def _store_record(frame):
+    """Guarda el registro en memoria, en el log y opcionalmente en JSON Lines"""
+    record = {key: value for key, value in frame.items() if not key.startswith("_")}
+
+    with _records_lock:
+        STAGE_RECORDS.append(record)
+
+    logger.debug(json.dumps(record, ensure_ascii=False))
+
+    if _config["jsonl_path"]:
+        try:
+            with _records_lock, open(_config["jsonl_path"], "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"No se pudo escribir registro de rendimiento: {str(e)}")
+
+
+def instrumented(name=None):
+    """
+    Decorador que mide una función como etapa del pipeline
+    Las filas de entrada/salida se infieren de los DataFrames recibidos y retornados
+    """
+
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure_stage(stage_name, rows_in=_count_rows(list(args))) as stage:
+                result = func(*args, **kwargs)
+                stage["filas_salida"] = _count_rows(result)
+                return result
+
+        # Conservar .clear() de las funciones cacheadas por Streamlit
+        if hasattr(func, "clear"):
+            wrapper.clear = func.clear
+
+        return wrapper
+
+    return decorator
+
+
+def get_run_records(run_id=None):
+    """Registros de una ejecución (por defecto, la del hilo actual)"""
+    run_id = run_id if run_id is not None else current_run_id()
+    with _records_lock:
+        return [record for record in STAGE_RECORDS if record["ejecucion"] == run_id]
+
+
+def profile_cold_imports(modules=None, python=None):
+    """
+    Mide el costo de importación de cada módulo en un proceso limpio (-X importtime)
+
+    Returns:
+        list: [{"modulo", "propio_ms", "acumulado_ms"}] ordenado por costo acumulado
+    """
+    modules = modules or DASHBOARD_MODULES
+    python = python or sys.executable
+
+    report = []
+    for module_name in modules:
+        # Un proceso por módulo para que ninguno herede importaciones de otro
+        completed = subprocess.run(
+            [python, "-X", "importtime", "-c", f"import {module_name}"],
+            capture_output=True,
+            text=True,
+        )
+
+        propio_us, acumulado_us = 0, 0
+        for line in completed.stderr.splitlines():
+            match = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.*)$", line)
+            if match and match.group(3).strip() == module_name:
+                propio_us, acumulado_us = int(match.group(1)), int(match.group(2))
+
+        report.append(
+            {
+                "modulo": module_name,
+                "propio_ms": propio_us / 1000,
+                "acumulado_ms": acumulado_us / 1000,
+                "error": completed.returncode != 0,
+            }
+        )
+
+    return sorted(report, key=lambda row: row["acumulado_ms"], reverse=True)
+
+
+if __name__ == "__main__":
+    # Perfil de arranque: costo de importación en frío por módulo
+    modules = sys.argv[1:] or DASHBOARD_MODULES
+
+    print("⏱️ PERFIL DE IMPORTACIÓN EN FRÍO")
+    print("=" * 50)
+    for row in profile_cold_imports(modules):
+        status = "❌" if row["error"] else "  "
+        print(
+            f"{status} {row['modulo']:<24} {row['acumulado_ms']:>9.1f} ms "
+            f"(propio {row['propio_ms']:.1f} ms)"
+        )
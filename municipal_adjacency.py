@@ -0,0 +1,223 @@
+"""
+municipal_adjacency.py - Vecindad entre municipios y cobertura suavizada por vecinos
+La adyacencia se calcula una vez por versión de la capa (bordes compartidos, con las
+cajas envolventes como filtro previo) y se guarda en la caché de disco. La cobertura
+suavizada es un Bayes empírico local (Marshall, 1991): cada tasa se contrae hacia la
+de su vecindario según cuánto ruido aporta su población; todas las sumas de vecindario
+salen de un solo producto matriz dispersa (CSR en NumPy) x matriz de columnas
+"""
+
+import logging
+import os
+import time
+
+import numpy as np
+
+from data_version import file_fingerprint
+from disk_cache import get_or_build
+from geo_layers import CAPA_MUNICIPIOS, DIRECTORIO_CACHE
+from shapefile_reader import read_dbf, read_geometry
+from spatial_index import record_bounds
+
+logger = logging.getLogger(__name__)
+
+CAMPO_CODIGO = "MpCodigo"
+
+# Cambia si cambia el formato de la adyacencia guardada (invalida la caché)
+VERSION_ADYACENCIA = 1
+
+
+def _edge_keys(coordenadas, anillos):
+    """
+    Aristas de todos los anillos como claves no dirigidas de pares de coordenadas
+
+    Returns:
+        tuple: (vértice inicial de cada arista, clave, longitud)
+    """
+    _, coordenada = np.unique(coordenadas, axis=0, return_inverse=True)
+    coordenada = coordenada.ravel().astype("int64")
+    siguiente_en_anillo = np.ones(len(coordenadas), dtype=bool)
+    siguiente_en_anillo[anillos[1:] - 1] = False
+    i = np.flatnonzero(siguiente_en_anillo)
+
+    a, b = coordenada[i], coordenada[i + 1]
+    claves = np.minimum(a, b) * (int(coordenada.max()) + 1) + np.maximum(a, b)
+    longitudes = np.hypot(*(coordenadas[i + 1] - coordenadas[i]).T)
+    return i, claves, longitudes
+
+
+def build_adjacency(geometria):
+    """
+    Pares de registros que comparten al menos una arista (vecindad tipo torre). Solo
+    se comparan los pares cuyas cajas envolventes se tocan, y de cada uno solo las
+    aristas dentro de la intersección de ambas cajas
+
+    Returns:
+        tuple: (i, j, longitud del borde compartido) con i < j
+    """
+    coordenadas, anillos, registros = (
+        geometria["coordenadas"], geometria["anillos"], geometria["registros"]
+    )
+    cajas = record_bounds(geometria)
+
+    # Candidatos: cajas que se intersecan (comparación vectorizada de todos los pares)
+    se_tocan = (
+        (cajas[:, None, 0] <= cajas[None, :, 2]) & (cajas[None, :, 0] <= cajas[:, None, 2])
+        & (cajas[:, None, 1] <= cajas[None, :, 3]) & (cajas[None, :, 1] <= cajas[:, None, 3])
+    )
+    candidatos_i, candidatos_j = np.nonzero(np.triu(se_tocan, k=1))
+
+    # Aristas agrupadas por registro (los vértices de un registro son contiguos)
+    inicio, claves, longitudes = _edge_keys(coordenadas, anillos)
+    limites = np.searchsorted(inicio, anillos[registros])
+    x, y = coordenadas[inicio, 0], coordenadas[inicio, 1]
+
+    pares_i, pares_j, compartido = [], [], []
+    for a, b in zip(candidatos_i, candidatos_j):
+        oeste, sur = np.maximum(cajas[a, :2], cajas[b, :2])
+        este, norte = np.minimum(cajas[a, 2:], cajas[b, 2:])
+        seleccion = []
+        for r in (a, b):
+            tramo = slice(limites[r], limites[r + 1])
+            dentro = (x[tramo] >= oeste) & (x[tramo] <= este) & (y[tramo] >= sur) & (y[tramo] <= norte)
+            seleccion.append((claves[tramo][dentro], longitudes[tramo][dentro]))
+        comunes = np.isin(seleccion[0][0], seleccion[1][0])
+        if comunes.any():
+            pares_i.append(a)
+            pares_j.append(b)
+            compartido.append(float(seleccion[0][1][comunes].sum()))
+
+    return (
+        np.asarray(pares_i, dtype="int64"),
+        np.asarray(pares_j, dtype="int64"),
+        np.asarray(compartido, dtype="float64"),
+    )
+
+
+def adjacency_version(base_path=CAPA_MUNICIPIOS):
+    """Versión de la adyacencia: huella de .shp/.shx/.dbf"""
+    return file_fingerprint(
+        *(f"{base_path}.{ext}" for ext in ("shp", "shx", "dbf")), extra=VERSION_ADYACENCIA
+    )
+
+
+def load_municipal_adjacency(base_path=CAPA_MUNICIPIOS, directory=DIRECTORIO_CACHE):
+    """
+    Adyacencia municipal desde la caché de disco (se calcula una vez por versión)
+
+    Returns:
+        dict: codigos (MpCodigo por registro), i, j (pares vecinos, i < j) y longitud del
+        borde compartido en unidades de la capa
+    """
+
+    def construir(tmp_path):
+        inicio = time.perf_counter()
+        i, j, longitud = build_adjacency(read_geometry(base_path))
+        codigos = read_dbf(base_path)[CAMPO_CODIGO].astype(str).to_numpy()
+        with open(tmp_path, "wb") as f:
+            np.savez(f, codigos=codigos.astype("U"), i=i, j=j, longitud=longitud)
+        logger.info(
+            f"Adyacencia municipal: {len(i)} pares vecinos entre {len(codigos)} municipios "
+            f"en {time.perf_counter() - inicio:.2f}s"
+        )
+
+    clave = f"geo-adyacencia-{os.path.basename(base_path)}-{adjacency_version(base_path)}"
+    ruta = get_or_build(clave, construir, directory=directory, suffix=".npz")
+    with np.load(ruta) as datos:
+        return {k: datos[k] for k in ("codigos", "i", "j", "longitud")}
+
+
+def neighborhood_matrix(adyacencia, codigos):
+    """
+    Matriz de vecindario (vecinos + el propio municipio, pesos 1) en formato CSR,
+    con filas y columnas en el orden de codigos. Los códigos sin geometría quedan
+    solo consigo mismos
+
+    Returns:
+        dict: indptr, indices, data (CSR)
+    """
+    posicion = {c: k for k, c in enumerate(codigos)}
+    fila_de_registro = np.array([posicion.get(c, -1) for c in adyacencia["codigos"]], dtype="int64")
+    a, b = fila_de_registro[adyacencia["i"]], fila_de_registro[adyacencia["j"]]
+    validos = (a >= 0) & (b >= 0)
+    propios = np.arange(len(codigos))
+    filas = np.concatenate([a[validos], b[validos], propios])
+    columnas = np.concatenate([b[validos], a[validos], propios])
+
+    orden = np.lexsort((columnas, filas))
+    return {
+        "indptr": np.searchsorted(filas[orden], np.arange(len(codigos) + 1)),
+        "indices": columnas[orden],
+        "data": np.ones(len(orden)),
+    }
+
+
+def sparse_matmul(matriz, valores):
+    """Producto CSR x matriz densa (n, k); toda fila tiene al menos un elemento"""
+    productos = matriz["data"][:, None] * valores[matriz["indices"]]
+    return np.add.reduceat(productos, matriz["indptr"][:-1], axis=0)
+
+
+def empirical_bayes_smoothing(casos, poblacion, matriz):
+    """
+    Tasa suavizada por Bayes empírico local. Para el vecindario V de cada municipio:
+    media m = Σcasos / Σpoblación, varianza s² = Σn(r - m)² / Σn - m / n̄ y peso
+    w = s² / (s² + m / n); la tasa suavizada es w·r + (1 - w)·m. Las cuatro sumas
+    de vecindario salen de un único producto disperso
+
+    Args:
+        casos, poblacion: Arreglos alineados con las filas de la matriz (poblacion > 0)
+
+    Returns:
+        ndarray: Tasa suavizada por municipio (misma escala que casos / poblacion)
+    """
+    casos = np.asarray(casos, dtype="float64")
+    poblacion = np.asarray(poblacion, dtype="float64")
+    tasa = casos / poblacion
+
+    # Σcasos, Σn, Σn·r² y número de municipios del vecindario
+    sumas = sparse_matmul(
+        matriz, np.stack([casos, poblacion, casos * tasa, np.ones_like(tasa)], axis=1)
+    )
+    suma_casos, suma_poblacion, suma_nr2, miembros = sumas.T
+
+    media = suma_casos / suma_poblacion
+    varianza = (suma_nr2 - media * suma_casos) / suma_poblacion - media / (suma_poblacion / miembros)
+    varianza = np.maximum(varianza, 0)
+    peso = np.divide(varianza, varianza + media / poblacion,
+                     out=np.zeros_like(varianza), where=varianza + media / poblacion > 0)
+    return peso * tasa + (1 - peso) * media
+
+
+if __name__ == "__main__":
+    # Adyacencia municipal: tiempos, validación contra el cruce global de aristas
+    inicio = time.perf_counter()
+    geometria = read_geometry(CAPA_MUNICIPIOS)
+    i, j, longitud = build_adjacency(geometria)
+    print(f"Adyacencia con filtro de cajas: {len(i)} pares en {time.perf_counter() - inicio:.2f}s")
+
+    # Referencia sin filtro: aristas repetidas entre registros distintos
+    vertice, claves, _ = _edge_keys(geometria["coordenadas"], geometria["anillos"])
+    fin_registro = geometria["anillos"][geometria["registros"][1:]]
+    registro_arista = np.searchsorted(fin_registro, vertice, side="right")
+    orden = np.argsort(claves, kind="stable")
+    k, r = claves[orden], registro_arista[orden]
+    repetida = k[1:] == k[:-1]
+    referencia = {(min(a, b), max(a, b)) for a, b in zip(r[:-1][repetida], r[1:][repetida]) if a != b}
+    print(f"Igual al cruce global de aristas: {referencia == set(zip(i.tolist(), j.tolist()))}")
+
+    adyacencia = load_municipal_adjacency()
+    codigos = adyacencia["codigos"].tolist()
+    grado = np.bincount(np.concatenate([adyacencia["i"], adyacencia["j"]]), minlength=len(codigos))
+    print(f"Vecinos por municipio: mín {grado.min()}, media {grado.mean():.1f}, máx {grado.max()}")
+
+    # Suavizado: una tasa de prueba con municipios pequeños ruidosos
+    matriz = neighborhood_matrix(adyacencia, codigos)
+    generador = np.random.default_rng(0)
+    poblacion = generador.integers(300, 60_000, size=len(codigos))
+    casos = generador.binomial(poblacion, 0.6)
+    inicio = time.perf_counter()
+    for _ in range(1_000):
+        suavizada = empirical_bayes_smoothing(casos, poblacion, matriz)
+    print(f"Bayes empírico local: {(time.perf_counter() - inicio):.3f} ms por actualización; "
+          f"dispersión de tasas {np.std(casos / poblacion):.4f} -> {np.std(suavizada):.4f}")
@@ -0,0 +1,401 @@
+"""
+parallel_loader.py - Ingesta paralela del registro individual (vacunacion_fa.csv)
+Divide el CSV en fragmentos por límites de línea y los procesa en un pool de procesos
+"""
+
+import io
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from compression import is_compressed
+from date_parsing import parse_date_columns
+from input_schema import canonical_columns, pipeline_stages, read_options
+
+logger = logging.getLogger(__name__)
+
+# Límites de los rangos de edad (mismos criterios que RANGOS_EDAD en app.py)
+LIMITES_RANGOS_EDAD = [0, 1, 6, 11, 21, 31, 41, 51, 60, np.inf]
+ETIQUETAS_RANGOS_EDAD = ["<1", "1-5", "6-10", "11-20", "21-30", "31-40", "41-50", "51-59", "60+"]
+
+COLUMNA_NACIMIENTO = "FechaNacimiento"
+COLUMNA_VACUNACION = "FA UNICA"
+COLUMNA_MUNICIPIO = "NombreMunicipioResidencia"
+
+# Edad al vacunarse: columna derivada al tipar las fechas del registro individual
+COLUMNA_EDAD_VACUNACION = "edad_vacunacion"
+
+
+def split_csv_by_lines(file_path, n_shards):
+    """
+    Divide el archivo en rangos de bytes alineados a saltos de línea
+    Retorna el encabezado y una lista de tuplas (inicio, fin)
+    """
+    file_size = os.path.getsize(file_path)
+
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+
+        if file_size <= data_start:
+            return header, []
+
+        n_shards = max(1, int(n_shards))
+        step = (file_size - data_start) / n_shards
+
+        # Ajustar cada límite al siguiente salto de línea
+        boundaries = [data_start]
+        for i in range(1, n_shards):
+            f.seek(int(data_start + step * i))
+            f.readline()
+            position = min(f.tell(), file_size)
+            if position > boundaries[-1]:
+                boundaries.append(position)
+        boundaries.append(file_size)
+
+    shards = [
+        (start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start
+    ]
+    return header, shards
+
+
+def compute_age_vectorized(birth_dates, reference_date):
+    """Edad cumplida a la fecha de referencia (mismo criterio que calculate_age_robust)"""
+    reference = pd.Timestamp(reference_date)
+    edad = reference.year - birth_dates.dt.year
+
+    # Restar un año si no ha llegado el cumpleaños
+    cumple_pendiente = (birth_dates.dt.month > reference.month) | (
+        (birth_dates.dt.month == reference.month) & (birth_dates.dt.day > reference.day)
+    )
+    edad = edad - cumple_pendiente.astype(int)
+
+    return edad.clip(lower=0)
+
+
+def _yyyymmdd(fechas):
+    """Fecha como número AAAAMMDD (NaN para NaT)"""
+    return fechas.dt.year * 10000 + fechas.dt.month * 100 + fechas.dt.day
+
+
+def compute_vaccination_age_vectorized(birth_dates, vaccination_dates):
+    """
+    Edad cumplida a la fecha de vacunación: (AAAAMMDD vacunación - AAAAMMDD
+    nacimiento) // 10000 son los años completos. No depende de la fecha actual;
+    vacunación anterior al nacimiento o fechas faltantes quedan nulas
+
+    Returns:
+        pd.Series: UInt8 nullable (la edad se acota a 255)
+    """
+    diferencia = (_yyyymmdd(vaccination_dates) - _yyyymmdd(birth_dates)).to_numpy(
+        dtype="float64", na_value=np.nan
+    )
+    edades = np.floor_divide(diferencia, 10000)
+    edades[edades < 0] = np.nan
+    edades = np.minimum(edades, np.iinfo(np.uint8).max)
+    return pd.Series(edades, index=birth_dates.index).astype("UInt8")
+
+
+def add_vaccination_age(df):
+    """Agrega la columna de edad al vacunarse si ambas fechas ya son datetime (en el lugar)"""
+    columnas = [COLUMNA_NACIMIENTO, COLUMNA_VACUNACION]
+    if all(col in df.columns and pd.api.types.is_datetime64_any_dtype(df[col]) for col in columnas):
+        df[COLUMNA_EDAD_VACUNACION] = compute_vaccination_age_vectorized(
+            df[COLUMNA_NACIMIENTO], df[COLUMNA_VACUNACION]
+        )
+    return df
+
+
+def classify_age_vectorized(edades):
+    """Clasifica edades en los rangos oficiales (mismo criterio que classify_age_group_robust)"""
+    rangos = pd.cut(
+        edades, bins=LIMITES_RANGOS_EDAD, right=False, labels=ETIQUETAS_RANGOS_EDAD
+    )
+    return rangos.astype(object)
+
+
+def _parse_shard(args):
+    """
+    Trabajo de un proceso: lee, tipa y pre-agrega un fragmento del CSV
+    """
+    file_path, header, start, end, reference_date, keep_frame, etapas = args
+
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+
+    # Solo las columnas del esquema (el filtro se arma en el proceso: no se serializa)
+    df = pd.read_csv(
+        io.BytesIO(header + chunk),
+        low_memory=False,
+        encoding="utf-8",
+        **read_options("vacunacion", etapas),
+    )
+    canonical_columns(df, "vacunacion")
+
+    # Tipado de fechas (mismo motor que apply_robust_date_conversion)
+    parse_date_columns(df, [COLUMNA_NACIMIENTO, COLUMNA_VACUNACION])
+    add_vaccination_age(df)
+
+    partial = aggregate_frame(df, reference_date)
+    partial["frame"] = df if keep_frame else None
+    return partial
+
+
+def aggregate_frame(df, reference_date):
+    """Conteos por fecha de vacunación: total, rango de edad y municipio"""
+    if COLUMNA_VACUNACION in df.columns:
+        fecha = df[COLUMNA_VACUNACION]
+    else:
+        fecha = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    fecha = fecha.rename("fecha")
+
+    partial = {
+        "filas": len(df),
+        "columnas": list(df.columns),
+        "total_por_fecha": fecha.groupby(fecha, dropna=False).size(),
+        "edad_por_fecha": None,
+        "municipio_por_fecha": None,
+    }
+
+    # Edades y rangos
+    if COLUMNA_NACIMIENTO in df.columns:
+        edades = compute_age_vectorized(df[COLUMNA_NACIMIENTO], reference_date)
+        rangos = classify_age_vectorized(edades).rename("rango_edad")
+        partial["edad_por_fecha"] = rangos.groupby([fecha, rangos], dropna=False).size()
+
+    # Municipios de residencia
+    if COLUMNA_MUNICIPIO in df.columns:
+        municipios = df[COLUMNA_MUNICIPIO].rename("municipio")
+        partial["municipio_por_fecha"] = municipios.groupby(
+            [fecha, municipios], dropna=False
+        ).size()
+
+    return partial
+
+
+def _sum_partial_series(series_list):
+    """Suma conteos parciales con el mismo índice"""
+    series_list = [s for s in series_list if s is not None and len(s) > 0]
+    if not series_list:
+        return pd.Series(dtype="int64")
+
+    combined = pd.concat(series_list)
+    levels = list(range(combined.index.nlevels))
+    return combined.groupby(level=levels, dropna=False).sum()
+
+
+def merge_partials(partials):
+    """Combina los resultados parciales de todos los fragmentos"""
+    columnas = partials[0]["columnas"] if partials else []
+
+    merged = {
+        "filas": sum(p["filas"] for p in partials),
+        "columnas": columnas,
+        "total_por_fecha": _sum_partial_series([p["total_por_fecha"] for p in partials]),
+        "edad_por_fecha": _sum_partial_series([p["edad_por_fecha"] for p in partials])
+        if COLUMNA_NACIMIENTO in columnas
+        else None,
+        "municipio_por_fecha": _sum_partial_series(
+            [p["municipio_por_fecha"] for p in partials]
+        )
+        if COLUMNA_MUNICIPIO in columnas
+        else None,
+    }
+
+    return merged
+
+
+def subtract_aggregates(agregados, parcial):
+    """
+    Descuenta de los agregados los conteos de un subconjunto de filas
+    (p. ej. los registros marcados como duplicados)
+    """
+    result = dict(agregados)
+    result["filas"] = agregados["filas"] - parcial["filas"]
+
+    for key in ["total_por_fecha", "edad_por_fecha", "municipio_por_fecha"]:
+        if agregados.get(key) is None or parcial.get(key) is None or len(parcial[key]) == 0:
+            continue
+        restado = agregados[key].sub(parcial[key], fill_value=0).astype("int64")
+        result[key] = restado[restado > 0]
+
+    return result
+
+
+def ingest_parallel(file_path, workers=None, keep_frame=True, reference_date=None,
+                    deduplicar=True):
+    """
+    Ingesta paralela del CSV individual
+
+    Args:
+        file_path (str): Ruta al vacunacion_fa.csv
+        workers (int): Procesos a usar (por defecto, núcleos disponibles)
+        keep_frame (bool): Si se devuelve también el DataFrame tipado completo
+        reference_date: Fecha de referencia para la edad (por defecto, hoy)
+        deduplicar (bool): Si se leen también las columnas de identidad
+
+    Returns:
+        dict: {"df": DataFrame o None, "agregados": dict, "tiempos": dict}
+    """
+    if is_compressed(file_path):
+        raise ValueError("La ingesta paralela requiere el CSV sin comprimir (lectura por rangos)")
+
+    workers = workers or os.cpu_count() or 1
+    reference_date = pd.Timestamp(reference_date or pd.Timestamp.now().normalize())
+
+    inicio = time.perf_counter()
+    header, shards = split_csv_by_lines(file_path, workers)
+    etapas = pipeline_stages(deduplicar)
+
+    tasks = [
+        (file_path, header, start, end, reference_date, keep_frame, etapas)
+        for start, end in shards
+    ]
+
+    if not tasks:
+        tasks = [
+            (file_path, header, len(header), len(header), reference_date, keep_frame, etapas)
+        ]
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(_parse_shard, tasks))
+    else:
+        partials = [_parse_shard(task) for task in tasks]
+
+    procesado = time.perf_counter()
+
+    df = None
+    if keep_frame:
+        df = pd.concat([p["frame"] for p in partials], ignore_index=True)
+
+    agregados = merge_partials(partials)
+    agregados["fecha_referencia"] = reference_date
+
+    fin = time.perf_counter()
+    logger.info(
+        f"Ingesta paralela: {agregados['filas']:,} registros en {len(tasks)} fragmentos "
+        f"({workers} procesos) - {fin - inicio:.2f}s"
+    )
+
+    return {
+        "df": df,
+        "agregados": agregados,
+        "tiempos": {
+            "procesamiento_s": procesado - inicio,
+            "combinacion_s": fin - procesado,
+            "total_s": fin - inicio,
+            "fragmentos": len(tasks),
+            "workers": workers,
+        },
+    }
+
+
+def _filter_by_cutoff(series, fecha_corte, operation="less"):
+    """Filtra conteos indexados por fecha (primer nivel) según la fecha de corte"""
+    if series is None or fecha_corte is None or len(series) == 0:
+        return series
+
+    fechas = pd.to_datetime(series.index.get_level_values(0))
+    cutoff = pd.Timestamp(fecha_corte)
+
+    if operation == "greater_equal":
+        mask = fechas >= cutoff
+    else:
+        mask = fechas < cutoff
+
+    # NaT nunca cumple la comparación (igual que safe_date_comparison)
+    return series[np.asarray(mask, dtype=bool)]
+
+
+def summarize_individual(agregados, fecha_corte=None):
+    """
+    Genera el mismo resultado que process_individual_pre_barridos_robust
+    a partir de los conteos pre-agregados
+    """
+    total_por_fecha = _filter_by_cutoff(agregados["total_por_fecha"], fecha_corte)
+
+    result = {"total": int(total_por_fecha.sum()), "por_edad": {}, "por_municipio": {}}
+
+    if result["total"] == 0:
+        return result
+
+    edad_por_fecha = _filter_by_cutoff(agregados["edad_por_fecha"], fecha_corte)
+    if edad_por_fecha is not None:
+        age_counts = edad_por_fecha.groupby(level=1).sum()
+        for rango in ETIQUETAS_RANGOS_EDAD:
+            result["por_edad"][rango] = age_counts.get(rango, np.int64(0))
+
+    municipio_por_fecha = _filter_by_cutoff(agregados["municipio_por_fecha"], fecha_corte)
+    if municipio_por_fecha is not None:
+        municipio_counts = municipio_por_fecha.groupby(level=1).sum()
+        municipio_counts = municipio_counts[municipio_counts > 0]
+        municipio_counts = municipio_counts.sort_values(ascending=False, kind="stable")
+        result["por_municipio"] = municipio_counts.to_dict()
+
+    return result
+
+
+def daily_counts(agregados, fecha_corte=None, operation="less"):
+    """Vacunados por día (equivalente a safe_group_by_date sobre FA UNICA)"""
+    total_por_fecha = _filter_by_cutoff(
+        agregados["total_por_fecha"], fecha_corte, operation
+    )
+
+    if total_por_fecha is None or len(total_por_fecha) == 0:
+        return pd.DataFrame(columns=["Fecha", "Count"])
+
+    daily = total_por_fecha[total_por_fecha.index.notna()]
+    daily = daily.groupby(pd.to_datetime(daily.index).normalize()).sum()
+    daily = pd.DataFrame({"Fecha": daily.index, "Count": daily.to_numpy()})
+
+    return daily.sort_values("Fecha").reset_index(drop=True)
+
+
+def _serial_reference(app, file_path, fecha_corte):
+    """Ruta serial del dashboard (módulo app ya importado), referencia del benchmark"""
+    df = app.apply_robust_date_conversion(app.read_individual_csv(file_path))
+    return df, app.process_individual_pre_barridos_robust(df, fecha_corte)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Benchmark: ruta serial vs ingesta paralela por número de núcleos
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "data/vacunacion_fa.csv"
+    fecha_corte = pd.Timestamp(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print("⚡ BENCHMARK INGESTA PARALELA")
+    print("=" * 50)
+    print(f"Archivo: {file_path} ({os.path.getsize(file_path) / 1e6:,.1f} MB)")
+
+    # La importación de app (streamlit, vistas) queda fuera del tiempo medido
+    import app
+
+    inicio = time.perf_counter()
+    df_serial, resultado_serial = _serial_reference(app, file_path, fecha_corte)
+    tiempo_serial = time.perf_counter() - inicio
+    print(f"Serial: {tiempo_serial:.2f}s ({len(df_serial):,} registros)")
+
+    cores = os.cpu_count() or 1
+    workers_list = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1))) or [1]
+
+    for workers in workers_list:
+        inicio = time.perf_counter()
+        ingesta = ingest_parallel(file_path, workers=workers)
+        resultado = summarize_individual(ingesta["agregados"], fecha_corte)
+        tiempo = time.perf_counter() - inicio
+
+        # Solo las claves que produce summarize_individual (la ruta serial agrega el
+        # histograma de edades)
+        iguales = all(resultado[k] == resultado_serial[k] for k in resultado)
+        iguales = iguales and ingesta["df"].equals(df_serial)
+        print(
+            f"{workers} procesos: {tiempo:.2f}s - aceleración x{tiempo_serial / tiempo:.2f} "
+            f"- {'✅ idéntico' if iguales else '❌ difiere'}"
+        )
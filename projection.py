@@ -0,0 +1,283 @@
+"""
+projection.py - Transformación de coordenadas planas a WGS84 (lon/lat) en NumPy
+Transversa de Mercator directa e inversa (series de Snyder, USGS 1987) sobre
+arreglos completos, sin bibliotecas de proyección. Los parámetros salen del .prj
+de cada capa: solo se transforman las capas proyectadas
+"""
+
+import re
+
+import numpy as np
+
+# MAGNA-SIRGAS 2018 / Origen-Nacional (parámetros del .prj de data/geo; GRS80).
+# MAGNA-SIRGAS y WGS84 coinciden a nivel submétrico: no se aplica cambio de datum
+ORIGEN_NACIONAL = {
+    "semieje_mayor": 6378137.0,
+    "aplanamiento_inverso": 298.257222101,
+    "meridiano_central": -73.0,
+    "latitud_origen": 4.0,
+    "factor_escala": 0.9992,
+    "falso_este": 5_000_000.0,
+    "falso_norte": 2_000_000.0,
+}
+
+
+# Puntos de control EPSG:9377 -> WGS84 calculados con PROJ 9.5 (este, norte, lon, lat):
+# origen, esquinas de data/geo/municipios_tolima y puntos hasta 4° del meridiano central
+PUNTOS_REFERENCIA = [
+    (5000000.0000, 2000000.0000, -73.000000000, 4.000000000),
+    (4654882.1794, 1875659.7147, -76.105076330, 2.870403460),
+    (4836359.4369, 2146077.8181, -74.477345999, 5.320281996),
+    (4729000.0000, 2046000.0000, -75.442840778, 4.412296190),
+    (4700000.0000, 1950000.0000, -75.701235058, 3.543514829),
+    (4550000.0000, 2300000.0000, -77.069917488, 6.698146231),
+    (5400000.0000, 1500000.0000, -69.406086916, -0.524362247),
+]
+
+# Nombres de PARAMETER en el WKT (ESRI) a claves de los parámetros
+PARAMETROS_WKT = {
+    "false_easting": "falso_este",
+    "false_northing": "falso_norte",
+    "central_meridian": "meridiano_central",
+    "scale_factor": "factor_escala",
+    "latitude_of_origin": "latitud_origen",
+}
+
+
+def parse_prj(wkt):
+    """
+    Parámetros de proyección de un WKT de .prj
+
+    Returns:
+        dict | None: Parámetros de Transversa de Mercator (mismas claves que
+            ORIGEN_NACIONAL); None si la capa es geográfica (ya está en lon/lat)
+
+    Raises:
+        ValueError: Si la proyección no es Transversa de Mercator o faltan parámetros
+    """
+    if not wkt.lstrip().upper().startswith("PROJCS"):
+        return None
+
+    proyeccion = re.search(r'PROJECTION\["([^"]+)"\]', wkt)
+    if not proyeccion or proyeccion.group(1).lower() != "transverse_mercator":
+        nombre = proyeccion.group(1) if proyeccion else "desconocida"
+        raise ValueError(f"Proyección no soportada: {nombre}")
+
+    elipsoide = re.search(r'SPHEROID\["[^"]*",\s*([0-9.eE+-]+),\s*([0-9.eE+-]+)', wkt)
+    params = {}
+    if elipsoide:
+        params["semieje_mayor"] = float(elipsoide.group(1))
+        params["aplanamiento_inverso"] = float(elipsoide.group(2))
+    for nombre, valor in re.findall(r'PARAMETER\["([^"]+)",\s*([0-9.eE+-]+)\]', wkt):
+        if nombre.lower() in PARAMETROS_WKT:
+            params[PARAMETROS_WKT[nombre.lower()]] = float(valor)
+
+    faltantes = set(ORIGEN_NACIONAL) - set(params)
+    if faltantes:
+        raise ValueError(f"Parámetros faltantes en el .prj: {', '.join(sorted(faltantes))}")
+    return params
+
+
+def read_prj(base_path):
+    """Parámetros del .prj de la capa (None si es geográfica o no tiene .prj)"""
+    try:
+        with open(f"{base_path}.prj", encoding="utf-8", errors="replace") as f:
+            return parse_prj(f.read())
+    except OSError:
+        return None
+
+
+def _meridian_arc(phi, a, e2):
+    """Longitud del arco de meridiano desde el ecuador hasta la latitud phi (radianes)"""
+    e4, e6 = e2 * e2, e2 * e2 * e2
+    return a * (
+        (1 - e2 / 4 - 3 * e4 / 64 - 5 * e6 / 256) * phi
+        - (3 * e2 / 8 + 3 * e4 / 32 + 45 * e6 / 1024) * np.sin(2 * phi)
+        + (15 * e4 / 256 + 45 * e6 / 1024) * np.sin(4 * phi)
+        - (35 * e6 / 3072) * np.sin(6 * phi)
+    )
+
+
+def transverse_mercator(lon, lat, params=ORIGEN_NACIONAL):
+    """
+    Longitud y latitud en grados a coordenadas planas (metros)
+
+    Returns:
+        tuple: (este, norte) como ndarray float64
+    """
+    a = params["semieje_mayor"]
+    f = 1 / params["aplanamiento_inverso"]
+    k0 = params["factor_escala"]
+    e2 = f * (2 - f)
+    ep2 = e2 / (1 - e2)
+
+    phi = np.radians(np.asarray(lat, dtype="float64"))
+    lam = np.radians(np.asarray(lon, dtype="float64"))
+    sen, cos, tan = np.sin(phi), np.cos(phi), np.tan(phi)
+    n = a / np.sqrt(1 - e2 * sen**2)
+    t = tan**2
+    c = ep2 * cos**2
+    dl = cos * (lam - np.radians(params["meridiano_central"]))
+
+    arco = _meridian_arc(phi, a, e2) - _meridian_arc(np.radians(params["latitud_origen"]), a, e2)
+    este = k0 * n * (
+        dl
+        + (1 - t + c) * dl**3 / 6
+        + (5 - 18 * t + t**2 + 72 * c - 58 * ep2) * dl**5 / 120
+    )
+    norte = k0 * (
+        arco
+        + n * tan * (
+            dl**2 / 2
+            + (5 - t + 9 * c + 4 * c**2) * dl**4 / 24
+            + (61 - 58 * t + t**2 + 600 * c - 330 * ep2) * dl**6 / 720
+        )
+    )
+    return este + params["falso_este"], norte + params["falso_norte"]
+
+
+def inverse_transverse_mercator(x, y, params=ORIGEN_NACIONAL):
+    """
+    Coordenadas planas (metros) a longitud y latitud en grados
+
+    Args:
+        x, y: Arreglos (o escalares) de este y norte
+
+    Returns:
+        tuple: (longitud, latitud) como ndarray float64
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+
+    a = params["semieje_mayor"]
+    f = 1 / params["aplanamiento_inverso"]
+    k0 = params["factor_escala"]
+    e2 = f * (2 - f)
+    ep2 = e2 / (1 - e2)
+    lon0 = np.radians(params["meridiano_central"])
+    lat0 = np.radians(params["latitud_origen"])
+
+    # Latitud del pie de la perpendicular: serie de senos de 2·mu evaluada con la
+    # recurrencia de Clenshaw (un seno y un coseno en vez de cuatro senos)
+    arco = _meridian_arc(lat0, a, e2) + (y - params["falso_norte"]) / k0
+    mu = arco / (a * (1 - e2 / 4 - 3 * e2**2 / 64 - 5 * e2**3 / 256))
+    e1 = (1 - np.sqrt(1 - e2)) / (1 + np.sqrt(1 - e2))
+    coeficientes = [
+        3 * e1 / 2 - 27 * e1**3 / 32,
+        21 * e1**2 / 16 - 55 * e1**4 / 32,
+        151 * e1**3 / 96,
+        1097 * e1**4 / 512,
+    ]
+    dos_cos = 2 * np.cos(2 * mu)
+    siguiente, actual = 0.0, 0.0
+    for coeficiente in reversed(coeficientes):
+        siguiente, actual = actual, coeficiente + dos_cos * actual - siguiente
+    phi1 = mu + actual * np.sin(2 * mu)
+
+    sen1, cos1 = np.sin(phi1), np.cos(phi1)
+    tan1 = sen1 / cos1
+    w = 1 - e2 * sen1 * sen1
+    c1 = ep2 * cos1 * cos1
+    t1 = tan1 * tan1
+    n1 = a / np.sqrt(w)
+    d = (x - params["falso_este"]) / (n1 * k0)
+    d2 = d * d
+
+    # n1 / r1 = w / (1 - e2)
+    latitud = phi1 - (tan1 * w / (1 - e2)) * d2 * (
+        1 / 2
+        - (5 + 3 * t1 + 10 * c1 - 4 * c1 * c1 - 9 * ep2) * d2 / 24
+        + (61 + 90 * t1 + 298 * c1 + 45 * t1 * t1 - 252 * ep2 - 3 * c1 * c1) * d2 * d2 / 720
+    )
+    longitud = lon0 + d * (
+        1
+        - (1 + 2 * t1 + c1) * d2 / 6
+        + (5 - 2 * c1 + 28 * t1 - 3 * c1 * c1 + 8 * ep2 + 24 * t1 * t1) * d2 * d2 / 120
+    ) / cos1
+
+    return np.degrees(longitud), np.degrees(latitud)
+
+
+def to_wgs84(capa, params):
+    """
+    Capa de shapefile_reader con coordenadas en lon/lat: una sola llamada vectorizada
+    para todos los vértices. Con params None (capa geográfica) se devuelve sin cambios
+
+    Returns:
+        dict: Misma estructura, con "coordenadas" y "bbox" en grados
+    """
+    if params is None or capa.get("coordenadas") is None:
+        return capa
+    lon, lat = inverse_transverse_mercator(capa["coordenadas"][:, 0], capa["coordenadas"][:, 1], params)
+    coordenadas = np.column_stack([lon, lat])
+    bbox = (
+        tuple(float(v) for v in (*coordenadas.min(axis=0), *coordenadas.max(axis=0)))
+        if len(coordenadas) else capa["bbox"]
+    )
+    return {**capa, "coordenadas": coordenadas, "bbox": bbox}
+
+
+def _angular_error_m(lon_a, lat_a, lon_b, lat_b, params):
+    """Distancia en metros entre dos posiciones cercanas (radios de curvatura locales)"""
+    a = params["semieje_mayor"]
+    f = 1 / params["aplanamiento_inverso"]
+    e2 = f * (2 - f)
+    sen2 = np.sin(np.radians(lat_b)) ** 2
+    normal = a / np.sqrt(1 - e2 * sen2)
+    meridiano = a * (1 - e2) / (1 - e2 * sen2) ** 1.5
+    return np.hypot(
+        np.radians(lon_a - lon_b) * normal * np.cos(np.radians(lat_b)),
+        np.radians(lat_a - lat_b) * meridiano,
+    )
+
+
+def accuracy_report(params=ORIGEN_NACIONAL, puntos=PUNTOS_REFERENCIA):
+    """
+    Error máximo, en metros, contra los puntos de control (inversa y directa) y de ida
+    y vuelta (inversa seguida de directa)
+    """
+    este, norte, lon, lat = np.asarray(puntos, dtype="float64").T
+
+    lon_calc, lat_calc = inverse_transverse_mercator(este, norte, params)
+    este_calc, norte_calc = transverse_mercator(lon, lat, params)
+    este_vuelta, norte_vuelta = transverse_mercator(lon_calc, lat_calc, params)
+    return {
+        "inversa_m": float(np.max(_angular_error_m(lon_calc, lat_calc, lon, lat, params))),
+        "directa_m": float(np.max(np.hypot(este_calc - este, norte_calc - norte))),
+        "ida_vuelta_m": float(np.max(np.hypot(este_vuelta - este, norte_vuelta - norte))),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from shapefile_reader import list_layers, read_shapefile
+
+    # Exactitud contra PROJ y velocidad de reproyectar las capas de data/geo
+    directorio = sys.argv[1] if len(sys.argv) > 1 else "data/geo"
+    print("🌐 TRANSVERSA DE MERCATOR (MAGNA-SIRGAS Origen-Nacional -> WGS84)")
+    print("=" * 50)
+    reporte = accuracy_report()
+    print(
+        f"Puntos de control: inversa {reporte['inversa_m'] * 1000:.2f} mm, "
+        f"directa {reporte['directa_m'] * 1000:.2f} mm, "
+        f"ida y vuelta {reporte['ida_vuelta_m'] * 1000:.3f} mm"
+    )
+
+    for base_path in list_layers(directorio):
+        capa = read_shapefile(base_path)
+        params = read_prj(base_path)
+        if capa["coordenadas"] is None:
+            continue
+        if params is None:
+            print(f"{base_path}: geográfica, sin transformar")
+            continue
+        inicio = time.perf_counter()
+        capa = to_wgs84(capa, params)
+        duracion = time.perf_counter() - inicio
+        print(
+            f"{base_path}: {len(capa['coordenadas']):,} vértices en {duracion * 1000:.1f} ms "
+            f"({len(capa['coordenadas']) / duracion / 1e6:.1f} M/s), bbox "
+            + ", ".join(f"{v:.4f}" for v in capa["bbox"])
+        )
@@ -0,0 +1,278 @@
+"""
+shapefile_reader.py - Lectura de shapefiles (.shp/.shx/.dbf) sin dependencias GIS
+Los archivos se abren con memory-map: los desplazamientos de cada registro salen
+del .shx y los encabezados se leen vectorizados; las geometrías quedan en arreglos
+de NumPy (coordenadas (N, 2), inicio de cada anillo o parte y primera parte de cada
+registro) sin objetos de Python por vértice. Los atributos del .dbf se decodifican
+por columna con la codificación declarada en el .cpg
+"""
+
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CODIGO_ARCHIVO = 9994
+TAMANO_ENCABEZADO = 100
+
+# Tipos de geometría (Z y M se leen solo en x, y)
+PUNTO = "Point"
+MULTIPUNTO = "MultiPoint"
+LINEA = "PolyLine"
+POLIGONO = "Polygon"
+TIPOS_GEOMETRIA = {
+    1: PUNTO, 11: PUNTO, 21: PUNTO,
+    8: MULTIPUNTO, 18: MULTIPUNTO, 28: MULTIPUNTO,
+    3: LINEA, 13: LINEA, 23: LINEA,
+    5: POLIGONO, 15: POLIGONO, 25: POLIGONO,
+}
+
+# Nombres del .cpg (ArcGIS, QGIS) a códecs de Python; sin .cpg se asume Latin-1
+CODIFICACIONES_CPG = {
+    "UTF8": "utf-8", "UTF-8": "utf-8", "65001": "utf-8",
+    "1252": "cp1252", "ANSI 1252": "cp1252", "WINDOWS-1252": "cp1252",
+    "88591": "latin-1", "8859_1": "latin-1", "ISO-8859-1": "latin-1", "ISO88591": "latin-1",
+}
+CODIFICACION_POR_DEFECTO = "latin-1"
+
+
+def _mapped(path):
+    """Archivo como arreglo de bytes con memory-map de solo lectura (None si está vacío)"""
+    if os.path.getsize(path) == 0:
+        return None
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def _gather(buffer, posiciones, dtype):
+    """Lee un valor de tipo dtype en cada posición de bytes (vectorizado, sin alinear)"""
+    tipo = np.dtype(dtype)
+    indices = np.asarray(posiciones, dtype="int64")[:, None] + np.arange(tipo.itemsize)
+    return buffer[indices].copy().view(tipo).ravel()
+
+
+def read_cpg(base_path):
+    """Códec de Python según el .cpg de la capa (Latin-1 si no existe o no se reconoce)"""
+    try:
+        with open(f"{base_path}.cpg", encoding="ascii", errors="ignore") as f:
+            declarada = f.read().strip().upper()
+    except OSError:
+        return CODIFICACION_POR_DEFECTO
+    return CODIFICACIONES_CPG.get(declarada, CODIFICACION_POR_DEFECTO)
+
+
+def _record_offsets(base_path, buffer):
+    """
+    Desplazamiento y largo (bytes, sin encabezado de registro) de cada registro: del
+    .shx si existe; si no, recorriendo los encabezados del .shp
+    """
+    shx_path = f"{base_path}.shx"
+    if os.path.exists(shx_path):
+        indice = _mapped(shx_path)[TAMANO_ENCABEZADO:].view(">i4").reshape(-1, 2)
+        return indice[:, 0].astype("int64") * 2, indice[:, 1].astype("int64") * 2
+
+    desplazamientos, largos = [], []
+    posicion = TAMANO_ENCABEZADO
+    while posicion + 8 <= len(buffer):
+        largo = int(_gather(buffer, [posicion + 4], ">i4")[0]) * 2
+        desplazamientos.append(posicion)
+        largos.append(largo)
+        posicion += 8 + largo
+    return np.asarray(desplazamientos, dtype="int64"), np.asarray(largos, dtype="int64")
+
+
+def read_geometry(base_path):
+    """
+    Geometrías del .shp como arreglos de NumPy
+
+    Returns:
+        dict: {"tipo": Point | MultiPoint | PolyLine | Polygon,
+               "coordenadas": float64 (N, 2),
+               "anillos": inicio de cada parte en coordenadas (+ N al final),
+               "registros": primera parte de cada registro (+ total al final),
+               "bbox": (xmin, ymin, xmax, ymax)}
+               En puntos cada registro es una parte de un vértice; las formas nulas
+               son registros sin partes
+
+    Raises:
+        ValueError: Si el archivo no es un shapefile o su tipo no está soportado
+    """
+    buffer = _mapped(f"{base_path}.shp")
+    if buffer is None or len(buffer) < TAMANO_ENCABEZADO:
+        raise ValueError(f"{base_path}.shp está vacío o incompleto")
+
+    codigo = int(_gather(buffer, [0], ">i4")[0])
+    tipo_archivo = int(_gather(buffer, [32], "<i4")[0])
+    if codigo != CODIGO_ARCHIVO or tipo_archivo not in TIPOS_GEOMETRIA:
+        raise ValueError(f"{base_path}.shp no es un shapefile soportado (tipo {tipo_archivo})")
+    tipo = TIPOS_GEOMETRIA[tipo_archivo]
+    bbox = tuple(float(v) for v in _gather(buffer, [36, 44, 52, 60], "<f8"))
+
+    desplazamientos, _ = _record_offsets(base_path, buffer)
+    contenido = desplazamientos + 8
+    nulos = _gather(buffer, contenido, "<i4") == 0
+
+    if tipo == PUNTO:
+        # Un vértice por registro, justo después del tipo: lectura en bloque
+        validos = contenido[~nulos]
+        coordenadas = np.column_stack([
+            _gather(buffer, validos + 4, "<f8"), _gather(buffer, validos + 12, "<f8")
+        ])
+        registros = np.concatenate([[0], np.cumsum(~nulos)]).astype("int64")
+        anillos = np.arange(len(coordenadas) + 1, dtype="int64")
+        return {"tipo": tipo, "coordenadas": coordenadas, "anillos": anillos,
+                "registros": registros, "bbox": bbox}
+
+    # Multipunto: [bbox, n_puntos, puntos]; línea y polígono: [bbox, n_partes,
+    # n_puntos, partes, puntos]. Las formas nulas solo tienen el tipo (4 bytes): sus
+    # conteos no se leen
+    validos = contenido[~nulos]
+    n_partes = np.zeros(len(contenido), dtype="int64")
+    n_puntos = np.zeros(len(contenido), dtype="int64")
+    if tipo == MULTIPUNTO:
+        n_puntos[~nulos] = _gather(buffer, validos + 36, "<i4")
+        inicio_puntos = contenido + 40
+    else:
+        n_partes[~nulos] = _gather(buffer, validos + 36, "<i4")
+        n_puntos[~nulos] = _gather(buffer, validos + 40, "<i4")
+        inicio_puntos = contenido + 44 + 4 * n_partes
+
+    # Cada registro es un bloque contiguo del mapa: se copia una sola vez al arreglo final
+    total = int(n_puntos.sum())
+    coordenadas = np.empty((total, 2), dtype="float64")
+    inicio_vertices = np.concatenate([[0], np.cumsum(n_puntos)])
+    partes = []
+    for r in np.flatnonzero(n_puntos):
+        desde = int(inicio_puntos[r])
+        coordenadas[inicio_vertices[r] : inicio_vertices[r + 1]] = (
+            buffer[desde : desde + 16 * int(n_puntos[r])].view("<f8").reshape(-1, 2)
+        )
+        if tipo != MULTIPUNTO:
+            desde = int(contenido[r]) + 44
+            partes.append(buffer[desde : desde + 4 * int(n_partes[r])].view("<i4") + inicio_vertices[r])
+
+    if tipo == MULTIPUNTO:
+        # Cada punto es una parte
+        n_partes = n_puntos
+        anillos = np.arange(total + 1, dtype="int64")
+    else:
+        anillos = np.concatenate(partes + [[total]]).astype("int64")
+    registros = np.concatenate([[0], np.cumsum(n_partes)]).astype("int64")
+
+    return {"tipo": tipo, "coordenadas": coordenadas, "anillos": anillos,
+            "registros": registros, "bbox": bbox}
+
+
+def read_dbf(base_path, encoding=None):
+    """
+    Atributos del .dbf (dBase III/IV) decodificados por columna
+
+    Texto sin espacios de relleno (vacío como nulo), numéricos como float, fechas
+    como datetime y lógicos como booleanos; se omiten los registros borrados
+
+    Args:
+        encoding (str): Códec; por defecto el declarado en el .cpg
+    """
+    encoding = encoding or read_cpg(base_path)
+    buffer = _mapped(f"{base_path}.dbf")
+    n_registros = int(_gather(buffer, [4], "<u4")[0])
+    largo_encabezado, largo_registro = (int(v) for v in _gather(buffer, [8, 10], "<u2"))
+
+    campos = []
+    posicion = 1  # el primer byte de cada registro marca si está borrado
+    for inicio in range(32, largo_encabezado - 1, 32):
+        if buffer[inicio] == 0x0D:
+            break
+        nombre = bytes(buffer[inicio : inicio + 11]).split(b"\0")[0].decode("ascii")
+        ancho = int(buffer[inicio + 16])
+        campos.append((nombre, chr(buffer[inicio + 11]), posicion, ancho))
+        posicion += ancho
+
+    tabla = buffer[largo_encabezado : largo_encabezado + n_registros * largo_registro]
+    tabla = tabla.reshape(-1, largo_registro)
+    vigentes = tabla[:, 0] != ord("*")
+
+    atributos = {}
+    for nombre, tipo, desde, ancho in campos:
+        # Columna como bytes de ancho fijo; se decodifican solo los valores distintos
+        celdas = np.ascontiguousarray(tabla[vigentes, desde : desde + ancho]).view(f"S{ancho}").ravel()
+        distintos, posiciones = np.unique(celdas, return_inverse=True)
+        decodificados = np.array(
+            [valor.decode(encoding, errors="replace").strip() for valor in distintos], dtype=object
+        )
+        texto = pd.Series(decodificados[posiciones.ravel()], dtype=object)
+        if tipo in ("N", "F"):
+            atributos[nombre] = pd.to_numeric(texto, errors="coerce")
+        elif tipo == "D":
+            atributos[nombre] = pd.to_datetime(texto, format="%Y%m%d", errors="coerce")
+        elif tipo == "L":
+            atributos[nombre] = texto.str.upper().map(
+                {"T": True, "Y": True, "F": False, "N": False}
+            )
+        else:
+            atributos[nombre] = texto.replace("", None).astype("str")
+
+    return pd.DataFrame(atributos)
+
+
+def read_shapefile(base_path, encoding=None):
+    """
+    Capa completa: geometría (.shp/.shx) y atributos (.dbf)
+
+    Si falta el .shp (p. ej. veredas_tolima solo trae .dbf/.shx) la capa queda solo
+    con atributos: tipo y coordenadas en None
+
+    Args:
+        base_path (str): Ruta sin extensión (data/geo/municipios_tolima)
+
+    Returns:
+        dict: Claves de read_geometry más "atributos" (DataFrame, una fila por registro)
+    """
+    if os.path.exists(f"{base_path}.shp"):
+        capa = read_geometry(base_path)
+    else:
+        logger.info(f"{base_path}.shp no existe: se cargan solo los atributos")
+        capa = {"tipo": None, "coordenadas": None, "anillos": None, "registros": None, "bbox": None}
+
+    dbf_path = f"{base_path}.dbf"
+    capa["atributos"] = read_dbf(base_path, encoding) if os.path.exists(dbf_path) else pd.DataFrame()
+    return capa
+
+
+def list_layers(directory="data/geo"):
+    """Capas del directorio (ruta sin extensión) con .shp o .dbf"""
+    nombres = {
+        os.path.splitext(nombre)[0]
+        for nombre in os.listdir(directory)
+        if nombre.lower().endswith((".shp", ".dbf"))
+    }
+    return [os.path.join(directory, nombre) for nombre in sorted(nombres)]
+
+
+if __name__ == "__main__":
+    import sys
+    import tracemalloc
+
+    # Tiempo de cargar cada capa del directorio y memoria máxima de una carga completa
+    directorio = sys.argv[1] if len(sys.argv) > 1 else "data/geo"
+    print(f"🗺️ CAPAS EN {directorio}")
+    print("=" * 50)
+    inicio_total = time.perf_counter()
+    for base_path in list_layers(directorio):
+        inicio = time.perf_counter()
+        capa = read_shapefile(base_path)
+        duracion = (time.perf_counter() - inicio) * 1000
+        vertices = 0 if capa["coordenadas"] is None else len(capa["coordenadas"])
+        print(
+            f"{os.path.basename(base_path)}: {capa['tipo'] or 'solo atributos'}, "
+            f"{len(capa['atributos']):,} registros, {vertices:,} vértices - {duracion:.1f} ms"
+        )
+    print(f"Total: {(time.perf_counter() - inicio_total) * 1000:.1f} ms")
+
+    tracemalloc.start()
+    capas = [read_shapefile(base_path) for base_path in list_layers(directorio)]
+    _, pico = tracemalloc.get_traced_memory()
+    print(f"Memoria máxima (todas las capas): {pico / 1e6:.1f} MB")
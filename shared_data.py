@@ -0,0 +1,151 @@
+"""
+shared_data.py - Dataset compartido entre sesiones de Streamlit
+Una sola copia del registro individual en memoria (st.cache_resource); cada sesión
+recibe una vista superficial con copy-on-write: leer no copia y escribir copia solo
+la columna modificada, sin alterar el dataset compartido
+"""
+
+import pickle
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+def enable_copy_on_write():
+    """Activa copy-on-write en pandas 2.x (en pandas >= 3.0 está siempre activo)"""
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+def session_view(df):
+    """
+    Vista de sesión sobre un DataFrame compartido: comparte los datos y, con
+    copy-on-write, cualquier escritura (columna nueva, asignación) queda en la vista
+    """
+    if df is None:
+        return df
+    return df.copy(deep=False)
+
+
+def frame_memory_mb(df):
+    """Memoria del DataFrame en MB (incluye el contenido de columnas de texto)"""
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def _buffer_addresses(serie):
+    """Direcciones de los buffers de datos de una columna (Arrow o NumPy)"""
+    arreglo = serie.array
+    if hasattr(arreglo, "__arrow_array__"):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            pa = None
+        if pa is not None:
+            datos = arreglo.__arrow_array__()
+            trozos = datos.chunks if isinstance(datos, pa.ChunkedArray) else [datos]
+            # Último buffer de cada trozo: los valores (sin validez ni offsets)
+            return {t.buffers()[-1].address for t in trozos if t.buffers()[-1] is not None}
+    valores = serie.to_numpy(copy=False)
+    return {valores.__array_interface__["data"][0]} if valores.size else set()
+
+
+def _arrow_allocated_bytes():
+    """Bytes reservados por el pool de memoria de Arrow (tracemalloc no los ve)"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return 0
+    return pa.total_allocated_bytes()
+
+
+def shared_columns(df_a, df_b):
+    """Fracción de las columnas de df_a cuyos datos están en la misma memoria que en df_b"""
+    columnas = [c for c in df_a.columns if c in df_b.columns]
+    if not columnas:
+        return 0.0
+    compartidas = sum(
+        bool(_buffer_addresses(df_a[c]) & _buffer_addresses(df_b[c])) for c in columnas
+    )
+    return compartidas / len(columnas)
+
+
+def compare_cache_strategies(df, n_sesiones=5, acceso_compartido=None):
+    """
+    Simula n_sesiones que leen el dataset en cada rerun
+
+    cache_data: cada acceso des-serializa una copia propia (pickle)
+    cache_resource + vista: cada acceso es una vista superficial del mismo objeto
+
+    Args:
+        acceso_compartido (callable): Acceso de una sesión al dataset compartido (por
+            defecto session_view(df); p. ej. la carga completa de un rerun del dashboard)
+
+    Returns:
+        dict: Latencia por acceso, memoria adicional retenida por las sesiones y
+        fracción de columnas que la primera y la última sesión comparten en memoria
+    """
+    serializado = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    resultados = {}
+
+    for estrategia, acceso in [
+        ("cache_data", lambda: pickle.loads(serializado)),
+        ("cache_resource", acceso_compartido or (lambda: session_view(df))),
+    ]:
+        tracemalloc.start()
+        arrow_inicial = _arrow_allocated_bytes()
+        inicio = time.perf_counter()
+        sesiones = [acceso() for _ in range(n_sesiones)]
+        latencia = (time.perf_counter() - inicio) / n_sesiones
+        memoria = tracemalloc.get_traced_memory()[0] + _arrow_allocated_bytes() - arrow_inicial
+        tracemalloc.stop()
+
+        resultados[estrategia] = {
+            "latencia_acceso_s": latencia,
+            "memoria_sesiones_mb": memoria / 1e6,
+            "columnas_compartidas": shared_columns(sesiones[-1], sesiones[0]),
+        }
+        del sesiones
+
+    resultados["dataset_mb"] = frame_memory_mb(df)
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Benchmark: latencia por rerun y memoria por sesión, cache_data vs compartido.
+    # El acceso compartido es la carga de un rerun del dashboard (vista de la caché
+    # de recurso y reporte de duplicados), no solo session_view
+    import app
+    from deduplication import get_duplicate_report
+
+    enable_copy_on_write()
+    n_sesiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    def rerun():
+        vista = app.load_individual_data_robust()
+        get_duplicate_report(vista, "NombreMunicipioResidencia")
+        return vista
+
+    df = rerun()
+    resultados = compare_cache_strategies(df, n_sesiones, rerun)
+
+    print("🔗 DATASET COMPARTIDO ENTRE SESIONES")
+    print("=" * 50)
+    print(f"Dataset: {len(df):,} filas, {resultados['dataset_mb']:.1f} MB")
+    for estrategia in ["cache_data", "cache_resource"]:
+        medida = resultados[estrategia]
+        print(
+            f"{estrategia:<15} acceso {medida['latencia_acceso_s'] * 1000:8.2f} ms - "
+            f"memoria de {n_sesiones} sesiones {medida['memoria_sesiones_mb']:8.1f} MB - "
+            f"columnas compartidas {medida['columnas_compartidas']:.0%}"
+        )
+
+    # Guardas: una escritura en la vista no modifica el dataset compartido
+    referencia = df["FA UNICA"].copy()
+    vista = session_view(df)
+    vista["columna_sesion"] = 1
+    vista.loc[vista.index[:10], "FA UNICA"] = pd.Timestamp("1900-01-01")
+    intacto = "columna_sesion" not in df.columns and df["FA UNICA"].equals(referencia)
+    print(f"Copy-on-write: {'✅ dataset compartido intacto' if intacto else '❌ dataset modificado'}")
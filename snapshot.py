@@ -0,0 +1,214 @@
+"""
+snapshot.py - Snapshot Arrow IPC del registro individual procesado
+Un proceso escribe el snapshot (fechas tipadas, duplicados ya retirados y su reporte
+en los metadatos) y todos los procesos de Streamlit lo abren con memory-map: el caché
+de páginas del sistema operativo mantiene una sola copia física. Un manifiesto JSON (versión, archivo,
+checksum) indica el snapshot vigente y se reemplaza de forma atómica
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_POR_DEFECTO = "data/cache/snapshots"
+ARCHIVO_MANIFIESTO = "manifest.json"
+# 2: columna edad_vacunacion (los snapshots anteriores no la tienen)
+# 3: duplicados ya retirados, reporte en los metadatos pandas (df.attrs)
+VERSION_FORMATO = 3
+
+# Snapshots anteriores que se conservan (otros procesos pueden tenerlos mapeados)
+SNAPSHOTS_RETENIDOS = 2
+
+TAMANO_BLOQUE_CHECKSUM = 8 * 1024 * 1024
+
+
+def file_checksum(path):
+    """SHA-256 del archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE_CHECKSUM), b""):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, data):
+    """Escribe en un temporal del mismo directorio y lo renombra (os.replace es atómico)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_manifest(directory=DIRECTORIO_POR_DEFECTO):
+    """Manifiesto vigente (None si no existe, está incompleto o es de otro formato)"""
+    path = os.path.join(directory, ARCHIVO_MANIFIESTO)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("formato") != VERSION_FORMATO:
+        return None
+    if not os.path.exists(os.path.join(directory, manifest.get("archivo", ""))):
+        return None
+    return manifest
+
+
+def write_snapshot(df, version, directory=DIRECTORIO_POR_DEFECTO):
+    """
+    Escribe el DataFrame como Arrow IPC y publica el manifiesto
+
+    Args:
+        df (pd.DataFrame): Registro procesado
+        version (str): Versión de datos (huella de los archivos fuente)
+
+    Returns:
+        dict: Manifiesto publicado
+    """
+    import pyarrow as pa
+
+    inicio = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+
+    archivo = f"individual-{version}.arrow"
+    path = os.path.join(directory, archivo)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Texto como large_string (el tipo de los dtypes de texto Arrow de pandas): al
+    # abrirlo no hay que convertir ni copiar offsets
+    table = table.cast(pa.schema(
+        [c.with_type(pa.large_string()) if c.type == pa.string() else c for c in table.schema],
+        metadata=table.schema.metadata,
+    ))
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+    manifest = {
+        "formato": VERSION_FORMATO,
+        "version": version,
+        "archivo": archivo,
+        "checksum": file_checksum(path),
+        "filas": len(df),
+        "bytes": os.path.getsize(path),
+        "creado": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    # El cambio de manifiesto es el cambio de snapshot para todos los procesos
+    _write_atomic(
+        os.path.join(directory, ARCHIVO_MANIFIESTO),
+        json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
+    )
+    _remove_old_snapshots(directory, archivo)
+
+    logger.info(
+        f"Snapshot {archivo} publicado: {len(df):,} filas en {time.perf_counter() - inicio:.1f}s"
+    )
+    return manifest
+
+
+def _remove_old_snapshots(directory, vigente):
+    """Elimina snapshots antiguos, conservando los más recientes"""
+    snapshots = sorted(
+        (
+            os.path.join(directory, nombre)
+            for nombre in os.listdir(directory)
+            if nombre.endswith(".arrow") and nombre != vigente
+        ),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for path in snapshots[SNAPSHOTS_RETENIDOS - 1 :]:
+        try:
+            # En POSIX los procesos que lo tienen mapeado siguen leyéndolo
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def arrow_string_dtype():
+    """
+    Dtype de texto respaldado por Arrow con nulos NaN: `str` en pandas >= 3.0 y
+    "pyarrow_numpy" en pandas 2.x (donde el texto sería object por defecto)
+    """
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return pd.StringDtype("pyarrow", na_value=float("nan"))
+    return pd.StringDtype("pyarrow_numpy")
+
+
+def open_snapshot(manifest, directory=DIRECTORIO_POR_DEFECTO, verify=True):
+    """
+    Abre el snapshot del manifiesto con memory-map (solo lectura)
+
+    Las columnas de texto se convierten a un dtype Arrow (arrow_string_dtype) y
+    quedan respaldadas por el archivo mapeado, también en pandas 2.x; fechas con
+    nulos y booleanos se materializan (8 y 1 byte por fila)
+
+    Raises:
+        ValueError: Si el checksum no coincide con el del manifiesto
+    """
+    import pyarrow as pa
+
+    path = os.path.join(directory, manifest["archivo"])
+    if verify and file_checksum(path) != manifest["checksum"]:
+        raise ValueError(f"Checksum inválido en snapshot {manifest['archivo']}")
+
+    source = pa.memory_map(path, "r")
+    table = pa.ipc.open_file(source).read_all()
+    texto = arrow_string_dtype()
+    return table.to_pandas(
+        split_blocks=True, types_mapper={pa.string(): texto, pa.large_string(): texto}.get
+    )
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Escribe el snapshot del CSV y compara tiempos: carga + tipado vs apertura mapeada
+    import app
+    from data_version import file_fingerprint
+    from deduplication import attach_duplicate_report, drop_flagged_duplicates, mark_individual_duplicates
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "data/vacunacion_fa.csv"
+
+    inicio = time.perf_counter()
+    df = mark_individual_duplicates(
+        app.apply_robust_date_conversion(app.read_individual_csv(csv_path))
+    )
+    df = attach_duplicate_report(*drop_flagged_duplicates(df, "NombreMunicipioResidencia"))
+    tiempo_csv = time.perf_counter() - inicio
+
+    manifest = write_snapshot(df, file_fingerprint(csv_path, extra=(True, 1)))
+
+    import pyarrow as pa
+
+    inicio = time.perf_counter()
+    reservado = pa.total_allocated_bytes()
+    df_mapeado = open_snapshot(read_manifest())
+    tiempo_snapshot = time.perf_counter() - inicio
+    reservado = pa.total_allocated_bytes() - reservado
+
+    print("🗂️ SNAPSHOT ARROW IPC")
+    print("=" * 50)
+    print(f"Archivo: {manifest['archivo']} ({manifest['bytes'] / 1e6:.1f} MB)")
+    print(f"CSV + tipado + duplicados: {tiempo_csv:.2f}s")
+    print(f"Apertura mapeada (con checksum): {tiempo_snapshot:.2f}s")
+    texto = [c for c in df_mapeado.columns if df_mapeado[c].dtype == arrow_string_dtype()]
+    print(
+        f"pandas {pd.__version__}: {len(texto)} columnas de texto en el mapa; memoria propia "
+        f"del proceso {reservado / 1e6:.1f} MB de {manifest['bytes'] / 1e6:.1f} MB"
+    )
+    identico = df_mapeado.equals(df.reset_index(drop=True).astype(df_mapeado.dtypes))
+    print(f"Idéntico: {'✅' if identico else '❌'}")
@@ -0,0 +1,267 @@
+"""
+source_resolver.py - Selección de la fuente más reciente (archivos locales o Google Drive)
+Compara metadatos baratos sin descargar contenido: MD5 y fecha de modificación de
+Drive (API v3 con api_key, o encabezados Last-Modified de la descarga directa)
+contra el MD5 y la fecha de modificación del archivo local y de la última descarga.
+La consulta de metadatos pasa por el cortacircuitos de Drive: con el circuito abierto
+no se consulta y se mantiene la última fuente resuelta
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from circuit_breaker import CircuitOpenError, call_with_breaker
+from compression import find_data_file
+
+logger = logging.getLogger(__name__)
+
+# Conjuntos de datos: archivo local y clave del ID en [google_drive]
+DATASETS = {
+    "vacunacion": {"local": "data/vacunacion_fa.csv", "secreto": "vacunacion_csv"},
+    "barridos": {"local": "data/Resumen.xlsx", "secreto": "resumen_barridos_xlsx"},
+    "poblacion": {"local": "data/Poblacion_aseguramiento.xlsx", "secreto": "poblacion_xlsx"},
+}
+DATASETS_CRITICOS = ["vacunacion", "barridos"]
+
+LOCAL = "local"
+DRIVE = "drive"
+
+TIMEOUT_METADATOS_S = 5
+
+# Resoluciones recientes y procedencia de cada conjunto (todas las sesiones)
+_resolutions = {}
+_provenance = {}
+_md5_cache = {}
+_lock = threading.Lock()
+
+
+def local_metadata(path):
+    """Fecha de modificación (UTC), tamaño y MD5 del archivo local (MD5 se recalcula solo si cambia)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    clave = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if clave not in _md5_cache:
+        digest = hashlib.md5()
+        with open(path, "rb") as f:
+            for bloque in iter(lambda: f.read(8 * 1024 * 1024), b""):
+                digest.update(bloque)
+        _md5_cache[clave] = digest.hexdigest()
+
+    return {
+        "modificado": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+        "bytes": stat.st_size,
+        "md5": _md5_cache[clave],
+    }
+
+
+def _fetch_remote_metadata(file_id, api_key=None, timeout=TIMEOUT_METADATOS_S):
+    """Consulta de metadatos en Drive (lanza la excepción de red o HTTP si falla)"""
+    # Importación diferida: requests solo se necesita al consultar Drive
+    import requests
+
+    if api_key:
+        response = requests.get(
+            f"https://www.googleapis.com/drive/v3/files/{file_id}",
+            params={"fields": "modifiedTime,md5Checksum,size", "key": api_key},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        data = response.json()
+        return {
+            "modificado": datetime.fromisoformat(data["modifiedTime"].replace("Z", "+00:00")),
+            "md5": data.get("md5Checksum"),
+            "bytes": int(data["size"]) if data.get("size") else None,
+            "etag": None,
+        }
+
+    response = requests.head(
+        f"https://drive.google.com/uc?export=download&id={file_id}",
+        allow_redirects=True,
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    last_modified = response.headers.get("Last-Modified")
+    longitud = response.headers.get("Content-Length")
+    return {
+        "modificado": parsedate_to_datetime(last_modified) if last_modified else None,
+        "md5": None,
+        "bytes": int(longitud) if longitud else None,
+        "etag": response.headers.get("ETag"),
+    }
+
+
+def remote_metadata(file_id, api_key=None, timeout=TIMEOUT_METADATOS_S, circuito=None,
+                    settings=None):
+    """
+    Metadatos del archivo en Drive sin descargarlo (None si no se pueden obtener)
+
+    Con api_key se usa la API v3 (modifiedTime, md5Checksum, size); sin ella, una
+    solicitud HEAD a la descarga directa (Last-Modified, Content-Length, ETag)
+
+    Args:
+        circuito (str): Cortacircuitos por el que pasa la consulta (los fallos cuentan
+            y con el circuito abierto no se consulta)
+        settings (dict): umbral, base y maximo del cortacircuitos (opcional)
+    """
+    try:
+        if circuito:
+            return call_with_breaker(
+                circuito, _fetch_remote_metadata, file_id, api_key, timeout, settings=settings
+            )
+        return _fetch_remote_metadata(file_id, api_key, timeout)
+    except CircuitOpenError:
+        logger.info(f"Metadatos de Drive no consultados para {file_id}: circuito abierto")
+        return None
+    except Exception as e:
+        logger.info(f"Metadatos de Drive no disponibles para {file_id}: {str(e)}")
+        return None
+
+
+def _download_is_current(remoto, descarga):
+    """
+    La última descarga (en caché) tiene el contenido vigente en Drive: mismo MD5 o
+    descargada (o revalidada) después de la última modificación en Drive
+    """
+    if not descarga:
+        return False
+    if remoto["md5"]:
+        metadatos = local_metadata(descarga["ruta"])
+        return metadatos is not None and metadatos["md5"] == remoto["md5"]
+    if remoto["modificado"] is not None:
+        return datetime.fromtimestamp(descarga["creado"], tz=timezone.utc) >= remoto["modificado"]
+    return False
+
+
+def resolve_source(local_path, file_id, api_key=None, descarga=None, previa=None,
+                   consultar=True, circuito=None, settings=None):
+    """
+    Decide la fuente más reciente de un conjunto de datos
+
+    Args:
+        descarga (dict): Última descarga en caché ({"ruta", "creado"}), si hay
+        previa (dict): Decisión anterior; se mantiene si Drive no da metadatos
+        consultar (bool): Si se consulta Drive (False: se trata como sin metadatos)
+
+    Returns:
+        dict: {"fuente": "local" | "drive", "motivo": str, "sin_metadatos": bool,
+        "descarga_vigente": bool (la copia en caché sirve, no hay que descargar)}
+    """
+    if not file_id:
+        return {"fuente": LOCAL, "motivo": "sin ID de Drive"}
+    local = local_metadata(local_path)
+
+    remoto = remote_metadata(file_id, api_key, circuito=circuito, settings=settings) if consultar else None
+    if remoto is None:
+        if previa is not None:
+            fuente, motivo = previa["fuente"], "se mantiene la última fuente resuelta"
+        elif local is None:
+            fuente, motivo = DRIVE, "sin archivo local"
+        else:
+            fuente, motivo = LOCAL, "sin fuente anterior"
+        return {
+            "fuente": fuente,
+            "motivo": f"metadatos de Drive no disponibles: {motivo}",
+            "sin_metadatos": True,
+        }
+
+    decision = _compare_with_local(local, remoto)
+    decision["descarga_vigente"] = decision["fuente"] == DRIVE and _download_is_current(remoto, descarga)
+    if decision["descarga_vigente"]:
+        decision["motivo"] += " (descarga en caché vigente)"
+    return decision
+
+
+def _compare_with_local(local, remoto):
+    """Fuente más reciente entre el archivo local y los metadatos de Drive"""
+    if local is None:
+        return {"fuente": DRIVE, "motivo": "sin archivo local"}
+
+    if remoto["md5"] and remoto["md5"] == local["md5"]:
+        return {"fuente": LOCAL, "motivo": "contenido idéntico (MD5)"}
+
+    if remoto["modificado"] is not None:
+        if local["modificado"] >= remoto["modificado"]:
+            return {"fuente": LOCAL, "motivo": "local igual o más reciente"}
+        return {"fuente": DRIVE, "motivo": "Drive más reciente"}
+
+    if remoto["bytes"] is not None and remoto["bytes"] == local["bytes"] and not remoto["md5"]:
+        return {"fuente": LOCAL, "motivo": "mismo tamaño, sin fecha en Drive"}
+
+    return {"fuente": DRIVE, "motivo": "sin fecha comparable"}
+
+
+def resolve_sources(drive_ids, api_key=None, max_age_s=60, descargas=None, revalidar=None,
+                    circuito=None, settings=None):
+    """
+    Resuelve la fuente de cada conjunto de datos (resultado reutilizado max_age_s segundos)
+
+    Si una consulta de metadatos falla, los demás conjuntos de la misma pasada no
+    consultan Drive (una sola espera por intervalo mientras el circuito se abre)
+
+    Args:
+        drive_ids (dict): {conjunto: ID de Drive}
+        descargas (dict): {conjunto: última descarga en caché ({"ruta", "creado"}) o None}
+        revalidar (callable): revalidar(conjunto) al confirmar que su descarga en caché
+            sigue vigente (evita volver a descargarla al vencer la caché)
+        circuito, settings: Cortacircuitos de la consulta (ver remote_metadata)
+
+    Returns:
+        dict: {conjunto: {"fuente", "motivo", "resuelto", ...}}
+    """
+    ahora = time.time()
+    resultado = {}
+    descargas = descargas or {}
+    consultar = True
+
+    for dataset, info in DATASETS.items():
+        file_id = drive_ids.get(dataset)
+        with _lock:
+            previo = _resolutions.get(dataset)
+        if previo and previo["file_id"] == file_id and ahora - previo["resuelto"] <= max_age_s:
+            resultado[dataset] = previo
+            continue
+
+        decision = resolve_source(
+            find_data_file(info["local"]),
+            file_id,
+            api_key,
+            descarga=descargas.get(dataset),
+            previa=previo if previo and previo["file_id"] == file_id else None,
+            consultar=consultar,
+            circuito=circuito,
+            settings=settings,
+        )
+        if decision.get("sin_metadatos"):
+            consultar = False
+        if decision.get("descarga_vigente") and revalidar:
+            revalidar(dataset)
+        decision.update(resuelto=ahora, file_id=file_id)
+        with _lock:
+            _resolutions[dataset] = decision
+        resultado[dataset] = decision
+
+    return resultado
+
+
+def record_provenance(dataset, fuente, motivo=None):
+    """Registra qué fuente atendió un conjunto de datos en la última carga"""
+    with _lock:
+        _provenance[dataset] = {
+            "fuente": fuente,
+            "motivo": motivo,
+            "momento": datetime.now().isoformat(timespec="seconds"),
+        }
+
+
+def get_provenance():
+    """Procedencia de cada conjunto de datos (para diagnóstico)"""
+    with _lock:
+        return {dataset: dict(info) for dataset, info in _provenance.items()}
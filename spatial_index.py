@@ -0,0 +1,311 @@
+"""
+spatial_index.py - Índice espacial de polígonos para ubicar puntos en lote
+Dos niveles, ambos como arreglos CSR de NumPy (sin dependencias GIS):
+- Grilla regular sobre las cajas envolventes de los registros: da los polígonos
+  candidatos de cada punto
+- Franjas horizontales sobre las aristas: el rayo hacia +x de un punto solo puede cruzar
+  aristas de su franja, así que el ray casting vectorizado prueba unas pocas aristas por
+  par (punto, candidato) en lugar del contorno completo
+Opera sobre la estructura de shapefile_reader (coordenadas, anillos, registros)
+"""
+
+import logging
+import time
+
+import numpy as np
+
+from geo_layers import CAPA_MUNICIPIOS, load_layer_wgs84
+
+logger = logging.getLogger(__name__)
+
+# Celdas de la grilla por registro (la grilla es cuadrada en número de celdas)
+CELDAS_POR_REGISTRO = 4
+
+# Aristas promedio por franja horizontal
+ARISTAS_POR_FRANJA = 64
+
+# Puntos por lote de consulta (acota la memoria de los pares punto-arista)
+PUNTOS_POR_LOTE = 50_000
+
+SIN_POLIGONO = -1
+
+
+def _expand_ranges(inicios, fines):
+    """
+    Expande rangos [inicio, fin) de un CSR
+
+    Returns:
+        tuple: (dueño de cada posición, posiciones)
+    """
+    conteos = np.maximum(fines - inicios, 0)
+    duenos = np.repeat(np.arange(len(inicios)), conteos)
+    desplazamiento = np.repeat(inicios - (np.cumsum(conteos) - conteos), conteos)
+    return duenos, np.arange(len(duenos)) + desplazamiento
+
+
+def _vertex_records(capa):
+    """Registro al que pertenece cada vértice"""
+    anillos, registros = capa["anillos"], capa["registros"]
+    anillo_registro = np.repeat(np.arange(len(registros) - 1), np.diff(registros))
+    return np.repeat(anillo_registro, np.diff(anillos))
+
+
+def record_bounds(capa):
+    """Caja envolvente (xmin, ymin, xmax, ymax) de cada registro (NaN si está vacío)"""
+    n = len(capa["registros"]) - 1
+    registro = _vertex_records(capa)
+    cajas = np.full((n, 4), np.nan)
+    if len(registro):
+        x, y = capa["coordenadas"][:, 0], capa["coordenadas"][:, 1]
+        for columna, valores, funcion in ((0, x, np.fmin), (1, y, np.fmin), (2, x, np.fmax), (3, y, np.fmax)):
+            funcion.at(cajas[:, columna], registro, valores)
+    return cajas
+
+
+def polygon_centroids(capa):
+    """
+    Centroide de área de cada registro (fórmula del polígono sobre todos sus anillos;
+    los huecos restan). Registros sin área: promedio de sus vértices
+
+    Returns:
+        ndarray: (n_registros, 2)
+    """
+    coordenadas, anillos = capa["coordenadas"], capa["anillos"]
+    n = len(capa["registros"]) - 1
+    registro = _vertex_records(capa)
+
+    # Aristas de cada anillo (del vértice i al i+1 dentro del mismo anillo)
+    siguiente_en_anillo = np.ones(len(coordenadas), dtype=bool)
+    siguiente_en_anillo[anillos[1:] - 1] = False
+    i = np.flatnonzero(siguiente_en_anillo)
+    x0, y0 = coordenadas[i, 0], coordenadas[i, 1]
+    x1, y1 = coordenadas[i + 1, 0], coordenadas[i + 1, 1]
+    cruz = x0 * y1 - x1 * y0
+
+    area = np.bincount(registro[i], weights=cruz, minlength=n) / 2
+    cx = np.bincount(registro[i], weights=(x0 + x1) * cruz, minlength=n)
+    cy = np.bincount(registro[i], weights=(y0 + y1) * cruz, minlength=n)
+    conteo = np.bincount(registro, minlength=n)
+    media = np.stack([
+        np.bincount(registro, weights=coordenadas[:, 0], minlength=n),
+        np.bincount(registro, weights=coordenadas[:, 1], minlength=n),
+    ], axis=1) / np.maximum(conteo, 1)[:, None]
+
+    con_area = np.abs(area) > 0
+    centroides = media.copy()
+    centroides[con_area] = np.stack([cx, cy], axis=1)[con_area] / (6 * area[con_area])[:, None]
+    return centroides
+
+
+def build_spatial_index(capa):
+    """
+    Índice de una capa de polígonos
+
+    Returns:
+        dict: Cajas por registro, grilla CSR (celda -> registros) y franjas CSR
+        ((franja, registro) -> aristas no horizontales)
+    """
+    coordenadas, anillos = capa["coordenadas"], capa["anillos"]
+    cajas = record_bounds(capa)
+    n = len(cajas)
+    validos = ~np.isnan(cajas[:, 0])
+    xmin, ymin = np.nanmin(cajas[:, 0]), np.nanmin(cajas[:, 1])
+    xmax, ymax = np.nanmax(cajas[:, 2]), np.nanmax(cajas[:, 3])
+
+    # Grilla sobre cajas envolventes: cada registro entra en todas las celdas que toca
+    lado = max(1, int(np.ceil(np.sqrt(n * CELDAS_POR_REGISTRO))))
+    tamano = np.array([(xmax - xmin) / lado or 1.0, (ymax - ymin) / lado or 1.0])
+    origen = np.array([xmin, ymin])
+    ids = np.flatnonzero(validos)
+    c0 = np.clip(((cajas[ids, :2] - origen) // tamano).astype("int64"), 0, lado - 1)
+    c1 = np.clip(((cajas[ids, 2:] - origen) // tamano).astype("int64"), 0, lado - 1)
+    anchos = c1[:, 0] - c0[:, 0] + 1
+    altos = c1[:, 1] - c0[:, 1] + 1
+    dueno, posicion = _expand_ranges(np.zeros(len(ids), dtype="int64"), anchos * altos)
+    celda_x = c0[dueno, 0] + posicion % anchos[dueno]
+    celda_y = c0[dueno, 1] + posicion // anchos[dueno]
+    celdas = celda_y * lado + celda_x
+    orden = np.lexsort((ids[dueno], celdas))
+    grilla_registros = ids[dueno][orden]
+    grilla_inicios = np.searchsorted(celdas[orden], np.arange(lado * lado + 1))
+
+    # Aristas no horizontales, repartidas en franjas horizontales por registro
+    registro = _vertex_records(capa)
+    siguiente_en_anillo = np.ones(len(coordenadas), dtype=bool)
+    siguiente_en_anillo[anillos[1:] - 1] = False
+    i = np.flatnonzero(siguiente_en_anillo)
+    i = i[coordenadas[i, 1] != coordenadas[i + 1, 1]]
+    aristas = np.hstack([coordenadas[i], coordenadas[i + 1]])
+
+    n_franjas = max(1, len(aristas) // ARISTAS_POR_FRANJA)
+    alto_franja = (ymax - ymin) / n_franjas or 1.0
+    f0 = np.clip(((np.minimum(aristas[:, 1], aristas[:, 3]) - ymin) // alto_franja).astype("int64"), 0, n_franjas - 1)
+    f1 = np.clip(((np.maximum(aristas[:, 1], aristas[:, 3]) - ymin) // alto_franja).astype("int64"), 0, n_franjas - 1)
+    arista, posicion = _expand_ranges(np.zeros(len(aristas), dtype="int64"), f1 - f0 + 1)
+    claves = (f0[arista] + posicion) * n + registro[i][arista]
+    orden = np.argsort(claves, kind="stable")
+    claves, arista = claves[orden], arista[orden]
+    claves_unicas, franja_inicios = np.unique(claves, return_index=True)
+
+    return {
+        "cajas": cajas,
+        "grilla": {
+            "origen": origen, "tamano": tamano, "lado": lado,
+            "inicios": grilla_inicios, "registros": grilla_registros,
+        },
+        "franjas": {
+            "ymin": ymin, "alto": alto_franja, "n": n_franjas,
+            "claves": claves_unicas,
+            "inicios": np.append(franja_inicios, len(claves)),
+            "aristas": aristas[arista],
+        },
+    }
+
+
+def _locate_batch(indice, puntos):
+    """Registro que contiene cada punto de un lote (SIN_POLIGONO si ninguno)"""
+    grilla, franjas, cajas = indice["grilla"], indice["franjas"], indice["cajas"]
+    resultado = np.full(len(puntos), SIN_POLIGONO, dtype="int64")
+    px, py = puntos[:, 0], puntos[:, 1]
+
+    # Candidatos: registros de la celda del punto cuya caja lo contiene
+    lado = grilla["lado"]
+    celda = np.floor((puntos - grilla["origen"]) / grilla["tamano"])
+    dentro = np.all((celda >= 0) & (celda <= lado), axis=1)
+    celda = np.minimum(celda, lado - 1)
+    celda = np.where(dentro, celda[:, 1] * lado + celda[:, 0], 0).astype("int64")
+    inicios = np.where(dentro, grilla["inicios"][celda], 0)
+    fines = np.where(dentro, grilla["inicios"][celda + 1], 0)
+    punto, posicion = _expand_ranges(inicios, fines)
+    registro = grilla["registros"][posicion]
+    caja = cajas[registro]
+    en_caja = (
+        (px[punto] >= caja[:, 0]) & (px[punto] <= caja[:, 2])
+        & (py[punto] >= caja[:, 1]) & (py[punto] <= caja[:, 3])
+    )
+    punto, registro = punto[en_caja], registro[en_caja]
+    if not len(punto):
+        return resultado
+
+    # Aristas de la franja del punto para cada candidato
+    franja = np.clip(((py[punto] - franjas["ymin"]) // franjas["alto"]).astype("int64"), 0, franjas["n"] - 1)
+    claves = franja * len(cajas) + registro
+    k = np.searchsorted(franjas["claves"], claves)
+    existe = k < len(franjas["claves"])
+    existe[existe] = franjas["claves"][k[existe]] == claves[existe]
+    inicios = np.where(existe, franjas["inicios"][np.minimum(k, len(franjas["claves"]) - 1)], 0)
+    fines = np.where(existe, franjas["inicios"][np.minimum(k + 1, len(franjas["claves"]))], 0)
+    par, posicion = _expand_ranges(inicios, fines)
+
+    # Ray casting hacia +x: cruces con paridad impar = punto dentro del registro
+    x1, y1, x2, y2 = franjas["aristas"][posicion].T
+    qx, qy = px[punto[par]], py[punto[par]]
+    cruza = (y1 > qy) != (y2 > qy)
+    cruza &= qx < x1 + (qy - y1) * (x2 - x1) / np.where(y2 != y1, y2 - y1, 1)
+    impares = np.bincount(par, weights=cruza, minlength=len(punto)) % 2 == 1
+
+    # Con polígonos superpuestos se toma el primer registro (orden del shapefile)
+    dentro_punto, dentro_registro = punto[impares], registro[impares]
+    orden = np.lexsort((dentro_registro, dentro_punto))
+    unicos, primero = np.unique(dentro_punto[orden], return_index=True)
+    resultado[unicos] = dentro_registro[orden][primero]
+    return resultado
+
+
+def locate_points(indice, puntos, lote=PUNTOS_POR_LOTE):
+    """
+    Registro que contiene cada punto (en las coordenadas de la capa indexada)
+
+    Args:
+        puntos: ndarray (n, 2) de x/lon, y/lat
+
+    Returns:
+        ndarray: Índice de registro por punto (SIN_POLIGONO si no cae en ninguno)
+    """
+    puntos = np.asarray(puntos, dtype="float64").reshape(-1, 2)
+    return np.concatenate(
+        [_locate_batch(indice, puntos[i : i + lote]) for i in range(0, len(puntos), lote)]
+        or [np.empty(0, dtype="int64")]
+    )
+
+
+def load_spatial_index(base_path=CAPA_MUNICIPIOS):
+    """
+    Índice de una capa en lon/lat (la geometría reproyectada sale de la caché de disco
+    de geo_layers) con sus atributos
+
+    Raises:
+        ValueError: Si la capa no tiene geometría (.shp)
+    """
+    capa = load_layer_wgs84(base_path)
+    if capa["coordenadas"] is None:
+        raise ValueError(f"La capa {base_path} no tiene geometría (.shp)")
+    indice = build_spatial_index(capa)
+    indice["atributos"] = capa["atributos"]
+    return indice
+
+
+def assign_points(indice, puntos, campo):
+    """
+    Valor del campo del polígono que contiene cada punto (p. ej. MpCodigo)
+
+    Returns:
+        ndarray: Valores del campo (None fuera de la capa)
+    """
+    registros = locate_points(indice, puntos)
+    valores = indice["atributos"][campo].to_numpy(dtype=object)
+    return np.where(registros >= 0, valores[np.maximum(registros, 0)], None)
+
+
+def _brute_force(capa, puntos):
+    """Ray casting contra todas las aristas de cada registro (referencia de __main__)"""
+    coordenadas, anillos, registros = capa["coordenadas"], capa["anillos"], capa["registros"]
+    resultado = np.full(len(puntos), SIN_POLIGONO, dtype="int64")
+    for r in range(len(registros) - 1):
+        cruces = np.zeros(len(puntos), dtype="int64")
+        for a in range(registros[r], registros[r + 1]):
+            anillo = coordenadas[anillos[a] : anillos[a + 1]]
+            x1, y1 = anillo[:-1, 0], anillo[:-1, 1]
+            x2, y2 = anillo[1:, 0], anillo[1:, 1]
+            qx, qy = puntos[:, :1], puntos[:, 1:]
+            cruza = (y1 > qy) != (y2 > qy)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cruza &= qx < x1 + (qy - y1) * (x2 - x1) / (y2 - y1)
+            cruces += cruza.sum(axis=1)
+        libres = (resultado == SIN_POLIGONO) & (cruces % 2 == 1)
+        resultado[libres] = r
+    return resultado
+
+
+if __name__ == "__main__":
+    # Validación (cabeceras -> municipio, contra fuerza bruta) y rendimiento en lote
+    inicio = time.perf_counter()
+    indice = load_spatial_index(CAPA_MUNICIPIOS)
+    print(f"Índice municipal: {len(indice['cajas'])} polígonos, grilla {indice['grilla']['lado']}², "
+          f"{indice['franjas']['n']:,} franjas en {time.perf_counter() - inicio:.2f}s")
+
+    cabeceras = load_layer_wgs84("data/geo/Cabeceras_Municipales")
+    centroides = polygon_centroids(cabeceras)
+    codigos = assign_points(indice, centroides, "MpCodigo")
+    tolima = (cabeceras["atributos"]["COD_DPTO"] == "73").to_numpy()
+    esperado = cabeceras["atributos"]["COD_MPIO"].to_numpy()
+    # Los límites municipales son generalizados: poblados ribereños de otros departamentos
+    # a pocos cientos de metros del límite pueden caer dentro de la capa
+    print(f"Cabeceras del Tolima en su municipio DANE: "
+          f"{np.mean(codigos[tolima] == esperado[tolima]):.1%} de {tolima.sum()}; "
+          f"de otros departamentos dentro de la capa: {np.sum(codigos[~tolima] != None)} de {np.sum(~tolima)}")
+
+    capa = load_layer_wgs84(CAPA_MUNICIPIOS)
+    xmin, ymin, xmax, ymax = capa["bbox"]
+    generador = np.random.default_rng(0)
+    muestra = generador.uniform([xmin, ymin], [xmax, ymax], size=(2_000, 2))
+    coincide = np.array_equal(locate_points(indice, muestra), _brute_force(capa, muestra))
+    print(f"Igual a fuerza bruta en {len(muestra):,} puntos: {coincide}")
+
+    for n in (10_000, 100_000, 1_000_000):
+        puntos = generador.uniform([xmin, ymin], [xmax, ymax], size=(n, 2))
+        inicio = time.perf_counter()
+        registros = locate_points(indice, puntos)
+        segundos = time.perf_counter() - inicio
+        print(f"{n:>9,} puntos: {segundos * 1000:7.1f} ms ({n / segundos:,.0f} puntos/s, "
+              f"{np.mean(registros >= 0):.0%} dentro)")
@@ -0,0 +1,424 @@
+"""
+sql_backend.py - Backend analítico fuera de memoria para el registro individual
+Guarda los datos tipados en un archivo SQLite local y resuelve filtros y agrupaciones
+en SQL: el proceso de Python solo recibe agregados
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from age_histogram import EDAD_MAXIMA, build_age_histogram
+from compression import detect_compression
+from date_parsing import parse_date_columns
+from deduplication import identity_hashes
+from input_schema import canonical_columns, pipeline_stages, read_options
+
+logger = logging.getLogger(__name__)
+
+RUTA_POR_DEFECTO = "data/cache/analitica.sqlite"
+VERSION_ESQUEMA = 1
+
+COLUMNA_NACIMIENTO = "FechaNacimiento"
+COLUMNA_VACUNACION = "FA UNICA"
+COLUMNA_MUNICIPIO = "NombreMunicipioResidencia"
+
+# Rangos de edad como expresión SQL (mismos criterios que classify_age_group_robust)
+SQL_RANGO_EDAD = """
+    CASE
+        WHEN edad < 1 THEN '<1'
+        WHEN edad <= 5 THEN '1-5'
+        WHEN edad <= 10 THEN '6-10'
+        WHEN edad <= 20 THEN '11-20'
+        WHEN edad <= 30 THEN '21-30'
+        WHEN edad <= 40 THEN '31-40'
+        WHEN edad <= 50 THEN '41-50'
+        WHEN edad <= 59 THEN '51-59'
+        ELSE '60+'
+    END
+"""
+
+ETIQUETAS_RANGOS_EDAD = ["<1", "1-5", "6-10", "11-20", "21-30", "31-40", "41-50", "51-59", "60+"]
+
+
+def source_signature(file_path):
+    """Firma barata del archivo fuente (tamaño y fecha de modificación)"""
+    stat = os.stat(file_path)
+    return f"{stat.st_size}-{int(stat.st_mtime_ns)}"
+
+
+def _connect(db_path):
+    """Conexión de solo consulta, utilizable desde los hilos de Streamlit"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def _to_yyyymmdd(fechas):
+    """Fechas como entero AAAAMMDD (None para NaT): comparables y con edad aritmética"""
+    fechas = pd.to_datetime(fechas, errors="coerce")
+    valores = fechas.dt.year * 10000 + fechas.dt.month * 100 + fechas.dt.day
+    return valores.astype("Int64").astype(object).where(fechas.notna(), None)
+
+
+def _read_metadata(db_path):
+    """Metadatos del almacén (None si no existe o es de otra versión)"""
+    if not os.path.exists(db_path):
+        return None
+    try:
+        with _connect(db_path) as conn:
+            rows = conn.execute("SELECT clave, valor FROM metadatos").fetchall()
+        metadata = {clave: json.loads(valor) for clave, valor in rows}
+    except sqlite3.Error:
+        return None
+
+    if metadata.get("version_esquema") != VERSION_ESQUEMA:
+        return None
+    return metadata
+
+
+def build_individual_store(csv_path, db_path, deduplicar=True, chunksize=250_000):
+    """
+    Construye el almacén leyendo el CSV por bloques (memoria acotada)
+    Se escribe en un archivo temporal y se reemplaza de forma atómica
+    """
+    inicio = time.perf_counter()
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute(
+        """
+        CREATE TABLE individual (
+            fila INTEGER PRIMARY KEY,
+            nacimiento INTEGER,
+            fa_unica INTEGER,
+            municipio TEXT,
+            id_hash INTEGER,
+            duplicado INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    conn.execute("CREATE TABLE metadatos (clave TEXT PRIMARY KEY, valor TEXT)")
+
+    columnas = None
+    filas = 0
+    # Los archivos comprimidos se descomprimen en flujo hacia el lector por bloques
+    reader = pd.read_csv(
+        csv_path,
+        low_memory=False,
+        encoding="utf-8",
+        chunksize=chunksize,
+        compression=detect_compression(csv_path),
+        **read_options("vacunacion", pipeline_stages(deduplicar)),
+    )
+
+    for chunk in reader:
+        canonical_columns(chunk, "vacunacion")
+        if columnas is None:
+            columnas = list(chunk.columns)
+
+        # Mismo tipado que apply_robust_date_conversion
+        parse_date_columns(chunk, [COLUMNA_NACIMIENTO, COLUMNA_VACUNACION])
+
+        hashes = identity_hashes(chunk) if deduplicar else None
+        n = len(chunk)
+
+        registros = pd.DataFrame(
+            {
+                "nacimiento": _to_yyyymmdd(chunk[COLUMNA_NACIMIENTO])
+                if COLUMNA_NACIMIENTO in chunk.columns
+                else None,
+                "fa_unica": _to_yyyymmdd(chunk[COLUMNA_VACUNACION])
+                if COLUMNA_VACUNACION in chunk.columns
+                else None,
+                "municipio": chunk[COLUMNA_MUNICIPIO].astype(object).where(
+                    chunk[COLUMNA_MUNICIPIO].notna(), None
+                )
+                if COLUMNA_MUNICIPIO in chunk.columns
+                else None,
+                # SQLite guarda enteros con signo: el hash uint64 se reinterpreta como int64
+                "id_hash": hashes.view(np.int64).tolist() if hashes is not None else None,
+            },
+            index=range(n),
+        )
+
+        conn.executemany(
+            "INSERT INTO individual (nacimiento, fa_unica, municipio, id_hash) VALUES (?, ?, ?, ?)",
+            registros.itertuples(index=False, name=None),
+        )
+        filas += n
+
+    columnas = columnas or []
+
+    # Duplicados: toda fila con un hash ya visto en una fila anterior
+    if deduplicar:
+        conn.execute("CREATE INDEX idx_hash ON individual (id_hash, fila)")
+        conn.execute(
+            """
+            UPDATE individual SET duplicado = 1
+            WHERE fila IN (
+                SELECT fila FROM (
+                    SELECT fila, ROW_NUMBER() OVER (PARTITION BY id_hash ORDER BY fila) AS orden
+                    FROM individual WHERE id_hash IS NOT NULL
+                ) WHERE orden > 1
+            )
+            """
+        )
+
+    conn.execute("CREATE INDEX idx_fa_unica ON individual (duplicado, fa_unica)")
+
+    metadata = {
+        "version_esquema": VERSION_ESQUEMA,
+        "firma_fuente": source_signature(csv_path),
+        "fuente": os.path.abspath(csv_path),
+        "deduplicar": bool(deduplicar),
+        "columnas": columnas,
+        "filas": filas,
+    }
+    conn.executemany(
+        "INSERT INTO metadatos (clave, valor) VALUES (?, ?)",
+        [(clave, json.dumps(valor)) for clave, valor in metadata.items()],
+    )
+    conn.commit()
+    conn.close()
+
+    os.replace(tmp_path, db_path)
+    logger.info(
+        f"Almacén analítico construido: {filas:,} registros en {time.perf_counter() - inicio:.1f}s"
+    )
+    return metadata
+
+
+def ensure_individual_store(csv_path, db_path=RUTA_POR_DEFECTO, deduplicar=True):
+    """Reutiliza el almacén si corresponde al CSV actual; si no, lo reconstruye"""
+    metadata = _read_metadata(db_path)
+
+    if (
+        metadata is None
+        or metadata.get("firma_fuente") != source_signature(csv_path)
+        or metadata.get("deduplicar") != bool(deduplicar)
+    ):
+        metadata = build_individual_store(csv_path, db_path, deduplicar)
+
+    return metadata
+
+
+def _cutoff_value(fecha_corte):
+    """Fecha de corte como AAAAMMDD (None si no hay corte)"""
+    if fecha_corte is None:
+        return None
+    corte = pd.Timestamp(fecha_corte)
+    return corte.year * 10000 + corte.month * 100 + corte.day
+
+
+def query_individual_summary(db_path, fecha_corte=None, reference_date=None):
+    """
+    Mismo resultado que process_individual_pre_barridos_robust, calculado en SQL
+    """
+    metadata = _read_metadata(db_path) or {}
+    columnas = metadata.get("columnas", [])
+
+    reference = pd.Timestamp(reference_date or pd.Timestamp.now())
+    ref_value = reference.year * 10000 + reference.month * 100 + reference.day
+    params = {"corte": _cutoff_value(fecha_corte), "ref": ref_value}
+
+    # Sin fecha de corte se incluyen todos los registros (también sin FA UNICA)
+    filtro = "duplicado = 0 AND (:corte IS NULL OR fa_unica < :corte)"
+
+    with _connect(db_path) as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM individual WHERE {filtro}", params).fetchone()[0]
+
+        result = {"total": int(total), "por_edad": {}, "por_municipio": {}}
+        if total == 0:
+            return result
+
+        if COLUMNA_NACIMIENTO in columnas:
+            rows = conn.execute(
+                f"""
+                SELECT {SQL_RANGO_EDAD} AS rango, COUNT(*) FROM (
+                    SELECT MAX(0, (:ref - nacimiento) / 10000) AS edad
+                    FROM individual WHERE {filtro} AND nacimiento IS NOT NULL
+                ) GROUP BY rango
+                """,
+                params,
+            ).fetchall()
+            conteos = dict(rows)
+            for rango in ETIQUETAS_RANGOS_EDAD:
+                result["por_edad"][rango] = int(conteos.get(rango, 0))
+
+            # Histograma de edades simples por municipio y mes de vacunación
+            rows = conn.execute(
+                f"""
+                SELECT municipio, fa_unica / 100 AS periodo,
+                       MIN(MAX(0, (:ref - nacimiento) / 10000), :edad_maxima) AS edad,
+                       COUNT(*)
+                FROM individual WHERE {filtro}
+                GROUP BY municipio, periodo, edad
+                """,
+                {**params, "edad_maxima": EDAD_MAXIMA},
+            ).fetchall()
+            agrupado = pd.DataFrame(rows, columns=["municipio", "periodo", "edad", "n"])
+            result["histograma_edad"] = build_age_histogram(
+                agrupado["edad"], agrupado["municipio"], agrupado["periodo"], agrupado["n"]
+            )
+
+        if COLUMNA_MUNICIPIO in columnas:
+            rows = conn.execute(
+                f"""
+                SELECT municipio, COUNT(*) AS n FROM individual
+                WHERE {filtro} AND municipio IS NOT NULL
+                GROUP BY municipio ORDER BY n DESC
+                """,
+                params,
+            ).fetchall()
+            result["por_municipio"] = {municipio: int(n) for municipio, n in rows}
+
+    return result
+
+
+def query_vaccination_age_histogram(db_path, fecha_corte=None):
+    """
+    Histograma de edad al vacunarse (FA UNICA - FechaNacimiento) de los registros
+    PRE-emergencia; no depende de la fecha actual (None sin ambas fechas)
+    """
+    metadata = _read_metadata(db_path) or {}
+    columnas = metadata.get("columnas", [])
+    if COLUMNA_NACIMIENTO not in columnas or COLUMNA_VACUNACION not in columnas:
+        return None
+
+    params = {"corte": _cutoff_value(fecha_corte), "edad_maxima": EDAD_MAXIMA}
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT municipio, fa_unica / 100 AS periodo,
+                   CASE WHEN fa_unica >= nacimiento
+                        THEN MIN((fa_unica - nacimiento) / 10000, :edad_maxima) END AS edad,
+                   COUNT(*)
+            FROM individual
+            WHERE duplicado = 0 AND (:corte IS NULL OR fa_unica < :corte)
+            GROUP BY municipio, periodo, edad
+            """,
+            params,
+        ).fetchall()
+
+    agrupado = pd.DataFrame(rows, columns=["municipio", "periodo", "edad", "n"])
+    return build_age_histogram(
+        agrupado["edad"], agrupado["municipio"], agrupado["periodo"], agrupado["n"]
+    )
+
+
+def query_daily_counts(db_path):
+    """Vacunados por día de FA UNICA (todas las fechas válidas, sin duplicados)"""
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT fa_unica, COUNT(*) FROM individual
+            WHERE duplicado = 0 AND fa_unica IS NOT NULL
+            GROUP BY fa_unica ORDER BY fa_unica
+            """
+        ).fetchall()
+
+    if not rows:
+        return pd.DataFrame(columns=["Fecha", "Count"])
+
+    fechas, conteos = zip(*rows)
+    return pd.DataFrame(
+        {
+            "Fecha": pd.to_datetime(pd.Series(fechas).astype(str), format="%Y%m%d"),
+            "Count": np.asarray(conteos, dtype="int64"),
+        }
+    )
+
+
+def query_duplicate_report(db_path):
+    """Reporte de duplicados con el formato de deduplication.duplicate_report"""
+    with _connect(db_path) as conn:
+        total, duplicados = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(duplicado), 0) FROM individual"
+        ).fetchone()
+        rows = conn.execute(
+            """
+            SELECT municipio, COUNT(*) AS n FROM individual
+            WHERE duplicado = 1 AND municipio IS NOT NULL
+            GROUP BY municipio ORDER BY n DESC
+            """
+        ).fetchall()
+
+    return {
+        "total_registros": int(total),
+        "duplicados": int(duplicados),
+        "por_municipio": {municipio: int(n) for municipio, n in rows},
+    }
+
+
+def cross_check(csv_path, db_path=RUTA_POR_DEFECTO, fecha_corte=None, deduplicar=True):
+    """
+    Compara los resultados SQL con la ruta pandas del dashboard
+
+    Returns:
+        dict: {"coincide": bool, "diferencias": [..], "tiempos": {...}}
+    """
+    import app
+    from deduplication import drop_flagged_duplicates, mark_individual_duplicates
+
+    inicio = time.perf_counter()
+    df = app.apply_robust_date_conversion(app.read_individual_csv(csv_path))
+    if deduplicar:
+        df = mark_individual_duplicates(df)
+    df, _ = drop_flagged_duplicates(df, COLUMNA_MUNICIPIO)
+    esperado = app.process_individual_pre_barridos_robust(df, fecha_corte)
+    tiempo_pandas = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    ensure_individual_store(csv_path, db_path, deduplicar)
+    obtenido = query_individual_summary(db_path, fecha_corte)
+    tiempo_sql = time.perf_counter() - inicio
+
+    diferencias = []
+    if int(esperado["total"]) != obtenido["total"]:
+        diferencias.append(f"total: pandas={esperado['total']} sql={obtenido['total']}")
+
+    for clave in ["por_edad", "por_municipio"]:
+        claves = set(esperado[clave]) | set(obtenido[clave])
+        for k in sorted(claves, key=str):
+            a, b = int(esperado[clave].get(k, 0)), int(obtenido[clave].get(k, 0))
+            if a != b:
+                diferencias.append(f"{clave}[{k}]: pandas={a} sql={b}")
+
+    return {
+        "coincide": not diferencias,
+        "diferencias": diferencias,
+        "tiempos": {"pandas_s": tiempo_pandas, "sql_s": tiempo_sql},
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Verificación cruzada: backend SQL vs ruta pandas
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "data/vacunacion_fa.csv"
+    fecha_corte = pd.Timestamp(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print("🗄️ VERIFICACIÓN BACKEND ANALÍTICO (SQLite)")
+    print("=" * 50)
+    resultado = cross_check(csv_path, RUTA_POR_DEFECTO, fecha_corte)
+    print(
+        f"pandas: {resultado['tiempos']['pandas_s']:.2f}s - "
+        f"sql (incluye construcción si aplica): {resultado['tiempos']['sql_s']:.2f}s"
+    )
+    if resultado["coincide"]:
+        print("✅ Resultados idénticos")
+    else:
+        print("❌ Diferencias:")
+        for diferencia in resultado["diferencias"][:50]:
+            print(f"   {diferencia}")
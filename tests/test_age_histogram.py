@@ -0,0 +1,68 @@
+"""
+Histograma de edades: agrupaciones iguales a clasificar cada registro, eje de meses
+acotado a los meses presentes y conteos de solo lectura al compartirse
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from age_histogram import (
+    LIMITES_PAI,
+    SIN_FECHA,
+    age_distribution,
+    build_age_histogram,
+    freeze_histogram,
+    month_periods,
+)
+from parallel_loader import ETIQUETAS_RANGOS_EDAD
+
+
+def _registros(n=5_000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    edades = rng.integers(0, 95, n).astype("float64")
+    edades[::37] = np.nan
+    municipios = rng.choice(["ESPINAL", "IBAGUÉ", None], n)
+    fechas = pd.Series(
+        pd.to_datetime("2023-01-01") + pd.to_timedelta(rng.integers(0, 700, n), "D")
+    )
+    fechas[::41] = pd.NaT
+    return edades, municipios, fechas
+
+
+def test_rangos_pai_iguales_a_clasificar_registros():
+    edades, municipios, fechas = _registros()
+    histograma = build_age_histogram(edades, municipios, month_periods(fechas))
+
+    rangos = pd.cut(edades, bins=LIMITES_PAI + [np.inf], right=False)
+    esperado = pd.Series(rangos).value_counts(sort=False)
+    obtenido = age_distribution(histograma, LIMITES_PAI, ETIQUETAS_RANGOS_EDAD)
+
+    assert list(obtenido.values()) == esperado.tolist()
+    assert histograma["sin_edad"] == int(np.isnan(edades).sum())
+
+
+def test_fechas_atipicas_no_ensanchan_el_eje_de_meses():
+    edades, municipios, fechas = _registros()
+    normal = build_age_histogram(edades, municipios, month_periods(fechas))
+
+    fechas = fechas.copy()
+    fechas[1] = pd.Timestamp("1900-01-01")
+    fechas[2] = pd.Timestamp("2099-12-31")
+    atipico = build_age_histogram(edades, municipios, month_periods(fechas))
+
+    assert len(atipico["periodos"]) <= len(normal["periodos"]) + 2
+    assert atipico["periodos"][0] == "1900-01"
+    assert atipico["periodos"][-2:] == ["2099-12", SIN_FECHA]
+    assert atipico["conteos"].sum() == normal["conteos"].sum()
+    assert atipico["conteos"][:, atipico["periodos"].index("1900-01")].sum() == 1
+
+
+def test_histograma_compartido_es_de_solo_lectura():
+    edades, municipios, fechas = _registros()
+    histograma = freeze_histogram(build_age_histogram(edades, municipios, month_periods(fechas)))
+
+    with pytest.raises(ValueError):
+        histograma["conteos"][0, 0, 0] += 1
+    rangos = age_distribution(histograma, LIMITES_PAI, ETIQUETAS_RANGOS_EDAD)
+    assert sum(rangos.values()) == int((~np.isnan(edades)).sum())
@@ -0,0 +1,83 @@
+"""
+Conformidad de los motores CSV: los agregados del dashboard deben ser idénticos con
+el parser de pandas y con el lector de Arrow, también cuando Arrow no puede convertir
+las fechas y vuelve a leerlas como texto
+"""
+
+import logging
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import csv_engines
+
+pytest.importorskip("pyarrow")
+
+MUESTRA = Path(__file__).parent / "datos" / "vacunacion_muestra.csv"
+FECHA_CORTE = pd.Timestamp("2024-11-09")
+
+# Fechas que el lector de Arrow no convierte: otro formato, serial de Excel, texto
+FECHAS_SUCIAS = {
+    "2024-11-05": "05/11/2024",
+    "2024-11-07": "45603",
+    "2016-05-29": "sin dato",
+    "1980-02-29": "29/02/1980",
+}
+
+
+@pytest.fixture
+def muestra_sucia(tmp_path):
+    texto = MUESTRA.read_text(encoding="utf-8")
+    for limpia, sucia in FECHAS_SUCIAS.items():
+        texto = texto.replace(limpia, sucia)
+    ruta = tmp_path / "vacunacion_sucia.csv"
+    ruta.write_text(texto, encoding="utf-8")
+    return ruta
+
+
+def test_arrow_entrega_columnas_tipadas():
+    df = csv_engines.read_csv_arrow(MUESTRA)
+
+    assert pd.api.types.is_datetime64_any_dtype(df["FA UNICA"])
+    assert pd.api.types.is_datetime64_any_dtype(df["FechaNacimiento"])
+    assert isinstance(df["NombreMunicipioResidencia"].dtype, pd.CategoricalDtype)
+    assert df["FA UNICA"].isna().sum() == 1
+
+
+def test_conformidad_muestra():
+    resultado = csv_engines.conformance_check(MUESTRA, FECHA_CORTE)
+
+    assert resultado["coincide"], resultado["diferencias"]
+
+
+def test_conformidad_sin_deduplicar():
+    resultado = csv_engines.conformance_check(MUESTRA, FECHA_CORTE, deduplicar=False)
+
+    assert resultado["coincide"], resultado["diferencias"]
+
+
+def test_fechas_sucias_vuelven_a_texto(muestra_sucia, caplog):
+    with caplog.at_level(logging.INFO, logger=csv_engines.__name__):
+        df = csv_engines.read_csv_arrow(muestra_sucia)
+
+    assert any("Fechas no convertibles en Arrow" in r.message for r in caplog.records)
+    assert not pd.api.types.is_datetime64_any_dtype(df["FA UNICA"])
+    assert "05/11/2024" in set(df["FA UNICA"].dropna())
+
+
+def test_conformidad_fechas_sucias(muestra_sucia, caplog):
+    with caplog.at_level(logging.INFO, logger=csv_engines.__name__):
+        resultado = csv_engines.conformance_check(muestra_sucia, FECHA_CORTE)
+
+    assert any("Fechas no convertibles en Arrow" in r.message for r in caplog.records)
+    assert resultado["coincide"], resultado["diferencias"]
+
+
+def test_motor_arrow_requiere_flujo_legible(tmp_path):
+    comprimido = tmp_path / "vacunacion.zip"
+    pd.read_csv(MUESTRA, dtype=str).to_csv(comprimido, index=False, compression="zip")
+
+    assert csv_engines.resolve_engine(csv_engines.MOTOR_ARROW, MUESTRA) == csv_engines.MOTOR_ARROW
+    assert csv_engines.resolve_engine(csv_engines.MOTOR_ARROW, comprimido) == csv_engines.MOTOR_PANDAS
+    assert csv_engines.resolve_engine(csv_engines.MOTOR_PANDAS, MUESTRA) == csv_engines.MOTOR_PANDAS
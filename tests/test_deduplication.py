@@ -0,0 +1,42 @@
+"""
+Filas de barridos repetidas: se reportan sin retirarlas (no identifican personas),
+salvo que se pida retirarlas
+"""
+
+import pandas as pd
+
+from deduplication import (
+    COLUMNA_DUPLICADO,
+    drop_flagged_duplicates,
+    mark_barridos_duplicates,
+    report_flagged_duplicates,
+)
+
+
+def _barridos():
+    return pd.DataFrame(
+        {
+            "FECHA": pd.to_datetime(["2025-03-14", "2025-03-14", "2025-03-15"]),
+            "MUNICIPIO": ["VILLARRICA", "VILLARRICA", "VILLARRICA"],
+            "VEREDA": ["LA COLONIA", "LA COLONIA", "LA COLONIA"],
+            "TPVB": [1, 1, 1],
+        }
+    )
+
+
+def test_barridos_repetidos_solo_se_reportan():
+    df, reporte = report_flagged_duplicates(mark_barridos_duplicates(_barridos()), "MUNICIPIO")
+
+    assert len(df) == 3
+    assert df["TPVB"].sum() == 3
+    assert COLUMNA_DUPLICADO not in df.columns
+    assert reporte["duplicados"] == 1
+    assert reporte["por_municipio"] == {"VILLARRICA": 1}
+    assert reporte["retirados"] is False
+
+
+def test_barridos_repetidos_se_retiran_a_pedido():
+    df, reporte = drop_flagged_duplicates(mark_barridos_duplicates(_barridos()), "MUNICIPIO")
+
+    assert len(df) == 2
+    assert reporte["duplicados"] == 1
@@ -0,0 +1,72 @@
+"""
+Exactitud de la Transversa de Mercator contra los puntos de control de PROJ
+(EPSG:9377 -> WGS84) y de la ida y vuelta inversa-directa
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from projection import (
+    ORIGEN_NACIONAL,
+    PUNTOS_REFERENCIA,
+    accuracy_report,
+    inverse_transverse_mercator,
+    parse_prj,
+    read_prj,
+    to_wgs84,
+    transverse_mercator,
+)
+
+# Tolerancia en metros: 1 cm
+TOLERANCIA_M = 0.01
+
+CAPA_MUNICIPIOS = Path(__file__).parent.parent / "data" / "geo" / "municipios_tolima"
+
+WKT_GEOGRAFICO = (
+    'GEOGCS["GCS_WGS_1984",DATUM["D_WGS_1984",SPHEROID["WGS_1984",6378137.0,298.257223563]],'
+    'PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]]'
+)
+
+
+@pytest.mark.parametrize("punto", PUNTOS_REFERENCIA, ids=lambda p: f"{p[0]:.0f}-{p[1]:.0f}")
+def test_puntos_de_control(punto):
+    reporte = accuracy_report(puntos=[punto])
+
+    assert reporte["inversa_m"] < TOLERANCIA_M
+    assert reporte["directa_m"] < TOLERANCIA_M
+    assert reporte["ida_vuelta_m"] < TOLERANCIA_M
+
+
+def test_ida_y_vuelta_en_grilla():
+    # Hasta unos 4° del meridiano central, al norte y al sur del origen
+    este, norte = np.meshgrid(
+        np.linspace(4_550_000, 5_450_000, 60), np.linspace(1_500_000, 2_300_000, 60)
+    )
+    lon, lat = inverse_transverse_mercator(este, norte)
+    este_vuelta, norte_vuelta = transverse_mercator(lon, lat)
+
+    assert np.hypot(este_vuelta - este, norte_vuelta - norte).max() < TOLERANCIA_M
+
+
+def test_parametros_del_prj():
+    if not CAPA_MUNICIPIOS.with_suffix(".prj").exists():
+        pytest.skip("Sin capa municipal en data/geo")
+    params = read_prj(str(CAPA_MUNICIPIOS))
+
+    assert params == pytest.approx(ORIGEN_NACIONAL)
+
+
+def test_capa_geografica_sin_transformar():
+    capa = {"coordenadas": np.array([[-75.2, 4.4]]), "bbox": (-75.2, 4.4, -75.2, 4.4)}
+
+    assert parse_prj(WKT_GEOGRAFICO) is None
+    assert to_wgs84(capa, None) is capa
+
+
+def test_proyeccion_no_soportada():
+    wkt = 'PROJCS["x",GEOGCS["y"],PROJECTION["Lambert_Conformal_Conic"]]'
+
+    with pytest.raises(ValueError, match="Lambert_Conformal_Conic"):
+        parse_prj(wkt)
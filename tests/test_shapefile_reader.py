@@ -0,0 +1,77 @@
+"""
+Lector de shapefiles: registros de forma nula (tipo 0, solo 4 bytes de contenido)
+entre polígonos y al final del archivo
+"""
+
+import struct
+
+import numpy as np
+import pytest
+
+from shapefile_reader import read_geometry
+
+POLIGONO = 5
+MULTIPUNTO = 8
+
+CUADRADO = [(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0), (0.0, 0.0)]
+TRIANGULO = [(2.0, 0.0), (2.0, 1.0), (3.0, 0.0), (2.0, 0.0)]
+
+
+def _contenido(tipo, puntos):
+    """Contenido de un registro: forma nula, multipunto o polígono de una parte"""
+    if puntos is None:
+        return struct.pack("<i", 0)
+    xs, ys = zip(*puntos)
+    caja = struct.pack("<4d", min(xs), min(ys), max(xs), max(ys))
+    coordenadas = b"".join(struct.pack("<2d", *p) for p in puntos)
+    if tipo == MULTIPUNTO:
+        return struct.pack("<i", tipo) + caja + struct.pack("<i", len(puntos)) + coordenadas
+    return (
+        struct.pack("<i", tipo) + caja + struct.pack("<2i", 1, len(puntos))
+        + struct.pack("<i", 0) + coordenadas
+    )
+
+
+def _escribir_capa(base_path, tipo, registros, con_shx=True):
+    cuerpo, indice = b"", b""
+    posicion = 100
+    for numero, puntos in enumerate(registros, start=1):
+        contenido = _contenido(tipo, puntos)
+        cuerpo += struct.pack(">2i", numero, len(contenido) // 2) + contenido
+        indice += struct.pack(">2i", posicion // 2, len(contenido) // 2)
+        posicion += 8 + len(contenido)
+
+    def encabezado(largo):
+        return (
+            struct.pack(">7i", 9994, 0, 0, 0, 0, 0, largo // 2)
+            + struct.pack("<2i", 1000, tipo)
+            + struct.pack("<8d", 0, 0, 3, 1, 0, 0, 0, 0)
+        )
+
+    with open(f"{base_path}.shp", "wb") as f:
+        f.write(encabezado(100 + len(cuerpo)) + cuerpo)
+    if con_shx:
+        with open(f"{base_path}.shx", "wb") as f:
+            f.write(encabezado(100 + len(indice)) + indice)
+
+
+@pytest.mark.parametrize("con_shx", [True, False], ids=["shx", "sin_shx"])
+def test_poligonos_con_formas_nulas(tmp_path, con_shx):
+    base_path = str(tmp_path / "capa")
+    _escribir_capa(base_path, POLIGONO, [CUADRADO, None, TRIANGULO, None], con_shx)
+
+    geometria = read_geometry(base_path)
+
+    np.testing.assert_array_equal(geometria["coordenadas"], CUADRADO + TRIANGULO)
+    assert geometria["anillos"].tolist() == [0, 5, 9]
+    assert geometria["registros"].tolist() == [0, 1, 1, 2, 2]
+
+
+def test_multipunto_con_forma_nula_final(tmp_path):
+    base_path = str(tmp_path / "puntos")
+    _escribir_capa(base_path, MULTIPUNTO, [TRIANGULO[:3], None])
+
+    geometria = read_geometry(base_path)
+
+    np.testing.assert_array_equal(geometria["coordenadas"], TRIANGULO[:3])
+    assert geometria["registros"].tolist() == [0, 3, 3]
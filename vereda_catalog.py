@@ -0,0 +1,301 @@
+"""
+vereda_catalog.py - Catálogo oficial de veredas del Tolima y agregación de barridos por vereda
+Cada fila de Resumen.xlsx es un barrido en una vereda escrita a mano (MUNICIPIO, VEREDAS).
+Se construye una vez un índice de nombres normalizados sobre el catálogo (CODIGO_VER,
+NOMBRE_VER, DPTOMPIO) y los barridos se emparejan por pares distintos (municipio,
+vereda), no fila por fila; los totales se agregan luego con un groupby por código
+"""
+
+import difflib
+import logging
+import os
+import re
+import time
+import unicodedata
+
+import pandas as pd
+
+from shapefile_reader import read_dbf
+
+logger = logging.getLogger(__name__)
+
+CAPA_VEREDAS = "data/geo/veredas_tolima"
+LIBRO_VEREDAS = "data/geo/Tol_Mpios_Veredas.xlsx"
+HOJA_VEREDAS = "Veredas"
+
+# La capa de veredas trae también las de municipios vecinos de otros departamentos
+CODIGO_DEPARTAMENTO = "73"
+
+# Prefijos genéricos que se escriben antes del nombre ("VDA EL CARMEN", "V/ YAYI")
+PREFIJOS_VEREDA = ("VEREDA ", "VDA ", "V ")
+
+# Artículos iniciales que se escriben o se omiten según la fuente ("LA ANTIGUA", "ANTIGUA")
+ARTICULOS = ("LA ", "EL ", "LOS ", "LAS ")
+
+# Separadores de varias veredas en una misma fila ("BOMBOTE / CHIMBI")
+SEPARADORES_VEREDAS = re.compile(r"\s*(?:/|,|;|\s-\s|\sY\s)\s*")
+
+# Textos de sitios urbanos (no son veredas): cabecera, barrios, puestos fijos
+TERMINOS_URBANOS = (
+    "URBAN", "BARRIO", "PARQUE", "CABECERA", "HOSPITAL", "PLAZA", "CENTRO", "IPS", "E S E",
+    "USI", "ALCALDIA", "TERMINAL", "PUESTO", "SUPERMERCADO",
+)
+
+# Similitud mínima (difflib) para aceptar un nombre con errores de digitación
+SIMILITUD_MUNICIPIO = 0.85
+SIMILITUD_VEREDA = 0.88
+
+
+def normalize_name(texto):
+    """Mayúsculas sin tildes, solo letras y dígitos separados por un espacio"""
+    if texto is None or pd.isna(texto):
+        return ""
+    texto = unicodedata.normalize("NFKD", str(texto).upper())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"[^A-Z0-9]+", " ", texto).strip()
+
+
+def vereda_key(texto):
+    """Clave de índice de una vereda: nombre normalizado sin artículo inicial"""
+    clave = normalize_name(texto)
+    for articulo in ARTICULOS:
+        if clave.startswith(articulo):
+            return clave[len(articulo):]
+    return clave
+
+
+def load_vereda_catalog(base_path=CAPA_VEREDAS, libro=LIBRO_VEREDAS):
+    """
+    Catálogo de veredas del departamento: atributos del .dbf de la capa de veredas
+    o, si no está, la hoja Veredas de Tol_Mpios_Veredas.xlsx (mismos códigos)
+
+    Returns:
+        DataFrame: CODIGO_VER, NOMBRE_VER, DPTOMPIO, NOMB_MPIO (códigos como texto)
+    """
+    columnas = ["CODIGO_VER", "NOMBRE_VER", "DPTOMPIO", "NOMB_MPIO"]
+    if os.path.exists(f"{base_path}.dbf"):
+        catalogo = read_dbf(base_path)
+    else:
+        catalogo = pd.read_excel(libro, sheet_name=HOJA_VEREDAS)
+    catalogo = catalogo[columnas].astype({"CODIGO_VER": str, "DPTOMPIO": str})
+    catalogo = catalogo[catalogo["DPTOMPIO"].str.startswith(CODIGO_DEPARTAMENTO)]
+    return catalogo.sort_values("CODIGO_VER").reset_index(drop=True)
+
+
+def build_vereda_index(catalogo):
+    """
+    Índice de nombres normalizados del catálogo
+
+    Returns:
+        dict: municipios (nombre -> DPTOMPIO), veredas ((DPTOMPIO, nombre) -> CODIGO_VER;
+        con nombres repetidos en un municipio queda el código menor) y nombres de
+        vereda por municipio (para la búsqueda aproximada)
+    """
+    nombres_municipio = catalogo["NOMB_MPIO"].map(normalize_name)
+    nombres_vereda = catalogo["NOMBRE_VER"].map(vereda_key)
+
+    veredas = {}
+    for municipio, nombre, codigo in zip(catalogo["DPTOMPIO"], nombres_vereda, catalogo["CODIGO_VER"]):
+        veredas.setdefault((municipio, nombre), codigo)
+
+    por_municipio = {}
+    for municipio, nombre in veredas:
+        por_municipio.setdefault(municipio, []).append(nombre)
+
+    return {
+        "municipios": dict(zip(nombres_municipio, catalogo["DPTOMPIO"])),
+        "veredas": veredas,
+        "nombres_por_municipio": por_municipio,
+    }
+
+
+def match_municipality(nombre, indice):
+    """
+    DPTOMPIO de un municipio escrito a mano: nombre exacto, nombre contenido en uno
+    solo del catálogo ("MARIQUITA", "CARMEN") o el más parecido ("ARMEO"). None si no hay
+    """
+    municipios = indice["municipios"]
+    clave = normalize_name(nombre)
+    if not clave:
+        return None
+    if clave in municipios:
+        return municipios[clave]
+
+    contienen = [m for m in municipios if f" {clave} " in f" {m} "]
+    if len(contienen) == 1:
+        return municipios[contienen[0]]
+
+    parecidos = difflib.get_close_matches(clave, list(municipios), n=1, cutoff=SIMILITUD_MUNICIPIO)
+    return municipios[parecidos[0]] if parecidos else None
+
+
+def _match_single_vereda(municipio, clave, indice):
+    """Código de una vereda (ya normalizada): exacta, sin prefijo genérico o aproximada"""
+    veredas = indice["veredas"]
+    candidatos = [clave] + [clave[len(p):] for p in PREFIJOS_VEREDA if clave.startswith(p)]
+    candidatos = [vereda_key(c) for c in candidatos]
+    for candidato in candidatos:
+        if (municipio, candidato) in veredas:
+            return veredas[(municipio, candidato)]
+
+    parecidos = difflib.get_close_matches(
+        candidatos[-1], indice["nombres_por_municipio"].get(municipio, []),
+        n=1, cutoff=SIMILITUD_VEREDA,
+    )
+    return veredas[(municipio, parecidos[0])] if parecidos else None
+
+
+def match_vereda(municipio, nombre, indice):
+    """
+    Códigos de vereda de un texto de la columna VEREDAS dentro de un municipio. Si el
+    nombre completo no está en el catálogo se prueba cada parte de un nombre compuesto
+
+    Returns:
+        list: Códigos CODIGO_VER (vacía si no se reconoce ninguna vereda)
+    """
+    if municipio is None or pd.isna(municipio):
+        return []
+    clave = normalize_name(nombre)
+    if not clave:
+        return []
+    codigo = _match_single_vereda(municipio, clave, indice)
+    if codigo is not None:
+        return [codigo]
+
+    partes = SEPARADORES_VEREDAS.split(re.sub(r"\s+", " ", str(nombre).upper()).strip())
+    codigos = []
+    for parte in filter(None, map(normalize_name, partes)):
+        codigo = _match_single_vereda(municipio, parte, indice)
+        if codigo is not None and codigo not in codigos:
+            codigos.append(codigo)
+    return codigos
+
+
+def match_sweep_pairs(pares, indice):
+    """
+    Empareja los pares distintos (DPTOMPIO ya emparejado, VEREDAS) con el catálogo
+
+    Returns:
+        DataFrame: Una fila por par y código (par_id, CODIGO_VER, peso); el peso reparte
+        una fila con varias veredas en partes iguales
+    """
+    filas = []
+    for par_id, (municipio, vereda) in enumerate(zip(pares["DPTOMPIO"], pares["VEREDAS"])):
+        codigos = match_vereda(municipio, vereda, indice)
+        filas.extend((par_id, codigo, 1 / len(codigos)) for codigo in codigos)
+    return pd.DataFrame(filas, columns=["par_id", "CODIGO_VER", "peso"])
+
+
+def is_urban_site(municipio, vereda):
+    """Texto de vereda que en realidad es la cabecera municipal o un sitio urbano"""
+    clave, nombre_municipio = normalize_name(vereda), normalize_name(municipio)
+    if not clave:
+        return False
+    return (
+        clave in nombre_municipio
+        or (bool(nombre_municipio) and f" {nombre_municipio} " in f" {clave} ")
+        or any(f" {t} " in f" {clave} " for t in TERMINOS_URBANOS)
+    )
+
+
+def _section_total(df_barridos, columnas):
+    """Total por fila de las columnas de edad de una sección (TPVB o TPNVP)"""
+    columnas = [c for c in columnas if c in df_barridos.columns]
+    if not columnas:
+        return pd.Series(0.0, index=df_barridos.index)
+    return df_barridos[columnas].apply(pd.to_numeric, errors="coerce").fillna(0).sum(axis=1)
+
+
+def aggregate_sweeps_by_vereda(df_barridos, columns_info, catalogo, indice):
+    """
+    TPVB (vacunados en barrido) y TPNVP (renuentes) por vereda del catálogo, con las
+    mismas columnas de edad que el total por municipio (columns_info de
+    detect_barridos_columns)
+
+    Returns:
+        dict: por_vereda (veredas barridas), sin_barrido (veredas del catálogo nunca
+        barridas) y sin_emparejar (textos de vereda que no están en el catálogo, con
+        Urbano=True si son la cabecera o un sitio urbano)
+    """
+    vacias = {
+        "por_vereda": pd.DataFrame(
+            columns=["CODIGO_VER", "Vereda", "Municipio", "Barridos", "TPVB", "TPNVP", "Ultimo_Barrido"]
+        ),
+        "sin_barrido": catalogo.rename(columns={"NOMBRE_VER": "Vereda", "NOMB_MPIO": "Municipio"}),
+        "sin_emparejar": pd.DataFrame(
+            columns=["MUNICIPIO", "VEREDAS", "DPTOMPIO", "Urbano", "Barridos", "TPVB", "TPNVP"]
+        ),
+    }
+    if df_barridos.empty or not {"MUNICIPIO", "VEREDAS"} <= set(df_barridos.columns):
+        return vacias
+
+    filas = pd.DataFrame({
+        "MUNICIPIO": df_barridos["MUNICIPIO"].astype("string").str.strip(),
+        "VEREDAS": df_barridos["VEREDAS"].astype("string").str.strip(),
+        "FECHA": df_barridos["FECHA"] if "FECHA" in df_barridos.columns else pd.NaT,
+        "TPVB": _section_total(df_barridos, columns_info.get("vacunados_barrido", {}).values()),
+        "TPNVP": _section_total(df_barridos, columns_info.get("renuentes", {}).values()),
+    })
+
+    # Un emparejamiento por par distinto; las filas se agregan por par antes del cruce
+    pares = (
+        filas.groupby(["MUNICIPIO", "VEREDAS"], dropna=False)
+        .agg(Barridos=("TPVB", "size"), TPVB=("TPVB", "sum"), TPNVP=("TPNVP", "sum"),
+             Ultimo_Barrido=("FECHA", "max"))
+        .reset_index()
+    )
+    municipios = {m: match_municipality(m, indice) for m in pares["MUNICIPIO"].unique()}
+    pares["DPTOMPIO"] = pares["MUNICIPIO"].map(municipios)
+    cruce = match_sweep_pairs(pares, indice)
+
+    emparejados = cruce.join(pares, on="par_id")
+    emparejados["TPVB"] *= emparejados["peso"]
+    emparejados["TPNVP"] *= emparejados["peso"]
+    por_vereda = (
+        emparejados.groupby("CODIGO_VER")
+        .agg(Barridos=("Barridos", "sum"), TPVB=("TPVB", "sum"), TPNVP=("TPNVP", "sum"),
+             Ultimo_Barrido=("Ultimo_Barrido", "max"))
+        .reset_index()
+        .merge(catalogo, on="CODIGO_VER")
+        .rename(columns={"NOMBRE_VER": "Vereda", "NOMB_MPIO": "Municipio"})
+    )
+    por_vereda = por_vereda[vacias["por_vereda"].columns.tolist() + ["DPTOMPIO"]]
+
+    barridas = por_vereda["CODIGO_VER"]
+    sin_barrido = vacias["sin_barrido"][~vacias["sin_barrido"]["CODIGO_VER"].isin(barridas)]
+    sin_emparejar = pares.drop(index=cruce["par_id"].unique())
+    sin_emparejar["Urbano"] = [
+        is_urban_site(m, v) for m, v in zip(sin_emparejar["MUNICIPIO"], sin_emparejar["VEREDAS"])
+    ]
+    sin_emparejar = sin_emparejar[vacias["sin_emparejar"].columns]
+
+    return {
+        "por_vereda": por_vereda.sort_values("TPVB", ascending=False).reset_index(drop=True),
+        "sin_barrido": sin_barrido.reset_index(drop=True),
+        "sin_emparejar": sin_emparejar.sort_values("TPVB", ascending=False).reset_index(drop=True),
+    }
+
+
+if __name__ == "__main__":
+    # Emparejamiento de Resumen.xlsx contra el catálogo: cobertura y tiempos
+    from app import detect_barridos_columns
+
+    inicio = time.perf_counter()
+    catalogo = load_vereda_catalog()
+    indice = build_vereda_index(catalogo)
+    print(f"Catálogo: {len(catalogo):,} veredas, índice en {time.perf_counter() - inicio:.3f}s")
+
+    df = pd.read_excel("data/Resumen.xlsx", sheet_name="Vacunacion")
+    inicio = time.perf_counter()
+    resultado = aggregate_sweeps_by_vereda(df, detect_barridos_columns(df), catalogo, indice)
+    print(f"Agregación de {len(df):,} filas en {time.perf_counter() - inicio:.3f}s")
+
+    por_vereda, sin_emparejar = resultado["por_vereda"], resultado["sin_emparejar"]
+    rurales = sin_emparejar[~sin_emparejar["Urbano"].astype(bool)]
+    total = por_vereda["TPVB"].sum() + sin_emparejar["TPVB"].sum()
+    print(f"Veredas barridas: {len(por_vereda):,}; nunca barridas: {len(resultado['sin_barrido']):,}")
+    print(f"TPVB en veredas del catálogo: {por_vereda['TPVB'].sum() / max(total, 1):.1%}; "
+          f"en sitios urbanos: {sin_emparejar['TPVB'].sum() / max(total, 1) - rurales['TPVB'].sum() / max(total, 1):.1%}; "
+          f"textos rurales sin emparejar: {rurales['TPVB'].sum() / max(total, 1):.1%}")
+    print("Textos rurales sin emparejar con más vacunados:")
+    print(rurales.head(25).to_string(index=False))
@@ -9,10 +9,13 @@ from .overview import show_overview_tab
 from .temporal import show_temporal_tab
 from .geographic import show_geographic_tab
 from .population import show_population_tab
+from .diagnostics import show_performance_panel, should_show_diagnostics
 
 __all__ = [
     'show_overview_tab',
     'show_temporal_tab', 
     'show_geographic_tab',
-    'show_population_tab'
+    'show_population_tab',
+    'show_performance_panel',
+    'should_show_diagnostics'
 ]
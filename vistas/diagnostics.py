@@ -0,0 +1,113 @@
+"""
+vistas/diagnostics.py - Panel oculto de rendimiento
+Se muestra con el parámetro ?diagnostico=1 en la URL o con mostrar_diagnostico en secretos
+"""
+
+import json
+import time
+
+import streamlit as st
+import pandas as pd
+
+from instrumentation import IMPORT_TIMES, get_run_records, get_startup_marks
+from data_version import get_hash_stats
+from circuit_breaker import get_breaker_states
+from source_resolver import get_provenance
+
+
+def should_show_diagnostics(config=None):
+    """Determina si el panel de diagnóstico está habilitado"""
+    config = config or {}
+    if config.get("mostrar_diagnostico"):
+        return True
+
+    try:
+        return st.query_params.get("diagnostico") in ("1", "true", "si")
+    except Exception:
+        return False
+
+
+def show_performance_panel():
+    """Muestra métricas por etapa de la ejecución actual"""
+    with st.expander("⚙️ Rendimiento", expanded=False):
+        records = get_run_records()
+
+        if records:
+            df_records = pd.DataFrame(records)
+            columnas = [
+                "etapa",
+                "padre",
+                "wall_s",
+                "cpu_s",
+                "filas_entrada",
+                "filas_salida",
+                "memoria_pico_mb",
+                "error",
+            ]
+            st.markdown("**⏱️ Etapas del pipeline (ejecución actual):**")
+            st.dataframe(
+                df_records[columnas],
+                use_container_width=True,
+                column_config={
+                    "etapa": st.column_config.TextColumn("Etapa"),
+                    "padre": st.column_config.TextColumn("Dentro de"),
+                    "wall_s": st.column_config.NumberColumn("Reloj (s)", format="%.3f"),
+                    "cpu_s": st.column_config.NumberColumn("CPU (s)", format="%.3f"),
+                    "filas_entrada": st.column_config.NumberColumn("Filas entrada", format="%d"),
+                    "filas_salida": st.column_config.NumberColumn("Filas salida", format="%d"),
+                    "memoria_pico_mb": st.column_config.NumberColumn(
+                        "Memoria pico (MB)", format="%.1f"
+                    ),
+                    "error": st.column_config.TextColumn("Error"),
+                },
+                hide_index=True,
+            )
+
+            st.download_button(
+                "📥 Descargar JSON",
+                data=json.dumps(records, ensure_ascii=False, indent=2),
+                file_name="rendimiento.json",
+                mime="application/json",
+            )
+        else:
+            st.info("ℹ️ Sin registros de rendimiento en esta ejecución")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("**🚀 Arranque del script:**")
+            for marca, segundos in get_startup_marks().items():
+                st.write(f"- {marca}: {segundos:.3f} s")
+
+        with col2:
+            st.markdown("**📦 Importaciones diferidas:**")
+            for modulo, segundos in IMPORT_TIMES.items():
+                st.write(f"- `{modulo}`: {segundos * 1000:.0f} ms")
+
+        # Cachés con clave de versión de datos: hasheo de DataFrames evitado
+        stats = get_hash_stats()
+        st.markdown("**🔑 Cachés por versión de datos:**")
+        st.write(
+            f"- {stats['llamadas']:,} llamadas, {stats['filas_evitadas']:,} filas sin hashear, "
+            f"~{stats['hash_evitado_s']:.2f} s de hasheo evitado (acumulado del proceso)"
+        )
+
+        # Cortacircuitos de fuentes remotas
+        st.markdown("**🔌 Cortacircuitos:**")
+        circuitos = get_breaker_states()
+        if not circuitos:
+            st.write("- Sin fuentes remotas consultadas en este proceso")
+        for nombre, estado in circuitos.items():
+            detalle = f"{estado['fallos']} fallos, {estado['rechazadas']} solicitudes atendidas sin red"
+            if estado["estado"] == "abierto":
+                restante = max(0.0, estado["abierto_hasta"] - time.time())
+                detalle += f", reintento en {restante:.0f} s"
+            if estado["ultimo_error"]:
+                detalle += f" - último error: {estado['ultimo_error']}"
+            respaldo = "con respaldo" if estado["respaldo_disponible"] else "sin respaldo"
+            st.write(f"- `{nombre}`: **{estado['estado']}** ({respaldo}) - {detalle}")
+
+        # Procedencia de los datos de la última carga
+        st.markdown("**📂 Fuente de cada conjunto de datos:**")
+        for dataset, info in get_provenance().items():
+            st.write(f"- {dataset}: **{info['fuente']}** - {info['motivo']} ({info['momento']})")
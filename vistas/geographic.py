@@ -8,21 +8,145 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
-
+from geo_layers import (
+    NIVEL_POR_DEFECTO,
+    PIXELES_MAPA,
+    feature_payloads,
+    features_in_view,
+    geo_version,
+    load_municipal_levels,
+    select_level,
+    view_resolution,
+)
+from instrumentation import instrumented
+
+from .population import calculate_municipal_coverage
+
+VISTA_DEPARTAMENTO = "Todo el departamento"
+
+# Indicadores del mapa: columna de calculate_municipal_coverage y título
+INDICADORES_MAPA = {
+    "Cobertura real (%)": "Cobertura_Real",
+    "Cobertura suavizada (%)": "Cobertura_Suavizada",
+    "Total vacunados": "Total_Vacunados",
+    "Avance meta 80% (%)": "Avance_Meta",
+    "Renuentes": "Renuentes",
+}
+
+
+@instrumented()
 def show_geographic_tab(combined_data, COLORS):
     """Muestra análisis geográfico por municipios"""
     st.header("🗺️ Distribución Geográfica")
 
+    # Mapa coroplético de cobertura por municipio
+    show_coverage_map(combined_data, COLORS)
+
     # Análisis de vacunación PRE-emergencia por municipios
     show_individual_by_municipality(combined_data, COLORS)
 
     # Análisis de barridos DURANTE emergencia por municipios
     show_barridos_by_municipality(combined_data, COLORS)
 
+    # Barridos por vereda del catálogo oficial
+    show_barridos_by_vereda(combined_data, COLORS)
+
     # Comparación territorial combinada
     show_territorial_comparison(combined_data, COLORS)
 
 
+@st.cache_resource(show_spinner=False)
+def _municipal_levels(version):
+    """
+    GeoJSON municipal por nivel de detalle y bytes de cada municipio por nivel
+    (la versión de la capa invalida la caché)
+    """
+    niveles = load_municipal_levels()
+    return niveles, {nivel: feature_payloads(geojson) for nivel, geojson in niveles.items()}
+
+
+def show_coverage_map(combined_data, COLORS):
+    """Mapa coroplético de cobertura por municipio (clave: código DANE / MpCodigo)"""
+    st.subheader("🗺️ Mapa de Cobertura por Municipio")
+
+    try:
+        niveles, pesos = _municipal_levels(geo_version())
+    except (OSError, ValueError) as e:
+        st.info(f"ℹ️ Mapa no disponible: {str(e)}")
+        return
+
+    coverage_data = calculate_municipal_coverage(combined_data)
+    if not coverage_data:
+        st.warning("⚠️ No hay datos de cobertura municipal para el mapa")
+        return
+
+    # Población viene como "73001 - IBAGUÉ": el código DANE es la clave del mapa
+    df_mapa = pd.DataFrame(coverage_data)
+    df_mapa["MpCodigo"] = df_mapa["Municipio"].astype(str).str.split(" - ").str[0].str.strip()
+
+    # Vista: departamento completo o un municipio con sus vecinos; el nivel de detalle
+    # se elige por la escala de la vista y el presupuesto de bytes del mapa
+    nombres = {
+        f["properties"]["MpNombre"]: f["id"] for f in niveles[NIVEL_POR_DEFECTO]["features"]
+    }
+    col1, col2 = st.columns(2)
+    with col1:
+        indicador = st.selectbox("Indicador", list(INDICADORES_MAPA), key="indicador_mapa")
+    with col2:
+        vista = st.selectbox(
+            "Vista del mapa", [VISTA_DEPARTAMENTO] + sorted(nombres), key="vista_mapa"
+        )
+    columna = INDICADORES_MAPA[indicador]
+
+    visibles = features_in_view(niveles[NIVEL_POR_DEFECTO], nombres.get(vista))
+    resolucion = view_resolution(niveles[NIVEL_POR_DEFECTO], visibles)
+    nivel, tamano = select_level(pesos, visibles, resolucion)
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [f for f in niveles[nivel]["features"] if f["id"] in set(visibles)],
+    }
+    df_mapa = df_mapa[df_mapa["MpCodigo"].isin(visibles)]
+
+    fig = px.choropleth(
+        df_mapa,
+        geojson=geojson,
+        locations="MpCodigo",
+        color=columna,
+        hover_name="Municipio_Display",
+        hover_data={
+            "MpCodigo": False,
+            "Cobertura_Real": ":.1f",
+            "Cobertura_Suavizada": ":.1f",
+            "Total_Vacunados": ":,",
+            "Poblacion_Asegurada": ":,",
+        },
+        color_continuous_scale=[COLORS["white"], COLORS["secondary"], COLORS["primary"]],
+        labels={
+            "Cobertura_Real": "Cobertura (%)",
+            "Cobertura_Suavizada": "Cobertura suavizada (%)",
+            "Total_Vacunados": "Vacunados",
+            "Poblacion_Asegurada": "Población asegurada",
+            "Avance_Meta": "Avance meta (%)",
+        },
+    )
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(
+        height=PIXELES_MAPA,
+        margin={"l": 0, "r": 0, "t": 10, "b": 0},
+        paper_bgcolor=COLORS["white"],
+        coloraxis_colorbar={"title": indicador},
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(
+        f"Nivel de detalle: {nivel} ({len(visibles)} municipios, {tamano / 1024:.0f} KB "
+        f"de geometría, ~{resolucion:.0f} m por píxel)"
+    )
+
+    sin_geometria = set(df_mapa["MpCodigo"]) - {f["id"] for f in geojson["features"]}
+    if sin_geometria:
+        st.caption(f"ℹ️ Municipios sin geometría en el mapa: {', '.join(sorted(sin_geometria))}")
+
+
 def show_individual_by_municipality(combined_data, COLORS):
     """Muestra distribución de vacunación PRE-emergencia por municipios"""
     st.subheader("🏥 Vacunación PRE-Emergencia por Municipios")
@@ -212,6 +336,95 @@ def show_barridos_by_municipality(combined_data, COLORS):
         )
 
 
+def show_barridos_by_vereda(combined_data, COLORS):
+    """Muestra TPVB y TPNVP por vereda del catálogo y las veredas nunca barridas"""
+    st.subheader("🏡 Barridos por Vereda")
+
+    veredas = combined_data.get("barridos_veredas")
+    if not veredas:
+        st.info("ℹ️ Catálogo de veredas no disponible")
+        return
+
+    por_vereda = veredas["por_vereda"]
+    sin_barrido = veredas["sin_barrido"]
+    sin_emparejar = veredas["sin_emparejar"]
+
+    # Selector de municipio (nombres del catálogo)
+    nombres = dict(zip(por_vereda["DPTOMPIO"], por_vereda["Municipio"]))
+    nombres.update(zip(sin_barrido["DPTOMPIO"], sin_barrido["Municipio"]))
+    opciones = ["Todos"] + sorted(nombres.values())
+    seleccion = st.selectbox("Municipio", opciones, key="municipio_veredas")
+    if seleccion != "Todos":
+        codigo = next(c for c, n in nombres.items() if n == seleccion)
+        por_vereda = por_vereda[por_vereda["DPTOMPIO"] == codigo]
+        sin_barrido = sin_barrido[sin_barrido["DPTOMPIO"] == codigo]
+        sin_emparejar = sin_emparejar[sin_emparejar["DPTOMPIO"] == codigo]
+
+    total_veredas = len(por_vereda) + len(sin_barrido)
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric(
+            "Veredas Barridas",
+            f"{len(por_vereda):,}",
+            delta=f"{len(por_vereda) / total_veredas * 100:.1f}% del catálogo" if total_veredas else None,
+        )
+
+    with col2:
+        st.metric("Veredas Sin Barrido", f"{len(sin_barrido):,}")
+
+    with col3:
+        st.metric("Vacunados en Veredas (TPVB)", f"{por_vereda['TPVB'].sum():,.0f}")
+
+    with col4:
+        st.metric("Renuentes en Veredas (TPNVP)", f"{por_vereda['TPNVP'].sum():,.0f}")
+
+    if not por_vereda.empty:
+        top_20 = por_vereda.nlargest(20, "TPVB").copy()
+        if seleccion == "Todos":
+            top_20["Vereda"] = top_20["Vereda"] + " (" + top_20["Municipio"] + ")"
+
+        fig = px.bar(
+            top_20,
+            x=["TPVB", "TPNVP"],
+            y="Vereda",
+            orientation="h",
+            barmode="group",
+            title="Top 20 Veredas - Vacunados (TPVB) y Renuentes (TPNVP)",
+            color_discrete_sequence=[COLORS["warning"], COLORS["primary"]],
+            labels={"value": "Personas", "variable": "Sección"},
+        )
+        fig.update_layout(
+            plot_bgcolor=COLORS["white"],
+            paper_bgcolor=COLORS["white"],
+            height=600,
+            yaxis={"categoryorder": "total ascending"},
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander(f"📋 Veredas nunca barridas ({len(sin_barrido):,})"):
+        st.dataframe(
+            sin_barrido[["Municipio", "Vereda", "CODIGO_VER"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    rurales = sin_emparejar[~sin_emparejar["Urbano"].astype(bool)]
+    with st.expander(
+        f"🔎 Textos de vereda fuera del catálogo ({len(sin_emparejar):,}, "
+        f"{len(rurales):,} no urbanos)"
+    ):
+        st.caption(
+            "Filas de barridos cuya vereda no se encontró en el catálogo oficial; las "
+            "marcadas como urbanas corresponden a la cabecera o a sitios fijos"
+        )
+        st.dataframe(
+            sin_emparejar[["MUNICIPIO", "VEREDAS", "Urbano", "Barridos", "TPVB", "TPNVP"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
 def show_territorial_comparison(combined_data, COLORS):
     """Muestra comparación territorial entre modalidades"""
     st.subheader("⚖️ Comparación Territorial: PRE vs DURANTE Emergencia")
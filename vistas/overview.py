@@ -10,6 +10,21 @@ import plotly.graph_objects as go
 import unicodedata
 import re
 
+from age_histogram import (
+    AGRUPACIONES_EDAD,
+    BASE_ACTUAL,
+    BASE_VACUNACION,
+    LIMITES_PAI,
+    age_distribution,
+    bin_labels,
+    is_coarsening,
+    parse_age_limits,
+    regroup_counts,
+)
+from instrumentation import instrumented
+
+AGRUPACION_PERSONALIZADA = "Personalizada"
+
 
 def normalize_municipality_name(name):
     """
@@ -61,6 +76,7 @@ def create_municipality_mapping(population_dict, vaccination_dict):
     return mapping
 
 
+@instrumented()
 def show_overview_tab(combined_data, COLORS, RANGOS_EDAD):
     """Muestra resumen general con lógica de combinación temporal"""
     st.header("📊 Resumen General - Datos Combinados Sin Duplicados")
@@ -68,6 +84,9 @@ def show_overview_tab(combined_data, COLORS, RANGOS_EDAD):
     # Métricas principales con lógica temporal
     show_main_metrics_temporal(combined_data, COLORS)
 
+    # Registros duplicados excluidos de los totales
+    show_duplicates_summary(combined_data)
+
     # Distribución por rangos de edad (combinada)
     show_combined_age_distribution(combined_data, COLORS, RANGOS_EDAD)
 
@@ -128,16 +147,171 @@ def show_main_metrics_temporal(combined_data, COLORS):
                 )
 
 
+def show_duplicates_summary(combined_data):
+    """
+    Muestra los registros duplicados excluidos de los totales y las filas de barridos
+    repetidas (solo reportadas salvo deduplicar_barridos)
+    """
+    duplicados = combined_data.get("duplicados", {})
+    dup_individual = duplicados.get("individual", {})
+    dup_barridos = duplicados.get("barridos", {})
+    barridos_retirados = dup_barridos.get("retirados", True)
+
+    total_dup = dup_individual.get("duplicados", 0) + dup_barridos.get("duplicados", 0)
+    if total_dup == 0:
+        return
+
+    excluidos = dup_individual.get("duplicados", 0)
+    if barridos_retirados:
+        excluidos += dup_barridos.get("duplicados", 0)
+
+    with st.expander(f"🔁 {excluidos:,} registros duplicados excluidos de los totales"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.metric(
+                "Duplicados individuales",
+                f"{dup_individual.get('duplicados', 0):,}",
+                delta=f"de {dup_individual.get('total_registros', 0):,} registros",
+                delta_color="off",
+            )
+
+        with col2:
+            st.metric(
+                "Filas de barridos repetidas",
+                f"{dup_barridos.get('duplicados', 0):,}",
+                delta=f"de {dup_barridos.get('total_registros', 0):,} filas",
+                delta_color="off",
+            )
+            if not barridos_retirados and dup_barridos.get("duplicados", 0):
+                st.caption(
+                    "Incluidas en los totales: las filas de barridos no identifican "
+                    "personas y una fila repetida puede ser otra vacunación"
+                )
+
+        # Duplicados por municipio (ambas fuentes)
+        municipios = set(dup_individual.get("por_municipio", {})) | set(
+            dup_barridos.get("por_municipio", {})
+        )
+        if municipios:
+            df_dup = pd.DataFrame(
+                [
+                    {
+                        "Municipio": municipio,
+                        "Individual": dup_individual.get("por_municipio", {}).get(municipio, 0),
+                        "Barridos": dup_barridos.get("por_municipio", {}).get(municipio, 0),
+                    }
+                    for municipio in municipios
+                ]
+            )
+            df_dup["Total"] = df_dup["Individual"] + df_dup["Barridos"]
+            df_dup = df_dup.sort_values("Total", ascending=False)
+
+            st.markdown("**📍 Duplicados por municipio:**")
+            st.dataframe(df_dup, use_container_width=True, hide_index=True)
+
+
+def select_age_binning(histogramas, RANGOS_EDAD):
+    """
+    Controles de base de edad, agrupación y municipio (solo si hay histograma de edades)
+
+    Args:
+        histogramas (dict): {base de edad: histograma} de las bases disponibles
+
+    Returns:
+        tuple: (histograma, rangos {etiqueta: descripción}, límites o None, municipios o None)
+    """
+    if not histogramas:
+        return None, RANGOS_EDAD, None, None
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        base = st.selectbox(
+            "Base de edad",
+            list(histogramas),
+            key="base_edad",
+            help="Edad al vacunarse: FA UNICA - FechaNacimiento, no cambia con el día",
+        )
+    histograma = histogramas[base]
+    if base == BASE_VACUNACION and histograma["sin_edad"]:
+        st.caption(
+            f"ℹ️ {histograma['sin_edad']:,} registros sin edad al vacunarse "
+            "(fechas faltantes o vacunación anterior al nacimiento)"
+        )
+    with col2:
+        agrupacion = st.selectbox(
+            "Agrupación de edades",
+            list(AGRUPACIONES_EDAD) + [AGRUPACION_PERSONALIZADA],
+            key="agrupacion_edad",
+        )
+    with col3:
+        municipio = st.selectbox(
+            "Municipio (registros PRE-emergencia)",
+            ["Todos"] + histograma["municipios"],
+            key="municipio_edad",
+        )
+
+    if agrupacion == AGRUPACION_PERSONALIZADA:
+        texto = st.text_input(
+            "Edad inicial de cada rango (años, separadas por coma)",
+            value=", ".join(str(limite) for limite in LIMITES_PAI),
+            key="limites_edad",
+        )
+        try:
+            limites = parse_age_limits(texto)
+        except ValueError as e:
+            st.warning(f"⚠️ {e}: se usan los rangos PAI")
+            limites = LIMITES_PAI
+        etiquetas = bin_labels(limites)
+    else:
+        limites = AGRUPACIONES_EDAD[agrupacion]["limites"]
+        etiquetas = AGRUPACIONES_EDAD[agrupacion]["etiquetas"] or bin_labels(limites)
+
+    if limites == LIMITES_PAI:
+        rangos = RANGOS_EDAD
+    else:
+        rangos = {e: e if "(" in e else f"{e} años" for e in etiquetas}
+
+    return histograma, rangos, limites, None if municipio == "Todos" else [municipio]
+
+
 def show_combined_age_distribution(combined_data, COLORS, RANGOS_EDAD):
     """Muestra distribución combinada por rangos de edad"""
     st.subheader("👥 Distribución por Rangos de Edad (Combinada Sin Duplicados)")
 
     # Preparar datos combinados por edad
+    individual_pre = combined_data["individual_pre"]
+    histogramas = {
+        base: individual_pre.get(clave)
+        for base, clave in [
+            (BASE_ACTUAL, "histograma_edad"),
+            (BASE_VACUNACION, "histograma_edad_vacunacion"),
+        ]
+        if individual_pre.get(clave) is not None
+    }
+    histograma, rangos, limites, municipios = select_age_binning(histogramas, RANGOS_EDAD)
+
     individual_edad = combined_data["individual_pre"]["por_edad"]
     barridos_edad = combined_data["barridos"]["vacunados_barrido"]["por_edad"]
+    total_referencia = combined_data["total_real_combinado"]
+
+    if limites is not None:
+        # Cualquier agrupación sale del histograma de edades simples, sin recalcular
+        individual_edad = age_distribution(histograma, limites, list(rangos), municipios)
+
+        # Los barridos solo vienen por rangos PAI y sin desagregar por edad y municipio
+        if is_coarsening(limites) and municipios is None:
+            barridos_edad = regroup_counts(barridos_edad, limites, list(rangos))
+        else:
+            barridos_edad = {}
+            total_referencia = sum(individual_edad.values())
+            st.caption(
+                "ℹ️ Los barridos solo están desagregados en rangos PAI y a nivel "
+                "departamental: se muestran solo los registros PRE-emergencia"
+            )
 
     age_data = []
-    for rango in RANGOS_EDAD.keys():
+    for rango in rangos.keys():
         individual_count = individual_edad.get(rango, 0)
         barridos_count = barridos_edad.get(rango, 0)
         total_rango = individual_count + barridos_count
@@ -146,13 +320,13 @@ def show_combined_age_distribution(combined_data, COLORS, RANGOS_EDAD):
             age_data.append(
                 {
                     "Rango": rango,
-                    "Descripción": RANGOS_EDAD[rango],
+                    "Descripción": rangos[rango],
                     "PRE-Emergencia": individual_count,
                     "DURANTE Emergencia": barridos_count,
                     "Total Real": total_rango,
                     "% del Total": (
-                        (total_rango / combined_data["total_real_combinado"] * 100)
-                        if combined_data["total_real_combinado"] > 0
+                        (total_rango / total_referencia * 100)
+                        if total_referencia > 0
                         else 0
                     ),
                 }
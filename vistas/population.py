@@ -10,6 +10,14 @@ import plotly.graph_objects as go
 import unicodedata
 import re
 
+from instrumentation import instrumented
+from municipal_adjacency import (
+    adjacency_version,
+    empirical_bayes_smoothing,
+    load_municipal_adjacency,
+    neighborhood_matrix,
+)
+
 
 def normalize_municipality_name(name):
     """
@@ -61,6 +69,7 @@ def create_municipality_mapping(population_dict, vaccination_dict):
     return mapping
 
 
+@instrumented()
 def show_population_tab(combined_data, COLORS):
     """Muestra análisis poblacional con normalización de municipios"""
     st.header("🏘️ Análisis Poblacional por Municipios")
@@ -204,6 +213,7 @@ def calculate_municipal_coverage(combined_data):
                     "Total_Vacunados": total_vacunados,
                     "Renuentes": renuentes_count,
                     "Cobertura_Real": cobertura_real,
+                    "Cobertura_Suavizada": float("nan"),
                     "Meta_80": meta_80,
                     "Avance_Meta": avance_meta,
                     "Faltante_Meta": faltante_meta,
@@ -212,6 +222,38 @@ def calculate_municipal_coverage(combined_data):
                 }
             )
 
+    add_smoothed_coverage(coverage_data)
+    return coverage_data
+
+
+@st.cache_resource(show_spinner=False)
+def _neighborhood_matrix(version, codigos):
+    """Matriz de vecindario para un orden de municipios (la versión de la capa invalida la caché)"""
+    return neighborhood_matrix(load_municipal_adjacency(), list(codigos))
+
+
+def add_smoothed_coverage(coverage_data):
+    """
+    Agrega Cobertura_Suavizada: Bayes empírico local con los municipios vecinos, que
+    estabiliza la tasa de los municipios pequeños (sin capa municipal queda en NaN)
+    """
+    if not coverage_data:
+        return coverage_data
+
+    # Población viene como "73001 - IBAGUÉ": el código DANE es la clave de la capa
+    codigos = tuple(str(fila["Municipio"]).split(" - ")[0].strip() for fila in coverage_data)
+    try:
+        matriz = _neighborhood_matrix(adjacency_version(), codigos)
+    except (OSError, ValueError):
+        return coverage_data
+
+    suavizada = empirical_bayes_smoothing(
+        [fila["Total_Vacunados"] for fila in coverage_data],
+        [fila["Poblacion_Asegurada"] for fila in coverage_data],
+        matriz,
+    )
+    for fila, valor in zip(coverage_data, suavizada):
+        fila["Cobertura_Suavizada"] = float(valor) * 100
     return coverage_data
 
 
@@ -350,6 +392,20 @@ def show_coverage_analysis(coverage_data, COLORS):
         )
     )
 
+    # Cobertura suavizada con vecinos (Bayes empírico local) junto a la tasa cruda
+    fig.add_trace(
+        go.Scatter(
+            name="Cobertura Suavizada (vecinos)",
+            x=df_coverage["Municipio_Display"][:20],
+            y=df_coverage["Cobertura_Suavizada"][:20],
+            mode="markers",
+            marker={"color": COLORS["secondary"], "size": 10, "symbol": "diamond"},
+            hovertemplate="<b>%{x}</b><br>"
+            + "Suavizada: %{y:.1f}%<br>"
+            + "<extra></extra>",
+        )
+    )
+
     fig.update_layout(
         title="Cobertura Real vs Meta 80% - Top 20 Municipios",
         xaxis_title="Municipio",
@@ -428,6 +484,7 @@ def show_coverage_analysis(coverage_data, COLORS):
             "DURANTE_Emergencia",
             "Total_Vacunados",
             "Cobertura_Real",
+            "Cobertura_Suavizada",
             "Avance_Meta",
             "Renuentes",
         ]
@@ -435,6 +492,7 @@ def show_coverage_analysis(coverage_data, COLORS):
 
     # Redondear valores
     tabla_display["Cobertura_Real"] = tabla_display["Cobertura_Real"].round(1)
+    tabla_display["Cobertura_Suavizada"] = tabla_display["Cobertura_Suavizada"].round(1)
     tabla_display["Avance_Meta"] = tabla_display["Avance_Meta"].round(1)
 
     # Renombrar columnas para claridad
@@ -446,6 +504,7 @@ def show_coverage_analysis(coverage_data, COLORS):
             "DURANTE_Emergencia": "DURANTE Emergencia",
             "Total_Vacunados": "Total Vacunados",
             "Cobertura_Real": "Cobertura Real (%)",
+            "Cobertura_Suavizada": "Cobertura Suavizada (%)",
             "Avance_Meta": "Avance Meta 80% (%)",
             "Renuentes": "Renuentes",
         }
@@ -470,6 +529,12 @@ def show_coverage_analysis(coverage_data, COLORS):
             "Cobertura Real (%)": st.column_config.NumberColumn(
                 "Cobertura Real (%)", format="%.1f%%"
             ),
+            "Cobertura Suavizada (%)": st.column_config.NumberColumn(
+                "Cobertura Suavizada (%)",
+                format="%.1f%%",
+                help="Bayes empírico local con los municipios vecinos: estabiliza "
+                "la tasa de los municipios con poca población",
+            ),
             "Avance Meta 80% (%)": st.column_config.NumberColumn(
                 "Avance Meta 80% (%)", format="%.1f%%"
             ),
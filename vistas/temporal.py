@@ -9,6 +9,9 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 
+from instrumentation import instrumented
+from data_version import version_key
+
 
 def safe_date_comparison(date_series, cutoff_date, operation="less"):
     """Realiza comparación de fechas de forma segura"""
@@ -77,11 +80,40 @@ def safe_group_by_date(df, date_column):
         return pd.DataFrame(columns=["Fecha", "Count"])
 
 
+def get_individual_daily(df_individual, fecha_corte_ts=None, serie_diaria=None):
+    """
+    Vacunación individual diaria (Fecha, Count), opcionalmente solo antes del corte
+    Usa la serie pre-agregada del backend analítico si está disponible
+    """
+    if serie_diaria is not None:
+        if fecha_corte_ts is None:
+            return serie_diaria.copy()
+        return serie_diaria[serie_diaria["Fecha"] < fecha_corte_ts].reset_index(drop=True)
+
+    if df_individual.empty or "FA UNICA" not in df_individual.columns:
+        return pd.DataFrame(columns=["Fecha", "Count"])
+
+    # Cacheado por versión de datos: Streamlit no hashea el DataFrame
+    return _group_individual_daily(df_individual, version_key(df_individual), fecha_corte_ts).copy()
+
+
+@st.cache_data(show_spinner=False)
+def _group_individual_daily(_df_individual, version, fecha_corte_ts):
+    """Agrupación diaria de FA UNICA (antes del corte si se indica)"""
+    if fecha_corte_ts is None:
+        return safe_group_by_date(_df_individual, "FA UNICA")
+
+    mask_pre = safe_date_comparison(_df_individual["FA UNICA"], fecha_corte_ts, "less")
+    return safe_group_by_date(_df_individual[mask_pre], "FA UNICA")
+
+
+@instrumented()
 def show_temporal_tab(combined_data, df_individual, df_barridos, COLORS):
     """Muestra análisis temporal con separación clara PRE vs DURANTE emergencia"""
     st.header("📅 Análisis Temporal - Combinación Sin Duplicados")
 
     fecha_corte = combined_data.get("fecha_corte")
+    serie_diaria = combined_data.get("serie_diaria_individual")
 
     if fecha_corte:
         # Convertir timestamp a datetime para evitar errores con Plotly
@@ -97,25 +129,27 @@ def show_temporal_tab(combined_data, df_individual, df_barridos, COLORS):
         )
 
         # Mostrar evolución PRE-emergencia
-        show_pre_emergency_evolution(df_individual, fecha_corte_dt, COLORS)
+        show_pre_emergency_evolution(df_individual, fecha_corte_dt, COLORS, serie_diaria)
 
         # Mostrar evolución DURANTE emergencia
         show_during_emergency_evolution(df_barridos, fecha_corte_dt, COLORS)
 
         # Mostrar comparación temporal combinada
-        show_combined_temporal_analysis(df_individual, df_barridos, fecha_corte_dt, COLORS)
+        show_combined_temporal_analysis(
+            df_individual, df_barridos, fecha_corte_dt, COLORS, serie_diaria
+        )
 
     else:
         st.warning("⚠️ No se pudo determinar fecha de corte")
         # Mostrar análisis básico sin corte
-        show_basic_temporal_analysis(df_individual, df_barridos, COLORS)
+        show_basic_temporal_analysis(df_individual, df_barridos, COLORS, serie_diaria)
 
 
-def show_pre_emergency_evolution(df_individual, fecha_corte_dt, COLORS):
+def show_pre_emergency_evolution(df_individual, fecha_corte_dt, COLORS, serie_diaria=None):
     """Muestra evolución PRE-emergencia (vacunación individual)"""
     st.subheader("🏥 Período PRE-Emergencia (Vacunación Individual)")
 
-    if df_individual.empty or "FA UNICA" not in df_individual.columns:
+    if serie_diaria is None and (df_individual.empty or "FA UNICA" not in df_individual.columns):
         st.warning("⚠️ No hay datos de vacunación individual disponibles")
         return
 
@@ -125,23 +159,15 @@ def show_pre_emergency_evolution(df_individual, fecha_corte_dt, COLORS):
     else:
         fecha_corte_ts = fecha_corte_dt
 
-    # Filtrar solo datos PRE-emergencia usando comparación segura
-    mask_pre = safe_date_comparison(df_individual["FA UNICA"], fecha_corte_ts, "less")
-    df_pre = df_individual[mask_pre].copy()
+    # Serie diaria solo PRE-emergencia
+    daily_pre = get_individual_daily(df_individual, fecha_corte_ts, serie_diaria)
 
-    if df_pre.empty:
+    if daily_pre.empty:
         st.info(
             f"ℹ️ No hay vacunación individual antes de {fecha_corte_dt.strftime('%d/%m/%Y')}"
         )
         return
 
-    # Agrupar por fecha usando función segura
-    daily_pre = safe_group_by_date(df_pre, "FA UNICA")
-    
-    if daily_pre.empty:
-        st.info("ℹ️ No hay fechas válidas en datos PRE-emergencia")
-        return
-
     daily_pre.columns = ["Fecha", "Vacunados"]
     daily_pre["Acumulado"] = daily_pre["Vacunados"].cumsum()
 
@@ -413,7 +439,7 @@ def show_during_emergency_evolution(df_barridos, fecha_corte_dt, COLORS):
         st.metric("Total DURANTE", f"{total_vacunados_durante:,}")
 
 
-def show_combined_temporal_analysis(df_individual, df_barridos, fecha_corte_dt, COLORS):
+def show_combined_temporal_analysis(df_individual, df_barridos, fecha_corte_dt, COLORS, serie_diaria=None):
     """Muestra análisis temporal combinado con línea de corte"""
     st.subheader("⚖️ Análisis Temporal Combinado")
 
@@ -423,19 +449,10 @@ def show_combined_temporal_analysis(df_individual, df_barridos, fecha_corte_dt,
     else:
         fecha_corte_ts = fecha_corte_dt
 
-    # Preparar datos PRE-emergencia usando función segura
-    if "FA UNICA" in df_individual.columns:
-        mask_pre = safe_date_comparison(df_individual["FA UNICA"], fecha_corte_ts, "less")
-        df_pre = df_individual[mask_pre]
-
-        if not df_pre.empty:
-            pre_daily = safe_group_by_date(df_pre, "FA UNICA")
-            if not pre_daily.empty:
-                pre_daily.columns = ["Fecha", "Individual"]
-            else:
-                pre_daily = pd.DataFrame(columns=["Fecha", "Individual"])
-        else:
-            pre_daily = pd.DataFrame(columns=["Fecha", "Individual"])
+    # Preparar datos PRE-emergencia
+    pre_daily = get_individual_daily(df_individual, fecha_corte_ts, serie_diaria)
+    if not pre_daily.empty:
+        pre_daily.columns = ["Fecha", "Individual"]
     else:
         pre_daily = pd.DataFrame(columns=["Fecha", "Individual"])
 
@@ -569,28 +586,24 @@ def show_combined_temporal_analysis(df_individual, df_barridos, fecha_corte_dt,
         )
 
 
-def show_basic_temporal_analysis(df_individual, df_barridos, COLORS):
+def show_basic_temporal_analysis(df_individual, df_barridos, COLORS, serie_diaria=None):
     """Muestra análisis temporal básico cuando no hay fecha de corte"""
     st.subheader("📅 Análisis Temporal Básico")
 
     st.info("💡 Sin fecha de corte definida - mostrando datos completos")
 
     # Análisis básico de individuales
-    if not df_individual.empty and "FA UNICA" in df_individual.columns:
-        # Usar función segura para obtener fechas válidas
-        fechas_convertidas = pd.to_datetime(df_individual["FA UNICA"], errors='coerce')
-        df_ind_valid = df_individual[fechas_convertidas.notna()]
-        
-        if not df_ind_valid.empty:
-            fecha_min_ind = fechas_convertidas.min()
-            fecha_max_ind = fechas_convertidas.max()
-            total_ind = len(df_ind_valid)
+    daily_ind = get_individual_daily(df_individual, None, serie_diaria)
+    if not daily_ind.empty:
+        fecha_min_ind = daily_ind["Fecha"].min()
+        fecha_max_ind = daily_ind["Fecha"].max()
+        total_ind = int(daily_ind["Count"].sum())
 
-            st.metric(
-                "Vacunación Individual",
-                f"{fecha_min_ind.strftime('%d/%m/%Y')} - {fecha_max_ind.strftime('%d/%m/%Y')}",
-                delta=f"{total_ind:,} vacunados",
-            )
+        st.metric(
+            "Vacunación Individual",
+            f"{fecha_min_ind.strftime('%d/%m/%Y')} - {fecha_max_ind.strftime('%d/%m/%Y')}",
+            delta=f"{total_ind:,} vacunados",
+        )
 
     # Análisis básico de barridos
     if not df_barridos.empty and "FECHA" in df_barridos.columns: